@@ -1,6 +1,12 @@
 import logging
-from utils.testing import test_consistency
-
+from utils.testing import (
+    test_consistency,
+    test_correctness,
+    test_cut_pairs,
+    test_incremental,
+    test_separation_pairs,
+    test_triconnected_components,
+)
 
 # --- EXAMPLES --------------------------------------------------------------- #
 
@@ -108,17 +114,41 @@ geant2 = {
     23: [19, 22],
 }
 
+# Two copies of simple2 joined by the bridge 4 -- 5, with a pendant vertex 9
+# hanging off 8 by another bridge, three components {1-4}, {5-8} and {9}
+bridges = {
+    1: [2, 3, 4],
+    2: [1, 3, 4],
+    3: [1, 2, 4],
+    4: [1, 2, 3, 5],
+    5: [4, 6, 7, 8],
+    6: [5, 7, 8],
+    7: [5, 6, 8],
+    8: [5, 6, 7, 9],
+    9: [8],
+}
+
 
 def test_examples():
-    """Run test_consistency on all examples"""
-    test_consistency(simple)
-    test_consistency(simple2)
-    test_consistency(simple3)
-    test_consistency(graph)
-    test_consistency(paper_example)
-    test_consistency(nsfnet)
-    test_consistency(gbn)
-    test_consistency(geant2)
+    """Run test_consistency, test_correctness and the brute-force checks on all
+    examples"""
+    for example in [
+        simple,
+        simple2,
+        simple3,
+        graph,
+        paper_example,
+        nsfnet,
+        gbn,
+        geant2,
+        bridges,
+    ]:
+        test_consistency(example)
+        test_correctness(example)
+        test_incremental(example, seed=0)
+        test_cut_pairs(example)
+        test_triconnected_components(example)
+        test_separation_pairs(example)
 
 
 # ---------------------------------------------------------------------------- #
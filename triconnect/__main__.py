@@ -0,0 +1,9 @@
+"""The batch runner, `python -m triconnect --help` for the options"""
+
+import logging
+import sys
+
+from utils.batch import main
+
+logging.basicConfig(level=logging.INFO)
+sys.exit(main())
@@ -1,87 +1,115 @@
-from typing import List, Set, DefaultDict, Dict
-from collections import defaultdict
-from utils import Component, Edge, MutableEdge
+from typing import List, Optional, Set, Dict, Union
+from utils import Component, Edge
+from utils.graph import CSRGraph
 
 from utils.disjoint import Disjoint
 
 
 class ThreeEdgeConnectBase:
-    # Graph to modify (key is vertex, value is list of adjacent vertices)
-    graph: Dict[int, List[int]]
-    # Make an edge graph, where the key is a vertex, and the value is a set of
-    # edges that are objects and have unique identifiers
-    edge_graph: Dict[int, Set[MutableEdge]]
-    # A disjoint-set-union object where the key is an edge in edges, and the value
-    # is the embodiment of that edge
-    # An embodiment is simply the representation of an edge after some merges
-    # happen to its incident vertices
-    embodiments: Disjoint[Edge]
-    # Initialize each component to be 1 vertex (itself)
+    # Compact array form of the input graph, every vertex is referred to by its
+    # dense id (0..n-1) from here on out, and only mapped back to its original
+    # label when the components are returned
+    csr: CSRGraph
+    # A disjoint-set-union over edges (by their index in edge_list), where the
+    # owner of a set is the embodiment of every edge in it. An embodiment is
+    # simply the representation of an edge after some merges happen to its
+    # incident vertices. Only built if an implementation asks for it.
+    _embodiments: Optional[Disjoint]
+    # Every edge (u, v) the embodiments know of, and its index
+    edge_list: List[Edge]
+    edge_index: Dict[Edge, int]
+    # Initialize each component to be 1 vertex (itself), only kept by the
+    # implementations that merge components as sets
     components: Dict[int, Set[int]]
 
-    def __init__(self, root: int, g: Dict[int, List[int]]):
-        # Temporary graph solely for constructing edge_graph
-        temp: Dict[int, List[int]] = dict()
-
-        self.graph = dict()
-        # Set of all edges in the entire graph
-        edges: Set[Edge] = set()
-        for u, connected in g.items():
-            # Copy over all vertices
-            temp[u] = connected.copy()
-            self.graph[u] = connected.copy()
-            # Add an edge to the set of edges for each
-            for v in connected:
-                edges.add(Edge(u, v))
-
-        # Make an edge graph, where the key is a vertex, and the value is a set of
-        # edges that are objects and have unique identifiers
-        self.edge_graph = defaultdict(set)
-        i = 0
-        for u, adj in temp.items():
-            for v in adj:
-                edge = MutableEdge(u, v, i)
-                self.edge_graph[u].add(edge)
-                self.edge_graph[v].add(edge)
-                temp[v].remove(u)
-                i += 1
-
-        # A disjoint-set-union object where the key is an edge in edges, and the value
-        # is the embodiment of that edge
-        # An embodiment is simply the representation of an edge after some merges
-        # happen to its incident vertices
-        self.embodiments = Disjoint(list(edges))
-
-        # Initialize each component to be 1 vertex (itself)
-        self.components = dict()
-        for u in self.edge_graph:
-            self.components[u] = set([u])
+    def __init__(self, root: Optional[int], g: Union[Dict[int, List[int]], CSRGraph]):
+        self.csr = g if isinstance(g, CSRGraph) else CSRGraph.from_dict(g)
+        n = self.csr.n
+
+        # Built the first time the embodiments are used
+        self._embodiments = None
 
         self.time = 1
-        # Preordering of edge_graph (order encountered in dfs)
-        self.pre = defaultdict(int)
+        # Preordering of the graph (order encountered in dfs), 0 if unvisited
+        self.pre = [0] * n
         # Key is a vertex, value is lowest pre-order value reachable via tree-edges and one back-edge
-        self.low = dict()
-        # Key is a vertex, and the value is the "w-path" as defined in the paper
-        self.paths = dict()
-
-        self._explore(root)
+        self.low = [0] * n
+
+        # Build whatever structures the specific implementation works on
+        self._setup()
+        if root is not None:
+            self._explore(self.csr.index(root))
+        else:
+            # Whole-graph mode, explore every connected component in turn
+            for u in range(n):
+                if not self.pre[u]:
+                    self._explore(u)
+
+    @property
+    def embodiments(self) -> Disjoint:
+        """The embodiments of the edges, built on first use"""
+        if self._embodiments is None:
+            self.edge_list = []
+            self.edge_index = dict()
+            self._embodiments = Disjoint()
+            for u, v in zip(self.csr.edge_u.tolist(), self.csr.edge_v.tolist()):
+                self._edge_id(Edge(u, v))
+        return self._embodiments
+
+    def _edge_id(self, edge: Edge) -> int:
+        """Get the index of an edge in the embodiments, adding it if it is new
+        (parallel edges share one)"""
+        i = self.edge_index.get(edge)
+        if i is None:
+            i = self.embodiments.add()
+            self.edge_list.append(edge)
+            self.edge_index[edge] = i
+        return i
+
+    def _embody(self, a: Edge, b: Edge):
+        """Let edge a embody edge b (and everything b embodied)"""
+        embodiments = self.embodiments
+        embodiments.union(self._edge_id(a), self._edge_id(b))
+
+    def _embodiment(self, edge: Edge) -> Edge:
+        """Get the edge that currently embodies the given one"""
+        embodiments = self.embodiments
+        return self.edge_list[embodiments.get(self._edge_id(edge))]
 
     def get(self):
-        # Convert to components
+        # Group vertices by their component label
+        groups: Dict[int, List[int]] = dict()
+        for u, label in enumerate(self.get_labels()):
+            groups.setdefault(label, []).append(u)
+
+        # Convert to components (with the original vertex labels)
+        labels = self.csr.labels.tolist()
         res: List[Component] = []
-        for c in self.components.values():
-            res.append(Component(c))
+        for c in groups.values():
+            res.append(Component(labels[u] for u in c))
 
         return res
 
+    def get_labels(self) -> List[int]:
+        """Get the component label of every (dense) vertex, vertices sharing a
+        label are in the same component."""
+        labels = [0] * self.csr.n
+        for label, c in self.components.items():
+            for u in c:
+                labels[u] = label
+
+        return labels
+
     time: int
-    # Preordering of edge_graph (order encountered in dfs)
-    pre: DefaultDict[int, int]
+    # Preordering of the graph (order encountered in dfs), 0 if unvisited
+    pre: List[int]
     # Key is a vertex, value is lowest pre-order value reachable via tree-edges and one back-edge
-    low: Dict[int, int]
-    # Key is a vertex, and the value is the "w-path" as defined in the paper
-    paths: Dict[int, List[int]]
+    low: List[int]
+
+    def _setup(self):
+        """Build the implementation-specific structures from self.csr, called
+        right before exploring from the root."""
+        pass
 
     def _explore(self, u: int):
         raise NotImplementedError()
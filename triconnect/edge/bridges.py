@@ -0,0 +1,209 @@
+"""A linear-time pre-pass that finds the bridges of a graph. A bridge can never
+lie inside a 3-edge-connected component (removing it alone disconnects its
+endpoints), so splitting the graph at its bridges leaves 2-edge-connected
+blocks that can each be solved independently. The articulation points (cut
+vertices) and the biconnected components of a graph are found the same way."""
+
+from utils.graph import CSRGraph
+
+import numpy as np
+
+
+def find_bridges(graph: CSRGraph) -> np.ndarray:
+    """Find every bridge of the graph with a single iterative depth-first
+    search (parallel edges are never bridges). Returns a boolean mask over the
+    edge uids."""
+
+    n = graph.n
+    offsets = graph.offsets.tolist()
+    targets = graph.targets.tolist()
+    half_edges = graph.edge_ids.tolist()
+
+    # Preordering of the graph (order encountered in dfs), 0 if unvisited
+    pre = [0] * n
+    # Lowest pre-order value reachable via tree-edges and one back-edge
+    low = [0] * n
+    # The uid of the tree edge leading into each vertex
+    parent_edge = [-1] * n
+    # Position of the next edge to examine in each vertex's incidence list
+    cursor = offsets[:-1]
+    bridges = np.zeros(graph.m, dtype=bool)
+
+    time = 1
+    for root in range(n):
+        if pre[root]:
+            continue
+
+        pre[root] = low[root] = time
+        time += 1
+        stack = [root]
+        while stack:
+            u = stack[-1]
+            i = cursor[u]
+            if i < offsets[u + 1]:
+                cursor[u] = i + 1
+                e = half_edges[i]
+                # Only skip the tree edge itself, not edges parallel to it
+                if e == parent_edge[u]:
+                    continue
+
+                v = targets[i]
+                if not pre[v]:
+                    pre[v] = low[v] = time
+                    time += 1
+                    parent_edge[v] = e
+                    stack.append(v)
+                elif pre[v] < low[u]:
+                    low[u] = pre[v]
+            else:
+                # Post-visit u from its parent
+                stack.pop()
+                if stack:
+                    p = stack[-1]
+                    if low[u] < low[p]:
+                        low[p] = low[u]
+                    # Nothing below u reaches above it, so p -- u is a bridge
+                    if low[u] > pre[p]:
+                        bridges[parent_edge[u]] = True
+
+    return bridges
+
+
+def two_edge_connected_components(graph: CSRGraph) -> np.ndarray:
+    """Get the 2-edge-connected component (block) label of every vertex, which
+    are simply the connected components left after removing every bridge."""
+    return graph.connected_components(removed=find_bridges(graph))
+
+
+def find_articulation_points(graph: CSRGraph) -> np.ndarray:
+    """Find every articulation point of the graph (a vertex whose removal
+    disconnects its connected component) with a single iterative depth-first
+    search. Returns a boolean mask over the vertices."""
+
+    n = graph.n
+    offsets = graph.offsets.tolist()
+    targets = graph.targets.tolist()
+    half_edges = graph.edge_ids.tolist()
+
+    pre = [0] * n
+    low = [0] * n
+    parent_edge = [-1] * n
+    cursor = offsets[:-1]
+    # The number of tree children of each vertex
+    children = [0] * n
+    articulation = np.zeros(n, dtype=bool)
+
+    time = 1
+    for root in range(n):
+        if pre[root]:
+            continue
+
+        pre[root] = low[root] = time
+        time += 1
+        stack = [root]
+        while stack:
+            u = stack[-1]
+            i = cursor[u]
+            if i < offsets[u + 1]:
+                cursor[u] = i + 1
+                e = half_edges[i]
+                if e == parent_edge[u]:
+                    continue
+
+                v = targets[i]
+                if not pre[v]:
+                    pre[v] = low[v] = time
+                    time += 1
+                    parent_edge[v] = e
+                    children[u] += 1
+                    stack.append(v)
+                elif pre[v] < low[u]:
+                    low[u] = pre[v]
+            else:
+                # Post-visit u from its parent
+                stack.pop()
+                if stack:
+                    p = stack[-1]
+                    if low[u] < low[p]:
+                        low[p] = low[u]
+                    # Nothing below u reaches above p, so removing p cuts u off
+                    # (the root is handled separately, below)
+                    if low[u] >= pre[p] and p != root:
+                        articulation[p] = True
+
+        # The root is an articulation point if it has more than one subtree
+        if children[root] > 1:
+            articulation[root] = True
+
+    return articulation
+
+
+def biconnected_components(graph: CSRGraph) -> np.ndarray:
+    """Split the edges of the graph into its biconnected components (blocks),
+    the maximal sets of edges where every two lie on a common simple cycle,
+    with a single iterative depth-first search. Returns the block label of
+    every edge uid (-1 for self-loops, which belong to no block)."""
+
+    n = graph.n
+    offsets = graph.offsets.tolist()
+    targets = graph.targets.tolist()
+    half_edges = graph.edge_ids.tolist()
+
+    pre = [0] * n
+    low = [0] * n
+    parent_edge = [-1] * n
+    cursor = offsets[:-1]
+    # Tree edges and back-edges in the order they were found, the edges of a
+    # block are on top once its highest vertex is post-visited
+    edges = []
+    labels = np.full(graph.m, -1, dtype=np.int64)
+    blocks = 0
+
+    time = 1
+    for root in range(n):
+        if pre[root]:
+            continue
+
+        pre[root] = low[root] = time
+        time += 1
+        stack = [root]
+        while stack:
+            u = stack[-1]
+            i = cursor[u]
+            if i < offsets[u + 1]:
+                cursor[u] = i + 1
+                e = half_edges[i]
+                v = targets[i]
+                if e == parent_edge[u] or v == u:
+                    continue
+
+                if not pre[v]:
+                    pre[v] = low[v] = time
+                    time += 1
+                    parent_edge[v] = e
+                    edges.append(e)
+                    stack.append(v)
+                elif pre[v] < pre[u]:
+                    # A back-edge, seen from its lower end first (the upper
+                    # end sees it once it is already visited, and ignores it)
+                    edges.append(e)
+                    if pre[v] < low[u]:
+                        low[u] = pre[v]
+            else:
+                # Post-visit u from its parent
+                stack.pop()
+                if stack:
+                    p = stack[-1]
+                    if low[u] < low[p]:
+                        low[p] = low[u]
+                    # Nothing below u reaches above p, so everything found
+                    # since the tree edge p -- u is one block
+                    if low[u] >= pre[p]:
+                        while True:
+                            f = edges.pop()
+                            labels[f] = blocks
+                            if f == parent_edge[u]:
+                                break
+                        blocks += 1
+
+    return labels
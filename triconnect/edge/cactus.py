@@ -0,0 +1,140 @@
+"""The cactus structure of a graph, given its 3-edge-connected components.
+
+Contracting every 3-edge-connected component into a single node turns each
+2-edge-connected block into a cactus, where every edge lies on exactly one cycle,
+and the blocks are joined by bridges. Two edges form a cut pair (removing both
+disconnects the graph, but removing either one alone does not) exactly when they
+lie on the same cycle, so the edges of each cycle are a class of cut pairs. All of
+this is found with one depth-first search over the contracted graph: every
+back-edge closes exactly one cycle, the tree path up from the descendant to the
+ancestor."""
+
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+from utils.graph import CSRGraph
+
+import numpy as np
+
+
+class Cactus:
+    # The node (contracted 3-edge-connected component, 0..k-1) of every vertex
+    node_of: np.ndarray
+    # The nodes on each cycle in order, starting from the one closest to the
+    # root of the search (which every other member hangs from)
+    cycles: List[List[int]]
+    # The uids of the edges on each cycle, where cycle_edges[c][i] joins
+    # cycles[c][i] and the next node around the cycle
+    cycle_edges: List[List[int]]
+    # Each bridge as its (parent, child) nodes, and its edge uid
+    bridges: List[Tuple[int, int]]
+    bridge_edges: List[int]
+
+    def __init__(
+        self,
+        graph: CSRGraph,
+        labels: Union[Sequence[int], np.ndarray],
+        edges: Optional[np.ndarray] = None,
+    ):
+        """Build the cactus of a graph from the component label of every
+        (dense) vertex, as returned by get_labels(). If edges (uids) are given,
+        only those edges are considered. Raises an exception if the components
+        are not the 3-edge-connected components of the graph (and so do not
+        contract into cacti)."""
+
+        _, inverse = np.unique(np.asarray(labels), return_inverse=True)
+        self.node_of = inverse.ravel()
+        self.cycles = []
+        self.cycle_edges = []
+        self.bridges = []
+        self.bridge_edges = []
+        if not len(self.node_of):
+            return
+
+        # Contract every component, only keeping the edges between two of them
+        if edges is None:
+            edges = np.arange(graph.m)
+        qu = self.node_of[graph.edge_u[edges]]
+        qv = self.node_of[graph.edge_v[edges]]
+        kept = qu != qv
+        quotient = CSRGraph.from_edges(qu[kept], qv[kept], n=self.k)
+        self._search(quotient, edges[kept].tolist())
+
+    @property
+    def k(self) -> int:
+        """The number of nodes"""
+        return int(self.node_of.max()) + 1 if len(self.node_of) else 0
+
+    def _search(self, quotient: CSRGraph, uids: List[int]):
+        """Find every cycle and bridge with one iterative depth-first search of
+        the contracted graph. uids maps its edges back to the original ones."""
+
+        k = quotient.n
+        offsets = quotient.offsets.tolist()
+        targets = quotient.targets.tolist()
+        half_edges = quotient.edge_ids.tolist()
+
+        pre = [0] * k
+        parent = [-1] * k
+        parent_edge = [-1] * k
+        # Whether the tree edge into each node is already on some cycle
+        covered = [False] * k
+        cursor = offsets[:-1]
+        # Nodes in preorder, so bridges come out parents first
+        order: List[int] = []
+
+        time = 1
+        for root in range(k):
+            if pre[root]:
+                continue
+            pre[root] = time
+            time += 1
+            order.append(root)
+            stack = [root]
+            while stack:
+                u = stack[-1]
+                i = cursor[u]
+                if i == offsets[u + 1]:
+                    stack.pop()
+                    continue
+                cursor[u] = i + 1
+                e = half_edges[i]
+                v = targets[i]
+                # Only skip the tree edge itself, not edges parallel to it
+                if e == parent_edge[u]:
+                    continue
+                if not pre[v]:
+                    pre[v] = time
+                    time += 1
+                    parent[v] = u
+                    parent_edge[v] = e
+                    order.append(v)
+                    stack.append(v)
+                elif pre[v] < pre[u]:
+                    # A back-edge from u up to v closes the cycle v, ..., u
+                    members = [u]
+                    edges = [uids[e]]
+                    x = u
+                    while x != v:
+                        if covered[x]:
+                            raise Exception("The components do not form a cactus.")
+                        covered[x] = True
+                        edges.append(uids[parent_edge[x]])
+                        x = parent[x]
+                        members.append(x)
+                    members.reverse()
+                    edges.reverse()
+                    self.cycles.append(members)
+                    self.cycle_edges.append(edges)
+
+        # Every tree edge that is on no cycle is a bridge
+        for x in order:
+            if parent[x] != -1 and not covered[x]:
+                self.bridges.append((parent[x], x))
+                self.bridge_edges.append(uids[parent_edge[x]])
+
+    def cut_pairs(self) -> Iterator[Tuple[int, int]]:
+        """Enumerate every cut pair (as edge uids) explicitly. There can be
+        quadratically many of them, prefer cycle_edges where possible."""
+        for edges in self.cycle_edges:
+            for i in range(len(edges)):
+                for j in range(i + 1, len(edges)):
+                    yield edges[i], edges[j]
@@ -0,0 +1,95 @@
+"""The nested hierarchy of a graph's connected, 2-edge-connected and
+3-edge-connected components (every 3-edge-connected component lies inside a
+2-edge-connected one, which lies inside a connected one).
+
+Everything is read off the depth-first search the engine already did, so no
+other traversal is needed. Every search tree spans a connected component, and a
+tree edge into v is a bridge exactly when nothing below v reaches above it
+(low[v] == pre[v]), so cutting the trees at their bridges leaves the
+2-edge-connected components. Each vertex then only has to find the closest of
+its ancestors (or itself) that is a root, or hangs from a bridge, which is done
+for every vertex at once by pointer jumping."""
+
+from typing import Sequence, Tuple
+from utils.graph import CSRGraph
+
+import numpy as np
+
+
+def _jump(up: np.ndarray) -> np.ndarray:
+    """Follow the pointers in up (where roots point to themselves) until every
+    element points to its root, doubling the distance jumped every round"""
+    while True:
+        further = up[up]
+        if np.array_equal(further, up):
+            return up
+        up = further
+
+
+class Hierarchy:
+    # The connected, 2-edge-connected and 3-edge-connected component of every
+    # (dense) vertex, each level numbered 0..k-1 (in order of their labels)
+    cc: np.ndarray
+    two: np.ndarray
+    three: np.ndarray
+    # The parent of every component, the component of the level above that
+    # contains it: two_parent[c] is a connected component, and three_parent[c]
+    # a 2-edge-connected one
+    two_parent: np.ndarray
+    three_parent: np.ndarray
+    # Whether each edge (indexed by uid) is a bridge
+    bridges: np.ndarray
+
+    def __init__(
+        self,
+        graph: CSRGraph,
+        pre: Sequence[int],
+        low: Sequence[int],
+        tree: bytearray,
+        labels: Sequence[int],
+    ):
+        """Build the hierarchy from the preorder and low value of every vertex
+        and the tree edges (by uid) of the search, and the 3-edge-connected
+        component label of every vertex, as returned by get_labels(). Vertices
+        the search never reached are left as components by themselves."""
+
+        n = graph.n
+        pre_arr = np.asarray(pre, dtype=np.int64)
+        low_arr = np.asarray(low, dtype=np.int64)
+        tree_edges = np.flatnonzero(np.frombuffer(tree, dtype=np.uint8))
+
+        # Every tree edge leads from the endpoint visited first to the other
+        tu = graph.edge_u[tree_edges].astype(np.int64)
+        tv = graph.edge_v[tree_edges].astype(np.int64)
+        down = pre_arr[tu] < pre_arr[tv]
+        child = np.where(down, tv, tu)
+        up = np.arange(n)
+        up[child] = np.where(down, tu, tv)
+
+        # Nothing below the child of a bridge reaches above it
+        cut = low_arr[child] == pre_arr[child]
+        self.bridges = np.zeros(graph.m, dtype=bool)
+        self.bridges[tree_edges[cut]] = True
+
+        cc = _jump(up.copy())
+        up[child[cut]] = child[cut]
+        two = _jump(up)
+
+        _, self.cc = np.unique(cc, return_inverse=True)
+        _, self.two = np.unique(two, return_inverse=True)
+        _, self.three = np.unique(np.asarray(labels), return_inverse=True)
+        self.cc, self.two, self.three = (
+            self.cc.ravel(),
+            self.two.ravel(),
+            self.three.ravel(),
+        )
+
+        # Every member of a component has the same parent, so any one will do
+        self.two_parent = np.zeros(self.two.max(initial=-1) + 1, dtype=np.int64)
+        self.two_parent[self.two] = self.cc
+        self.three_parent = np.zeros(self.three.max(initial=-1) + 1, dtype=np.int64)
+        self.three_parent[self.three] = self.two
+
+    def levels(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The component of every vertex at each level, from the coarsest"""
+        return self.cc, self.two, self.three
@@ -0,0 +1,416 @@
+"""Maintain the 3-edge-connected components of a graph as edges are inserted,
+without re-running the whole algorithm.
+
+Contracting every 3-edge-connected component of a graph into a single node
+turns each 2-edge-connected block into a cactus (every edge lies on exactly one
+cycle), and the blocks are joined by bridges. This structure is kept as a forest
+of cycles: every cycle (a bridge is simply a flagged cycle of two nodes) has a
+root node, the member closest to the root of its tree, and every other node
+hangs from exactly one parent cycle. The members of a cycle are kept in cyclic
+order as a circular linked list of slots.
+
+Inserting an edge between nodes a and b only affects the path between them.
+Every cycle on the path is entered and left through two nodes, which become
+3-edge-connected (the two arcs of the cycle plus the new edge). So all of them
+merge into one node, and each such cycle splits into its two arcs. Bridges on the
+path stop being bridges, and together with the new edge they form a single new
+cycle. Walking the path is paid for by the nodes merged and bridges consumed.
+A split only relabels the smaller of the two arcs, and linking two trees only
+re-roots the smaller one, so an insertion costs O(log n) amortized."""
+
+from .cactus import Cactus
+from .iterative import ThreeEdgeConnectIterative
+from .base import ThreeEdgeConnectBase
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from utils import Component
+from utils.graph import CSRGraph
+
+
+class IncrementalThreeEdgeConnect:
+    # Original vertex label -> dense vertex, and back
+    index: Dict[int, int]
+    labels: List[int]
+    # The node (contracted 3-edge-connected component) of every dense vertex, as
+    # it was when the vertex was added, resolve it with _find
+    node_of: List[int]
+
+    # Union-find over nodes, recording which nodes were merged together
+    node_parent: List[int]
+    node_size: List[int]
+    # Union-find over nodes, recording which nodes are in the same tree
+    tree_parent: List[int]
+    tree_size: List[int]
+    # The slot of a node (only valid for union-find roots) in its parent cycle,
+    # -1 if it is the root of its tree
+    up_slot: List[int]
+
+    # Circular linked lists of slots, one per cycle
+    slot_next: List[int]
+    slot_prev: List[int]
+    # The node (resolve it with _find) and the cycle each slot belongs to
+    slot_node: List[int]
+    slot_cycle: List[int]
+
+    # The slot of the root node of every cycle
+    root_slot: List[int]
+    # Whether each cycle is actually a bridge (a single edge)
+    is_bridge: List[bool]
+
+    def __init__(
+        self,
+        g: Union[Dict[int, List[int]], CSRGraph],
+        labels: Optional[Sequence[int]] = None,
+    ):
+        """Seed the structure from a graph and the component label of every
+        (dense) vertex, as returned by get_labels(). If no labels are given,
+        the iterative engine is run on the whole graph to get them."""
+
+        csr = g if isinstance(g, CSRGraph) else CSRGraph.from_dict(g)
+        if labels is None:
+            labels = ThreeEdgeConnectIterative(None, csr).get_labels()
+
+        self.labels = csr.labels.tolist()
+        self.index = {u: i for i, u in enumerate(self.labels)}
+
+        cactus = Cactus(csr, labels)
+        self.node_of = cactus.node_of.tolist()
+        k = cactus.k
+
+        self.node_parent = list(range(k))
+        self.node_size = [1] * k
+        self.tree_parent = list(range(k))
+        self.tree_size = [1] * k
+        self.up_slot = [-1] * k
+        self.slot_next = []
+        self.slot_prev = []
+        self.slot_node = []
+        self.slot_cycle = []
+        self.root_slot = []
+        self.is_bridge = []
+        self._build(cactus)
+
+    @classmethod
+    def from_engine(cls, engine: ThreeEdgeConnectBase) -> "IncrementalThreeEdgeConnect":
+        """Seed the structure from the result of an engine, which must have been
+        run on the whole graph (with root=None)."""
+        return cls(engine.csr, engine.get_labels())
+
+    def _build(self, cactus: Cactus):
+        """Build the forest of cycles from the cactus of the graph, where the
+        root of every cycle is its first member."""
+
+        for members in cactus.cycles:
+            self._new_cycle(members, bridge=False)
+            for x in members[1:]:
+                self._union_trees(members[0], x)
+
+        for p, x in cactus.bridges:
+            self._new_cycle([p, x], bridge=True)
+            self._union_trees(p, x)
+
+    # --- UNION-FIND ---------------------------------------------------------- #
+
+    def _find(self, x: int) -> int:
+        """Get the node that x has been merged into"""
+        parent = self.node_parent
+        while parent[x] != x:
+            # Path halving
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def _find_tree(self, x: int) -> int:
+        parent = self.tree_parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def _union_trees(self, x: int, y: int):
+        x, y = self._find_tree(x), self._find_tree(y)
+        if x == y:
+            return
+        if self.tree_size[x] < self.tree_size[y]:
+            x, y = y, x
+        self.tree_parent[y] = x
+        self.tree_size[x] += self.tree_size[y]
+
+    def _merge(self, x: int, y: int, up: int) -> int:
+        """Merge nodes x and y (both union-find roots), the merged node hangs
+        from the given slot. Returns the merged node."""
+        if self.node_size[x] < self.node_size[y]:
+            x, y = y, x
+        self.node_parent[y] = x
+        self.node_size[x] += self.node_size[y]
+        self.up_slot[x] = up
+        return x
+
+    # --- CYCLES -------------------------------------------------------------- #
+
+    def _new_slot(self, node: int, cycle: int) -> int:
+        s = len(self.slot_node)
+        self.slot_next.append(s)
+        self.slot_prev.append(s)
+        self.slot_node.append(node)
+        self.slot_cycle.append(cycle)
+        return s
+
+    def _new_cycle(self, members: List[int], bridge: bool) -> int:
+        """Add a cycle through the given nodes (in order), where members[0] is
+        its root and every other member hangs from it."""
+        c = len(self.root_slot)
+        slots = [self._new_slot(x, c) for x in members]
+        self._link(slots)
+        self.root_slot.append(slots[0])
+        self.is_bridge.append(bridge)
+        for x, s in zip(members[1:], slots[1:]):
+            self.up_slot[x] = s
+        return c
+
+    def _link(self, slots: List[int]):
+        """Link the given slots into a circular list, in order"""
+        for a, b in zip(slots, slots[1:] + slots[:1]):
+            self.slot_next[a] = b
+            self.slot_prev[b] = a
+
+    def _parent(self, x: int) -> Tuple[int, int]:
+        """Get the parent cycle of node x and the root node of that cycle, or
+        (-1, -1) if x is the root of its tree."""
+        s = self.up_slot[x]
+        if s == -1:
+            return -1, -1
+        c = self.slot_cycle[s]
+        return c, self._find(self.slot_node[self.root_slot[c]])
+
+    def _slot_of(self, x: int, c: int) -> int:
+        """Get the slot of node x in cycle c, which x is either the root of or
+        hangs from"""
+        s = self.up_slot[x]
+        if s != -1 and self.slot_cycle[s] == c:
+            return s
+        return self.root_slot[c]
+
+    def _split(self, c: int, p: int, q: int) -> int:
+        """Split cycle c into its two arcs between members p and q, merging p
+        and q into a single node. Returns the merged node."""
+
+        sp = self._slot_of(p, c)
+        sq = self._slot_of(q, c)
+        r = self.root_slot[c]
+        # The parent slot of whichever of p and q was the root of c
+        upper = self.up_slot[q] if sq == r else self.up_slot[p] if sp == r else -1
+
+        # Walk both arcs at once until the shorter one ends, so that only the
+        # smaller one has to be relabeled (and searched for the root slot)
+        a, b = self.slot_next[sp], self.slot_next[sq]
+        small, small_end = sp, sq
+        while True:
+            if a == sq:
+                break
+            if b == sp:
+                small, small_end = sq, sp
+                break
+            a, b = self.slot_next[a], self.slot_next[b]
+        large, large_end = (sq, sp) if small == sp else (sp, sq)
+
+        # Gather the smaller arc (its first slot up to, not including, its end)
+        arc = [small]
+        x = self.slot_next[small]
+        while x != small_end:
+            arc.append(x)
+            x = self.slot_next[x]
+
+        # Close both arcs up into their own cycles, where the first slot of each
+        # arc now stands for the merged node
+        self._close(large, self.slot_prev[small])
+        self._close(small, arc[-1])
+
+        # The larger arc keeps the cycle, the smaller one gets a new one
+        new = len(self.root_slot)
+        self.root_slot.append(small)
+        self.is_bridge.append(False)
+        for s in arc:
+            self.slot_cycle[s] = new
+        self.root_slot[c] = large
+
+        # The merged node is the root of both arcs, unless the old root of the
+        # cycle is inside one of them, in which case it hangs from that arc
+        up = upper
+        if r in arc:
+            if r != small:
+                self.root_slot[new] = r
+                up = small
+        elif r != large:
+            self.root_slot[c] = r
+            up = large
+
+        merged = self._merge(p, q, up)
+        self.slot_node[sp] = merged
+        self.slot_node[sq] = merged
+
+        # An arc that is just the merged node is a self-loop, drop its cycle
+        for s, cycle in ((large, c), (small, new)):
+            if self.slot_next[s] == s:
+                self.root_slot[cycle] = -1
+        return merged
+
+    def _close(self, first: int, last: int):
+        self.slot_next[last] = first
+        self.slot_prev[first] = last
+
+    # --- PATHS --------------------------------------------------------------- #
+
+    def _path(self, a: int, b: int) -> Tuple[List[int], List[int]]:
+        """Get the path between nodes a and b (in the same tree) as the nodes
+        on it and the cycles joining each consecutive pair of them."""
+
+        # Walk up from both ends in turn, until one reaches a node the other
+        # has already passed, which is where the paths meet
+        up_a: Dict[int, int] = {a: 0}
+        up_b: Dict[int, int] = {b: 0}
+        nodes_a, cycles_a = [a], []
+        nodes_b, cycles_b = [b], []
+        x, y = a, b
+        while x not in up_b and y not in up_a:
+            if x != -1:
+                c, x = self._parent(x)
+                if x != -1:
+                    up_a[x] = len(nodes_a)
+                    nodes_a.append(x)
+                    cycles_a.append(c)
+                if x in up_b:
+                    break
+            if y != -1:
+                c, y = self._parent(y)
+                if y != -1:
+                    up_b[y] = len(nodes_b)
+                    nodes_b.append(y)
+                    cycles_b.append(c)
+
+        meet = x if x in up_b else y
+        i, j = up_a[meet], up_b[meet]
+        nodes_a, cycles_a = nodes_a[: i + 1], cycles_a[:i]
+        nodes_b, cycles_b = nodes_b[: j + 1], cycles_b[:j]
+
+        if cycles_a and cycles_b and cycles_a[-1] == cycles_b[-1]:
+            # Both ends come up through the same cycle, which the path only
+            # passes through (between the two members below its root)
+            nodes_a.pop()
+            cycles_b.pop()
+        nodes_b.pop()
+
+        return nodes_a + nodes_b[::-1], cycles_a + cycles_b[::-1]
+
+    # --- PUBLIC -------------------------------------------------------------- #
+
+    def add_vertex(self, u: int) -> int:
+        """Add an isolated vertex (given its original label), if it is not in
+        the graph already. Returns its dense id."""
+
+        if u in self.index:
+            return self.index[u]
+        i = len(self.labels)
+        self.index[u] = i
+        self.labels.append(u)
+
+        node = len(self.node_parent)
+        self.node_of.append(node)
+        self.node_parent.append(node)
+        self.node_size.append(1)
+        self.tree_parent.append(node)
+        self.tree_size.append(1)
+        self.up_slot.append(-1)
+        return i
+
+    def add_edge(self, u: int, v: int):
+        """Insert the edge u -- v (given by original labels, vertices that are
+        not in the graph yet are added) and update the components."""
+
+        a = self._find(self.node_of[self.add_vertex(u)])
+        b = self._find(self.node_of[self.add_vertex(v)])
+        if a == b:
+            return
+
+        if self._find_tree(a) != self._find_tree(b):
+            # A new bridge between two trees, hang the smaller tree from it
+            if self.tree_size[self._find_tree(a)] < self.tree_size[self._find_tree(b)]:
+                a, b = b, a
+            self._reroot(b)
+            self._new_cycle([a, b], bridge=True)
+            self._union_trees(a, b)
+            return
+
+        nodes, cycles = self._path(a, b)
+
+        # Merge the two members of every (non-bridge) cycle on the path, which
+        # leaves runs of merged nodes separated by bridges
+        runs = [nodes[0]]
+        bridges: List[int] = []
+        for c, x in zip(cycles, nodes[1:]):
+            if self.is_bridge[c]:
+                bridges.append(c)
+                runs.append(x)
+            else:
+                runs[-1] = self._split(c, self._find(runs[-1]), self._find(x))
+
+        if bridges:
+            self._absorb_bridges([self._find(x) for x in runs], bridges)
+
+    def _absorb_bridges(self, runs: List[int], bridges: List[int]):
+        """The bridges between consecutive runs, together with the new edge
+        from the last run back to the first, form a single new cycle."""
+
+        # The highest run is the one whose bridges on both sides hang below it
+        top = 0
+        for i, c in enumerate(bridges):
+            if self._find(self.slot_node[self.root_slot[c]]) == runs[i + 1]:
+                top = i + 1
+
+        c = len(self.root_slot)
+        self.root_slot.append(-1)
+        self.is_bridge.append(False)
+        slots = []
+        for i, x in enumerate(runs):
+            if i == top:
+                # Reuse the root slot of an adjacent bridge
+                bridge = bridges[i - 1] if i > 0 else bridges[i]
+                slots.append(self.root_slot[bridge])
+            else:
+                slots.append(self.up_slot[x])
+
+        for s in slots:
+            self.slot_cycle[s] = c
+        self._link(slots)
+        self.root_slot[c] = slots[top]
+        for bridge in bridges:
+            self.root_slot[bridge] = -1
+
+    def _reroot(self, x: int):
+        """Make node x the root of its tree, by moving the root slot of every
+        cycle on the path up from x"""
+
+        s = self.up_slot[x]
+        self.up_slot[x] = -1
+        while s != -1:
+            c = self.slot_cycle[s]
+            r = self.root_slot[c]
+            y = self._find(self.slot_node[r])
+            after = self.up_slot[y]
+            self.root_slot[c] = s
+            self.up_slot[y] = r
+            s = after
+
+    def connected(self, u: int, v: int) -> bool:
+        """Whether u and v (given by original labels) are 3-edge-connected"""
+        a = self._find(self.node_of[self.index[u]])
+        return a == self._find(self.node_of[self.index[v]])
+
+    def get_labels(self) -> List[int]:
+        """Get the component label of every (dense) vertex"""
+        return [self._find(x) for x in self.node_of]
+
+    def get(self) -> List[Component]:
+        groups: Dict[int, List[int]] = dict()
+        for u, label in enumerate(self.get_labels()):
+            groups.setdefault(label, []).append(self.labels[u])
+        return [Component(c) for c in groups.values()]
@@ -1,6 +1,12 @@
 from .base import ThreeEdgeConnectBase
-from typing import List, Set, Dict
-from utils import MutableEdge, print_progress_bar
+from .cactus import Cactus
+from .hierarchy import Hierarchy
+from .stats import Progress, Stats
+from typing import Callable, List, Dict, Optional, Union
+from utils import print_progress_bar
+from utils.graph import CSRGraph
+
+import numpy as np
 
 
 class ThreeEdgeConnectIterative(ThreeEdgeConnectBase):
@@ -8,55 +14,271 @@ class ThreeEdgeConnectIterative(ThreeEdgeConnectBase):
     algorithm. It introduces some necessary modifications in order to support
     large datasets."""
 
-    def __init__(self, root: int, g: Dict[int, List[int]], progress_bar=False):
-        # Whether or not to show progress bar
-        self.progress_bar = progress_bar
+    # Whether or not each edge (indexed by uid) is a tree edge
+    tree: bytearray
+    # The w-paths, stored as linked nodes indexed by vertex. The u-path is u,
+    # path_next[u], path_next[path_next[u]], ... until -1. Since a vertex is on
+    # at most one path at a time, finding it, splitting after it or prepending
+    # to it are all constant time.
+    path_next: List[int]
+    # The original edges of u are the uids in half_edges[offsets[u]:offsets[u + 1]],
+    # leading to the original vertices in targets, and cursor[u] is the position
+    # of the next one to be examined. Only the original edges of a vertex have
+    # to be examined (edges gained by absorbing were already examined from the
+    # absorbed vertex), so each edge is examined at most twice in total.
+    offsets: List[int]
+    targets: List[int]
+    half_edges: List[int]
+    cursor: List[int]
+    # A union-find over vertices recording every absorb (and eject). Instead of
+    # redirecting edges when a vertex is absorbed, the current endpoint of an
+    # edge is resolved lazily as owner[find(x)] when the edge is examined.
+    parent: List[int]
+    size: List[int]
+    owner: List[int]
+    # The number of (non self-loop) edges incident to each vertex, kept up to
+    # date as in Tsin's paper: absorbing v into u along a w-path adds deg(v) - 2,
+    # and an incoming back-edge (which always ends up a self-loop) removes 2
+    deg: List[int]
+    # The vertex each vertex was absorbed into (itself if never absorbed),
+    # ejected vertices are left as their own component
+    absorbed_into: List[int]
+    # The cactus of the explored part of the graph, only built if cut pairs
+    # were asked for
+    cactus: Optional[Cactus]
+    # The connected and 2-edge-connected components the 3-edge-connected ones
+    # nest in, only built if asked for
+    hierarchy: Optional[Hierarchy]
+    # Counters and per-phase timers, only kept if asked for
+    stats: Optional[Stats]
+
+    def __init__(
+        self,
+        root: Optional[int],
+        g: Union[Dict[int, List[int]], CSRGraph],
+        progress_bar=False,
+        cut_pairs=False,
+        progress: Optional[Callable[[int, int], None]] = None,
+        progress_every: int = 0,
+        progress_interval: float = 0.1,
+        stats=False,
+        hierarchy=False,
+    ):
+        """progress(processed, total) is called as vertices are post-visited,
+        at most every progress_interval seconds (see Progress), progress_bar
+        prints a progress bar the same way. With stats, counters of the work done
+        and the time spent in each phase are kept in self.stats. With hierarchy,
+        the connected and 2-edge-connected components are read off the same
+        search as well (see get_hierarchy)."""
+
+        if progress is None and progress_bar:
+            progress = _print_progress
+        self.progress = progress
+        self.progress_every = progress_every
+        self.progress_interval = progress_interval
+        # How many vertices have been post-visited (across every root explored)
+        self.processed = 0
+
+        self.stats = None
+        if stats:
+            self.stats = Stats()
+            self._instrument()
         # Init main graph
         super().__init__(root, g)
 
+        # Cut pairs and the hierarchy are read off the components and the search
+        # in one more linear pass, so nothing is paid for them during the search
+        self.cactus = None
+        self.hierarchy = None
+        if cut_pairs or hierarchy:
+            labels = self.get_labels()
+        if cut_pairs:
+            explored = np.asarray(self.pre)[self.csr.edge_u] > 0
+            if self.stats is None:
+                self.cactus = Cactus(self.csr, labels, np.flatnonzero(explored))
+            else:
+                with self.stats.timer("cactus"):
+                    self.cactus = Cactus(self.csr, labels, np.flatnonzero(explored))
+        if hierarchy:
+            if self.stats is None:
+                self.hierarchy = Hierarchy(
+                    self.csr, self.pre, self.low, self.tree, labels
+                )
+            else:
+                with self.stats.timer("hierarchy"):
+                    self.hierarchy = Hierarchy(
+                        self.csr, self.pre, self.low, self.tree, labels
+                    )
+
+    def _setup(self):
+        n = self.csr.n
+        self.offsets = self.csr.offsets.tolist()
+        self.targets = self.csr.targets.tolist()
+        self.half_edges = self.csr.edge_ids.tolist()
+        self.cursor = self.offsets[:-1]
+        self.tree = bytearray(self.csr.m)
+        self.path_next = [-1] * n
+
+        self.parent = list(range(n))
+        self.size = [1] * n
+        self.owner = list(range(n))
+        self.deg = [self.offsets[u + 1] - self.offsets[u] for u in range(n)]
+        self.absorbed_into = list(range(n))
+
+        # The search only compares processed against next_report, which can
+        # never be reached if there is no one to report progress to
+        self._progress = None
+        self.next_report = n + 1
+        if self.progress is not None:
+            self._progress = Progress(
+                self.progress, n, self.progress_every, self.progress_interval
+            )
+            self.next_report = self._progress.next_check
+
+    def _instrument(self):
+        """Swap counting (and timing) versions of the hot methods in, on this
+        instance only, so that the class itself never pays for them"""
+        stats = self.stats
+        setup, explore, get_labels = self._setup, self._explore, self.get_labels
+        absorb, absorb_section, resolve = (
+            self._absorb,
+            self._absorb_section,
+            self._resolve,
+        )
+
+        def timed(phase: str, f):
+            def wrapper(*args):
+                with stats.timer(phase):
+                    return f(*args)
+
+            return wrapper
+
+        def counted_find(x: int) -> int:
+            parent = self.parent
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+                stats.find_hops += 1
+            return x
+
+        def counted_resolve(x: int) -> int:
+            stats.resolves += 1
+            return resolve(x)
+
+        def counted_absorb(u: int, v: int, eject: bool = False):
+            if eject:
+                stats.ejects += 1
+            else:
+                stats.absorbs += 1
+            absorb(u, v, eject)
+
+        def counted_absorb_section(u: int, x: int, stop: int = -1):
+            if stop != -1:
+                stats.path_splits += 1
+            before = stats.absorbs
+            absorb_section(u, x, stop)
+            length = stats.absorbs - before
+            if length:
+                stats.sections += 1
+                stats.path_total += length
+                stats.path_max = max(stats.path_max, length)
+
+        self._setup = timed("setup", setup)
+        self._explore = timed("explore", explore)
+        self.get_labels = timed("labels", get_labels)
+        self._find = counted_find
+        self._resolve = counted_resolve
+        self._absorb = counted_absorb
+        self._absorb_section = counted_absorb_section
+
+    def get_cut_pairs(self) -> List[List[int]]:
+        """Get every cut pair (two edges whose removal disconnects the graph,
+        where neither is a bridge) as classes of edge uids, where any two edges
+        of the same class form a cut pair. Edges map to their original endpoints
+        through csr.edge_u and csr.edge_v."""
+        if self.cactus is None:
+            raise Exception("Cut pairs were not requested (pass cut_pairs=True).")
+        return self.cactus.cycle_edges
+
+    def get_hierarchy(self) -> Hierarchy:
+        """Get the connected, 2-edge-connected and 3-edge-connected components,
+        with the parent of every component in the level above"""
+        if self.hierarchy is None:
+            raise Exception("The hierarchy was not requested (pass hierarchy=True).")
+        return self.hierarchy
+
+    def get_labels(self) -> List[int]:
+        labels = self.absorbed_into.copy()
+        for u in range(len(labels)):
+            # Follow the chain of absorbs to the final absorber
+            root = labels[u]
+            while labels[root] != root:
+                root = labels[root]
+            # Compress the chain behind us
+            while labels[u] != root:
+                labels[u], u = root, labels[u]
+
+        return labels
+
+    def _find(self, x: int) -> int:
+        """Get the union-find root of the set x belongs to"""
+        parent = self.parent
+        while parent[x] != x:
+            # Path halving
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def _resolve(self, x: int) -> int:
+        """Get the vertex that x currently belongs to (after all absorbs)"""
+        return self.owner[self._find(x)]
+
     def _absorb(self, u: int, v: int, eject: bool = False):
         """Absorb v into u."""
         assert u != v
-        self.edge_graph[u].update(self.edge_graph[v])
-
-        # A list of edges that were changed to become self-loops
-        self_loops: Set[MutableEdge] = set()
-        for edge in self.edge_graph[v]:
-            # Redirect all of the edges
-            edge.redirect(v, u)
-            if edge.v == edge.u:
-                self_loops.add(edge)
-
-        # Remove immediate self-loops from
-        self.edge_graph[u].difference_update(self_loops)
+
+        # Union the sets of u and v (by size), u remains the owner
+        ru = self._find(u)
+        rv = self._find(v)
+        if self.size[ru] < self.size[rv]:
+            ru, rv = rv, ru
+        self.parent[rv] = ru
+        self.size[ru] += self.size[rv]
+        self.owner[ru] = u
+
+        # The edge joining u and v becomes a self-loop
+        self.deg[u] += self.deg[v] - 2
         if not eject:
-            # (v) is absorbed into (u), so it is no longer needed in the edge_graph
-            self.edge_graph.pop(v)
             # Absorb components of original vertex into this one
-            self.components[u].update(self.components[v])
-            # Get rid of this item, since it has been absorbed by u
-            self.components.pop(v)
+            self.absorbed_into[v] = u
         else:
-            # Degree should be 2 if we are ejecting
-            assert len(self.edge_graph[v]) == 2
+            # Degree should be at most 2 if we are ejecting
+            assert self.deg[v] <= 2
             # Nothing should be pointed to v at this point,
             # likewise, v should not be connected to anything either
-            self.edge_graph[v].clear()
+            self.deg[v] = 0
+
+    def _absorb_section(self, u: int, x: int, stop: int = -1):
+        """Absorb the section of a w-path starting at x into u, up to and
+        including stop (or to the end of the path if stop is -1). The cost is
+        linear in the number of vertices absorbed."""
+        section: List[int] = []
+        while x != -1:
+            section.append(x)
+            if x == stop:
+                break
+            x = self.path_next[x]
+        else:
+            if stop != -1:
+                raise Exception(f"Could not find {stop} in paths[{u}]")
+
+        for x in section:
+            self._absorb(u, x, eject=False)
 
     def _explore(self, u: int):
         # Initialize the stack with the root
         stack = [u]
 
-        # --- USED FOR PROGRESS BAR (if selected) ---------------------------- #
-        processed = 0
-        length = len(self.graph)
-        # Print out a progress bar with how many vertices have been post-visited
-        if self.progress_bar:
-            print_progress_bar(
-                processed, length, prefix="Progress:", suffix="Complete", length=50
-            )
-        # --------------------------------------- ---------------------------- #
-
         # The previously visited vertex, the last vertex that was popped on top of u
         prev: int = 0
         while stack:
@@ -64,7 +286,7 @@ class ThreeEdgeConnectIterative(ThreeEdgeConnectBase):
             u = stack[-1]
 
             # If u has not been visited
-            if u not in self.pre:
+            if not self.pre[u]:
                 # This is the first time we are visiting this vertex
                 self.pre[u] = self.time
                 self.time += 1
@@ -72,85 +294,104 @@ class ThreeEdgeConnectIterative(ThreeEdgeConnectBase):
                 # Initialize low values and u-path
                 # Assign pre-order value
                 self.low[u] = self.pre[u]
-                self.paths[u] = [u]
+                self.path_next[u] = -1
             else:
                 # We are post visiting u from some vertex, v!
                 # (prev) is the item that was just popped, thus the last vertex visited
 
                 v = prev
+                # The first vertex of the v-path
+                head = v
 
-                # Absorb-eject if the degree of v is only two
-                if len(self.edge_graph[v]) == 2:
+                # Absorb-eject if the degree of v is only two (or only one, in
+                # which case u -- v is a bridge and v is cut off entirely)
+                if self.deg[v] <= 2:
                     # Connect u to all of v's edges, and EJECT v
                     self._absorb(u, v, eject=True)
-                    self.paths[v].remove(v)
+                    # Remove v from the front of the v-path
+                    head = self.path_next[v]
 
                 # u is connected to some item earlier in the tree than v
                 if self.low[u] <= self.low[v]:
                     # Absorb v-path, prepended by u
-                    self._absorb_path([u] + self.paths[v])
+                    self._absorb_section(u, head)
                 else:
                     # v is connected to some item earlier in the tree that u
                     self.low[u] = self.low[v]
                     # Completely absorb u-path
-                    self._absorb_path(self.paths[u])
-                    self.paths[u] = [u] + self.paths[v]
+                    self._absorb_section(u, self.path_next[u])
+                    # Prepend u to the v-path
+                    self.path_next[u] = head
 
             # Was there one edge connected from u to another unexplored vertex, v?
             explored: bool = False
-            for edge in self.edge_graph[u].copy():
+            # Resume examining the original edges of u where we last left off
+            i = self.cursor[u]
+            end = self.offsets[u + 1]
+            while i < end:
+                e = self.half_edges[i]
+                i += 1
+
+                # Get the other end of the edge u -- v
+                v = self._resolve(self.targets[i - 1])
+
                 # Skip self-loops
-                if edge.u == edge.v:
+                if v == u:
+                    # The other end was absorbed into u, which only happens to
+                    # descendants, so this is the last time this back-edge is
+                    # examined (and the first time it is seen as a self-loop)
+                    if not self.tree[e]:
+                        self.deg[u] -= 2
                     continue
 
-                # Get the other end of the edge u --v
-                v = edge.adj(u)
-
                 # If this edge points to another vertex that has NOT been visited yet
-                if v not in self.pre:
+                if not self.pre[v]:
                     # v is unvisited
                     stack.append(v)
                     # Mark this edge as a tree-edge
-                    edge.mark()
+                    self.tree[e] = 1
                     # One has been found, do not push any more vertices to stack
                     explored = True
                     break
                 # Only continue if we are looking on a BACK-EDGE
-                elif not edge.tree:
+                elif not self.tree[e]:
                     # u was visited later than v
                     if self.pre[u] > self.pre[v]:
                         # Outgoing back-edge of u
                         if self.pre[v] < self.low[u]:
-                            self._absorb_path(self.paths[u])
+                            self._absorb_section(u, self.path_next[u])
                             self.low[u] = self.pre[v]
-                            self.paths[u] = [u]
+                            self.path_next[u] = -1
                     # u was visited earlier than v
                     elif self.pre[u] < self.pre[v]:
-                        # Incoming back-edge of u
-                        if v in self.paths[u]:
-                            index = self.paths[u].index(v)
-                            self._absorb_path(self.paths[u][: index + 1])
-                            self.paths[u] = [u] + self.paths[u][index + 1 :]
-                        else:
-                            raise Exception(f"Could not find {v} in paths[{u}]")
+                        # Incoming back-edge of u. Every descendant of u that
+                        # has not been absorbed or ejected lies on the u-path,
+                        # so split it right after v and absorb everything up to
+                        # and including v
+                        self.deg[u] -= 2
+                        rest = self.path_next[v]
+                        self._absorb_section(u, self.path_next[u], v)
+                        self.path_next[u] = rest
                     else:
                         raise Exception("pre[u] == pre[v], bad.")
+            self.cursor[u] = i
 
             # If u was only connected to already visited vertices
             if not explored:
                 # Pop it from the stack, where it will never be pushed again
                 stack.pop()
 
-                # Update progress bar metrics
-                processed += 1
-                if self.progress_bar:
-                    print_progress_bar(
-                        processed,
-                        length,
-                        prefix="Progress:",
-                        suffix="Complete",
-                        length=50,
-                    )
+                # Report progress once due (a single comparison otherwise)
+                self.processed += 1
+                if self.processed >= self.next_report:
+                    self.next_report = self._progress.check(self.processed)
 
                 # Update prev to indicate this was the last visited vertex
                 prev = u
+
+
+def _print_progress(processed: int, total: int):
+    """The default progress callback, a progress bar of post-visited vertices"""
+    print_progress_bar(
+        processed, total, prefix="Progress:", suffix="Complete", length=50
+    )
@@ -0,0 +1,250 @@
+"""A linear-time reduction of a graph to its kernel, before running the engine on
+it. None of these rules changes which of the other vertices are 3-edge-connected:
+
+    - a vertex of degree 0 or 1 is a component by itself, and can be removed
+      (no path between two other vertices goes through it)
+    - so is a vertex of degree 2, and it can be replaced by a single edge
+      between its two neighbours (a path through it uses both of its edges),
+      which contracts every chain of them into one edge
+    - two vertices joined by 3 or more parallel edges are always in the same
+      component, and can be merged (any cut of fewer than 3 edges leaves both
+      on the same side, so merging them never joins two other vertices)
+
+Applying one rule can enable the others, so they are applied from worklists
+until none applies, leaving every vertex with degree 3 or more and no edge with
+a multiplicity above 2. The iterative engine then runs on this (often much
+smaller) kernel, and its components are mapped back: removed vertices are
+singletons, and merged vertices share the component of what they merged into."""
+
+from .iterative import ThreeEdgeConnectIterative
+from typing import Dict, List, Optional, Tuple, Union
+from utils import Component
+from utils.graph import CSRGraph
+
+import numpy as np
+
+
+class ThreeEdgeConnectKernel:
+    """Reduce the graph to its kernel, and run ThreeEdgeConnectIterative on that
+    instead of on the whole graph. Only the components are given back (through
+    get and get_labels, as with the engines), the search itself ran on the
+    kernel."""
+
+    # Compact array form of the input graph, every vertex is referred to by its
+    # dense id (0..n-1)
+    csr: CSRGraph
+    # The kernel, where every vertex is labeled by its dense id in csr
+    kernel: CSRGraph
+    # The engine that was run on the kernel
+    engine: ThreeEdgeConnectIterative
+    # The vertex of the graph behind every vertex of the kernel
+    vertices: List[int]
+    # The vertex each vertex was merged into (itself if never merged)
+    merged_into: List[int]
+    # Whether each vertex was removed as a component by itself
+    removed: bytearray
+    # How many vertices were peeled (degree 0 or 1, or 2 to a single neighbour),
+    # suppressed (degree 2) and merged into another
+    peeled: int
+    suppressed: int
+    merged: int
+
+    def __init__(
+        self, root: Optional[int], g: Union[Dict[int, List[int]], CSRGraph], **kwargs
+    ):
+        """Only the connected component of root is reduced and solved (every
+        one of them if root is None), the same as the engines. Any other
+        keyword arguments are passed on to the engine, which only ever sees the
+        kernel. Cut pairs and the hierarchy would be of kernel edges and
+        vertices, so they cannot be asked for."""
+
+        for option in ("cut_pairs", "hierarchy"):
+            if kwargs.get(option):
+                raise ValueError(
+                    f"{option} is not supported through the kernel, run ThreeEdgeConnectIterative on the graph instead."
+                )
+
+        self.csr = g if isinstance(g, CSRGraph) else CSRGraph.from_dict(g)
+        n = self.csr.n
+
+        # Vertices outside of the component of root are left untouched
+        active = np.ones(n, dtype=bool)
+        if root is not None:
+            components = self.csr.connected_components()
+            active = components == components[self.csr.index(root)]
+
+        self.merged_into = list(range(n))
+        self.removed = bytearray(n)
+        self.peeled = self.suppressed = self.merged = 0
+        self._reduce(active)
+        self.engine = ThreeEdgeConnectIterative(None, self.kernel, **kwargs)
+
+    def _peel(self, active: np.ndarray) -> List[int]:
+        """Remove every vertex of degree 0 or 1 (which can leave more of them),
+        and return the degree of every vertex left"""
+
+        offsets = self.csr.offsets.tolist()
+        targets = self.csr.targets.tolist()
+        removed = self.removed
+        deg = np.diff(self.csr.offsets).tolist()
+
+        stack = np.flatnonzero(active & (np.diff(self.csr.offsets) <= 1)).tolist()
+        while stack:
+            v = stack.pop()
+            if removed[v]:
+                continue
+            removed[v] = 1
+            self.peeled += 1
+            for i in range(offsets[v], offsets[v + 1]):
+                w = targets[i]
+                if not removed[w]:
+                    deg[w] -= 1
+                    if deg[w] <= 1:
+                        stack.append(w)
+
+        return deg
+
+    def _find(self, x: int) -> int:
+        """Get the vertex that x was (eventually) merged into"""
+        merged_into = self.merged_into
+        root = x
+        while merged_into[root] != root:
+            root = merged_into[root]
+        # Compress the chain behind us
+        while merged_into[x] != root:
+            merged_into[x], x = root, merged_into[x]
+        return root
+
+    def _reduce(self, active: np.ndarray):
+        """Apply the rules until none applies, and build the kernel"""
+
+        deg = self._peel(active)
+        removed = self.removed
+        merged_into = self.merged_into
+        n = self.csr.n
+
+        # The multiplicity of every edge left, counted in both directions
+        alive_mask = active & ~np.frombuffer(removed, dtype=bool)
+        us, vs = self.csr.edge_u, self.csr.edge_v
+        kept = alive_mask[us] & alive_mask[vs]
+        us, vs = us[kept].astype(np.int64), vs[kept].astype(np.int64)
+        keys, counts = np.unique(
+            np.concatenate((us * n + vs, vs * n + us)), return_counts=True
+        )
+        sources = (keys // n).tolist()
+        neighbors = (keys % n).tolist()
+        counts = counts.tolist()
+        bounds = np.searchsorted(keys // n, np.arange(n + 1)).tolist()
+
+        # The multigraph left, as the multiplicity of every edge, by neighbour
+        alive = np.flatnonzero(alive_mask).tolist()
+        # (every vertex removed or merged away is deleted from it)
+        adj: Dict[int, Dict[int, int]] = {
+            u: dict(
+                zip(
+                    neighbors[bounds[u] : bounds[u + 1]],
+                    counts[bounds[u] : bounds[u + 1]],
+                )
+            )
+            for u in alive
+        }
+
+        # Vertices that may have degree 2 or less, and pairs of vertices that
+        # may be joined by 3 or more edges
+        low = [u for u in alive if deg[u] <= 2]
+        heavy: List[Tuple[int, int]] = [
+            (u, w) for u, w, c in zip(sources, neighbors, counts) if c >= 3 and u < w
+        ]
+
+        while low or heavy:
+            if low:
+                v = low.pop()
+                if removed[v] or merged_into[v] != v or deg[v] > 2:
+                    continue
+                removed[v] = 1
+                a = adj.pop(v)
+                if deg[v] == 2 and len(a) == 2:
+                    # Replace the path x -- v -- y by the edge x -- y
+                    self.suppressed += 1
+                    x, y = a
+                    del adj[x][v]
+                    del adj[y][v]
+                    c = adj[x].get(y, 0) + 1
+                    adj[x][y] = adj[y][x] = c
+                    if c == 3:
+                        heavy.append((x, y))
+                else:
+                    # Every edge of v leads to the same vertex (if any)
+                    self.peeled += 1
+                    for x, c in a.items():
+                        del adj[x][v]
+                        deg[x] -= c
+                        if deg[x] <= 2:
+                            low.append(x)
+                continue
+
+            u, w = heavy.pop()
+            u, w = self._find(u), self._find(w)
+            if u == w or removed[u] or removed[w] or adj[u].get(w, 0) < 3:
+                continue
+
+            # Merge the vertex with fewer neighbours into the other
+            if len(adj[u]) < len(adj[w]):
+                u, w = w, u
+            self.merged += 1
+            merged_into[w] = u
+            au, aw = adj[u], adj.pop(w)
+            c = au.pop(w)
+            del aw[u]
+            deg[u] += deg[w] - 2 * c
+            for x, k in aw.items():
+                ax = adj[x]
+                del ax[w]
+                before = ax.get(u, 0)
+                ax[u] = au[x] = before + k
+                # Pairs already joined by 3 or more edges were queued before
+                if before < 3 <= before + k:
+                    heavy.append((u, x))
+            if deg[u] <= 2:
+                low.append(u)
+
+        # Every vertex left makes up the kernel, with its edges (i < j)
+        self.vertices = [u for u in alive if not removed[u] and merged_into[u] == u]
+        index = np.full(n, -1, dtype=np.int64)
+        index[self.vertices] = np.arange(len(self.vertices))
+        lengths: List[int] = []
+        targets: List[int] = []
+        multiplicities: List[int] = []
+        for u in self.vertices:
+            a = adj[u]
+            lengths.append(len(a))
+            targets.extend(a.keys())
+            multiplicities.extend(a.values())
+        us = np.repeat(np.arange(len(self.vertices)), lengths)
+        vs = index[np.asarray(targets, dtype=np.int64)]
+        once = us < vs
+        multiplicity = np.asarray(multiplicities, dtype=np.int64)[once]
+        self.kernel = CSRGraph.from_edges(
+            np.repeat(us[once], multiplicity),
+            np.repeat(vs[once], multiplicity),
+            labels=self.vertices,
+        )
+
+    def get(self) -> List[Component]:
+        groups: Dict[int, List[int]] = dict()
+        labels = self.csr.labels.tolist()
+        for u, label in enumerate(self.get_labels()):
+            groups.setdefault(label, []).append(labels[u])
+        return [Component(c) for c in groups.values()]
+
+    def get_labels(self) -> List[int]:
+        """Get the component label of every (dense) vertex of the graph"""
+        labels = list(range(self.csr.n))
+        vertices = self.vertices
+        for i, label in enumerate(self.engine.get_labels()):
+            labels[vertices[i]] = vertices[label]
+        for u in range(len(labels)):
+            if self.merged_into[u] != u:
+                labels[u] = labels[self._find(u)]
+
+        return labels
@@ -0,0 +1,113 @@
+"""Run the iterative engine independently on disjoint parts of a graph (such as
+its connected components), fanned out over a process pool. Parts are sorted by
+size, and small parts are batched together into a single subgraph so that each
+task is worth sending to another process."""
+
+from .bridges import find_bridges
+from .iterative import ThreeEdgeConnectIterative
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+from utils.graph import CSRGraph
+
+import numpy as np
+
+# Parts with fewer edges than this are batched together into a single task
+BATCH_EDGES = 50_000
+
+
+def _solve(graph: CSRGraph) -> np.ndarray:
+    """Worker task, run the engine on every connected component of a subgraph
+    and return the (local) component label of each of its vertices."""
+    return np.asarray(ThreeEdgeConnectIterative(None, graph).get_labels())
+
+
+def solve_parts(
+    graph: CSRGraph,
+    vertex_part: np.ndarray,
+    edge_part: np.ndarray,
+    workers: Optional[int] = None,
+    batch_edges: int = BATCH_EDGES,
+) -> np.ndarray:
+    """Given the part of every vertex and of every edge (-1 to drop an edge),
+    run the engine on each part independently and merge the results. No kept
+    edge may join two different parts. Returns the component label of every
+    vertex (the dense id of some vertex in its component). If workers is 1,
+    everything is run in this process instead."""
+
+    n = graph.n
+    # Every vertex starts out as its own component (e.g. isolated vertices)
+    labels = np.arange(n, dtype=np.int64)
+    if graph.m == 0:
+        return labels
+    k = int(vertex_part.max()) + 1
+
+    # Group the vertices and the (kept) edges of each part together
+    vertex_order = np.argsort(vertex_part, kind="stable")
+    vertex_offsets = np.zeros(k + 1, dtype=np.int64)
+    np.cumsum(np.bincount(vertex_part, minlength=k), out=vertex_offsets[1:])
+
+    kept = np.flatnonzero(edge_part >= 0)
+    edge_order = kept[np.argsort(edge_part[kept], kind="stable")]
+    edge_counts = np.bincount(edge_part[kept], minlength=k)
+    edge_offsets = np.zeros(k + 1, dtype=np.int64)
+    np.cumsum(edge_counts, out=edge_offsets[1:])
+
+    # Largest parts first, parts without any edges are already singletons
+    parts = np.flatnonzero(edge_counts)
+    parts = parts[np.argsort(-edge_counts[parts], kind="stable")]
+
+    # Greedily pack parts into batches of at least batch_edges edges
+    batches: List[List[int]] = []
+    size = batch_edges
+    for p in parts.tolist():
+        if size >= batch_edges:
+            batches.append([])
+            size = 0
+        batches[-1].append(p)
+        size += int(edge_counts[p])
+
+    # Build the subgraph of every batch
+    tasks = []
+    for batch in batches:
+        vertices = np.sort(
+            np.concatenate(
+                [vertex_order[vertex_offsets[p] : vertex_offsets[p + 1]] for p in batch]
+            )
+        )
+        edges = np.concatenate(
+            [edge_order[edge_offsets[p] : edge_offsets[p + 1]] for p in batch]
+        )
+        tasks.append((vertices, graph.subgraph(vertices, edges)))
+
+    subgraphs = [sub for _, sub in tasks]
+    if workers == 1 or len(tasks) == 1:
+        results = list(map(_solve, subgraphs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_solve, subgraphs))
+
+    for (vertices, _), local in zip(tasks, results):
+        # Local labels are local vertices, map them back to the whole graph
+        labels[vertices] = vertices[local]
+
+    return labels
+
+
+def connect_whole_graph(graph: CSRGraph, workers: Optional[int] = None) -> np.ndarray:
+    """Find the 3-edge-connected components of every connected component of the
+    graph (not just the one containing some root), each solved independently.
+    Returns the component label of every vertex."""
+
+    components = graph.connected_components()
+    return solve_parts(graph, components, components[graph.edge_u], workers)
+
+
+def connect_by_blocks(graph: CSRGraph, workers: Optional[int] = None) -> np.ndarray:
+    """Split the graph at its bridges and find the 3-edge-connected components
+    of each 2-edge-connected block independently (covering every connected
+    component). Returns the component label of every vertex."""
+
+    bridges = find_bridges(graph)
+    blocks = graph.connected_components(removed=bridges)
+    edge_part = np.where(bridges, -1, blocks[graph.edge_u])
+    return solve_parts(graph, blocks, edge_part, workers)
@@ -1,4 +1,5 @@
-from utils import Edge
+from typing import Dict, List, Set
+from utils import Edge, MutableEdge
 from .base import ThreeEdgeConnectBase
 import logging
 
@@ -9,6 +10,29 @@ class ThreeEdgeConnectRecursive(ThreeEdgeConnectBase):
     counterpart, as performance is not much of a concern in this implementation since
     it's already so limited by the size of the recursive stack."""
 
+    # Graph to modify (key is vertex, value is list of adjacent vertices)
+    graph: Dict[int, List[int]]
+    # Make an edge graph, where the key is a vertex, and the value is a set of
+    # edges that are objects and have unique identifiers
+    edge_graph: Dict[int, Set[MutableEdge]]
+    # Key is a vertex, and the value is the "w-path" as defined in the paper
+    paths: Dict[int, List[int]]
+
+    def _setup(self):
+        self.graph = {u: self.csr.neighbors(u) for u in range(self.csr.n)}
+
+        self.edge_graph = {u: set() for u in range(self.csr.n)}
+        edges = zip(self.csr.edge_u.tolist(), self.csr.edge_v.tolist())
+        for i, (u, v) in enumerate(edges):
+            edge = MutableEdge(u, v, i)
+            self.edge_graph[u].add(edge)
+            self.edge_graph[v].add(edge)
+
+        self.paths = dict()
+
+        # Initialize each component to be 1 vertex (itself)
+        self.components = {u: set([u]) for u in range(self.csr.n)}
+
     def _absorb(self, u: int, v: int, eject: bool = False):
         """Absorb v into u."""
         assert u != v
@@ -16,7 +40,7 @@ class ThreeEdgeConnectRecursive(ThreeEdgeConnectBase):
         self.graph[u].extend(self.graph[v])
         for x in set(self.graph[v]):
             # Let u -- x embody v -- x
-            self.embodiments.union(Edge(u, x), Edge(v, x))
+            self._embody(Edge(u, x), Edge(v, x))
             # Replace all mentions of v, with u!
             for _ in range(self.graph[x].count(v)):
                 self.graph[x].remove(v)
@@ -31,8 +55,8 @@ class ThreeEdgeConnectRecursive(ThreeEdgeConnectBase):
             # Get rid of this item, since it has been absorbed by u
             self.components.pop(v)
         else:
-            # Degree should be 2 if we are ejecting
-            assert len(self.graph[v]) == 2
+            # Degree should be at most 2 if we are ejecting
+            assert len(self.graph[v]) <= 2
             # Nothing should be pointed to v at this point,
             # likewise, v should not be connected to anything either
             self.graph[v].clear()
@@ -50,7 +74,7 @@ class ThreeEdgeConnectRecursive(ThreeEdgeConnectBase):
         for edge in self.edge_graph[u]:
             v = edge.adj(u)
             # Get the embodiment of the edge u -- v
-            v = self.embodiments.get(edge.freeze()).adj(u)
+            v = self._embodiment(edge.freeze()).adj(u)
 
             # Skip self-loops
             if u == v:
@@ -61,13 +85,13 @@ class ThreeEdgeConnectRecursive(ThreeEdgeConnectBase):
                     f"v ({v}) was not found in edge_graph[u] ({self.graph[u]}), the edge_graph was constructed incorrectly."
                 )
 
-            if v not in self.pre:
+            if not self.pre[v]:
                 edge.mark()
                 # v is unvisited
                 self._explore(v)
                 logging.debug(f"POST-VISITING: {v} (from {u})")
-                # If the degree of v is two
-                if len(self.graph[v]) == 2:
+                # If the degree of v is two (or one, then u -- v is a bridge)
+                if len(self.graph[v]) <= 2:
                     # Connect u to all of v's edges, and EJECT v
                     self._absorb(u, v, eject=True)
                     self.paths[v].remove(v)
@@ -0,0 +1,94 @@
+"""Instrumentation for the engines: counters of the work done on the hot path,
+and timers for every phase. Engines only keep these when asked to, by swapping
+counting versions of their methods in, so nothing is paid when they do not."""
+
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator
+
+import time
+
+
+class Stats:
+    # Vertices absorbed into another along w-paths
+    absorbs: int
+    # Vertices ejected (absorb-eject, at degree 2 or less)
+    ejects: int
+    # Incoming back-edges that split a w-path, absorbing the front of it
+    path_splits: int
+    # Sections of w-paths absorbed, the total number of vertices on them, and
+    # the most on any one of them
+    sections: int
+    path_total: int
+    path_max: int
+    # Edge endpoints resolved to their current vertex, and the union-find parent
+    # pointers followed doing so (this replaces moving adjacency lists around)
+    resolves: int
+    find_hops: int
+    # Seconds spent in each phase
+    timers: Dict[str, float]
+
+    def __init__(self):
+        self.absorbs = 0
+        self.ejects = 0
+        self.path_splits = 0
+        self.sections = 0
+        self.path_total = 0
+        self.path_max = 0
+        self.resolves = 0
+        self.find_hops = 0
+        self.timers = dict()
+
+    @contextmanager
+    def timer(self, phase: str) -> Iterator[None]:
+        """Add the time spent inside the with block to the given phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timers[phase] = self.timers.get(phase, 0.0) + elapsed
+
+    def as_dict(self) -> dict:
+        res = {k: v for k, v in vars(self).items() if k != "timers"}
+        res["timers"] = dict(self.timers)
+        return res
+
+    def __repr__(self) -> str:
+        return f"Stats({self.as_dict()})"
+
+
+class Progress:
+    """Rate-limited progress reporting. The engine only compares a counter
+    against next_check on its hot path, and calls check() once it is reached,
+    which in turn only calls the callback once enough time has passed (or at
+    the very end)."""
+
+    def __init__(
+        self,
+        callback: Callable[[int, int], None],
+        total: int,
+        every: int = 0,
+        interval: float = 0.1,
+    ):
+        """callback(done, total) is called at most every interval seconds (and
+        once done reaches total), with the clock only looked at every `every`
+        items (a thousandth of the total by default). An interval of 0 reports
+        every `every` items."""
+        self.callback = callback
+        self.total = total
+        self.every = every if every > 0 else max(1, total // 1000)
+        self.interval = interval
+        self.last = float("-inf")
+        self.next_check = min(self.every, total)
+
+    def check(self, done: int) -> int:
+        """Report progress if it is due, and return the next count to check at"""
+        now = time.perf_counter()
+        if done >= self.total or now - self.last >= self.interval:
+            self.last = now
+            self.callback(done, self.total)
+        self.next_check = min(done + self.every, self.total)
+        if self.next_check <= done:
+            # Nothing is left to report, so never check again
+            self.next_check = self.total + 1
+        return self.next_check
@@ -0,0 +1,445 @@
+"""SPQR trees, for answering which vertex pairs separate a graph, and whether
+removing two vertices disconnects two others, without recomputing anything.
+
+The triconnected components of a block (see vertex.py) are the nodes of its
+SPQR tree, joined wherever two of them share a virtual edge: S-nodes are the
+polygons, P-nodes the bonds and R-nodes the triconnected components. Two
+vertices {x, y} of a block separate it exactly when they are the endpoints of a
+virtual edge, or two non-adjacent vertices of an S-node. The nodes containing
+a vertex always form a connected subtree, so the nodes containing both x and y
+all hang right below the deepest of the two tops (highest nodes) of x and y,
+and which piece of the block another vertex ends up in is read off the first of
+those nodes on the tree path towards it.
+
+Across blocks, the block-cut tree decides the rest: removing a cut vertex on the
+path between two vertices disconnects them, and otherwise only the one block on
+the path that contains both removed vertices (if any) matters. Both trees come
+with ancestor tables, so ancestor tests are constant time, and level ancestors
+and lowest common ancestors take logarithmic time, which makes every query
+logarithmic."""
+
+from .vertex import BOND, POLYGON, TRICONNECTED, ThreeVertexConnect
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+class _Forest:
+    """Ancestor tables over a rooted forest"""
+
+    # The parent of every node (roots are their own parent), and the 2^k-th
+    # ancestor of every node in up[k]
+    up: List[np.ndarray]
+    depth: np.ndarray
+    # Entry and exit times of a depth-first search, u is an ancestor of v
+    # exactly when tin[u] <= tin[v] and tout[v] <= tout[u]
+    tin: np.ndarray
+    tout: np.ndarray
+
+    def __init__(self, parent: np.ndarray):
+        n = len(parent)
+        parent = np.asarray(parent, dtype=np.int64)
+        roots = np.flatnonzero(parent == np.arange(n))
+
+        # Children of every node, grouped by parent
+        order = np.argsort(parent, kind="stable")
+        offsets = np.searchsorted(parent[order], np.arange(n + 1)).tolist()
+        order = order.tolist()
+
+        depth = [0] * n
+        tin = [0] * n
+        tout = [0] * n
+        time = 0
+        for root in roots.tolist():
+            tin[root] = time
+            time += 1
+            stack = [(root, offsets[root])]
+            while stack:
+                u, i = stack[-1]
+                # Skip the root itself, which is its own child
+                while i < offsets[u + 1] and order[i] == u:
+                    i += 1
+                if i == offsets[u + 1]:
+                    stack.pop()
+                    tout[u] = time
+                    time += 1
+                    continue
+                stack[-1] = (u, i + 1)
+                v = order[i]
+                depth[v] = depth[u] + 1
+                tin[v] = time
+                time += 1
+                stack.append((v, offsets[v]))
+
+        self.depth = np.asarray(depth, dtype=np.int64)
+        self.tin = np.asarray(tin, dtype=np.int64)
+        self.tout = np.asarray(tout, dtype=np.int64)
+        self.up = [parent]
+        while (1 << len(self.up)) <= (self.depth.max() if n else 0):
+            self.up.append(self.up[-1][self.up[-1]])
+
+    def is_ancestor(self, u: int, v: int) -> bool:
+        """Whether u is an ancestor of v (or v itself)"""
+        return self.tin[u] <= self.tin[v] and self.tout[v] <= self.tout[u]
+
+    def ancestor(self, u: int, depth: int) -> int:
+        """The ancestor of u at the given depth (at most that of u)"""
+        k = int(self.depth[u]) - depth
+        i = 0
+        while k:
+            if k & 1:
+                u = int(self.up[i][u])
+            k >>= 1
+            i += 1
+        return u
+
+    def lca(self, u: int, v: int) -> int:
+        """The lowest common ancestor of u and v (in the same tree)"""
+        if self.is_ancestor(u, v):
+            return u
+        if self.is_ancestor(v, u):
+            return v
+        for k in range(len(self.up) - 1, -1, -1):
+            w = int(self.up[k][u])
+            if not self.is_ancestor(w, v):
+                u = w
+        return int(self.up[0][u])
+
+
+class SPQRTree:
+    """The SPQR trees of every block of a graph, along with its block-cut tree,
+    built from its triconnected components."""
+
+    engine: ThreeVertexConnect
+    # The kind (BOND, POLYGON or TRICONNECTED) and block of every node
+    kinds: List[str]
+    blocks: List[int]
+    # The virtual edge joining every node to its parent (-1 for roots)
+    parent_edge: List[int]
+    # Ancestor tables over the SPQR trees
+    tree: _Forest
+    # The position of every vertex of every node, keyed by (node, vertex). For
+    # S-nodes, this is the position of the vertex around the cycle.
+    position: Dict[Tuple[int, int], int]
+    # The highest node of each block that contains a vertex, keyed by (block,
+    # vertex)
+    top: Dict[Tuple[int, int], int]
+    # The endpoints (smaller first) of every virtual edge whose removal leaves
+    # more than one piece (the endpoints of a virtual edge that only replaced
+    # parallel edges do not separate anything)
+    virtual_pairs: Set[Tuple[int, int]]
+    # The block-cut tree, with the blocks numbered first and then one node for
+    # every cut vertex. The node of every vertex is its cut vertex node, or its
+    # only block (-1 if it is in none), and cut_vertex maps nodes back.
+    bc_tree: _Forest
+    node_of: np.ndarray
+    cut_vertex: np.ndarray
+    num_blocks: int
+    # The connected component of every vertex
+    cc: np.ndarray
+
+    def __init__(self, engine: ThreeVertexConnect):
+        self.engine = engine
+        graph = engine.csr
+        components = engine.components
+        k = len(components)
+        self.kinds = [c.kind for c in components]
+        self.blocks = [c.block for c in components]
+        self.position = dict()
+        self.top = dict()
+        self.virtual_pairs = set()
+        self.cc = graph.connected_components()
+
+        # Join the nodes sharing a virtual edge, and root every tree
+        shared: Dict[int, List[int]] = dict()
+        for c, component in enumerate(components):
+            for e in component.edges:
+                if engine.is_virtual(e):
+                    shared.setdefault(e, []).append(c)
+        neighbors: List[List[Tuple[int, int]]] = [[] for _ in range(k)]
+        for e, (c, d) in shared.items():
+            neighbors[c].append((d, e))
+            neighbors[d].append((c, e))
+
+        # Removing the endpoints of a virtual edge leaves one piece for every
+        # S- or R-node containing both: the two nodes sharing it, or every
+        # neighbor of the P-node it leads to
+        for e, (c, d) in shared.items():
+            if self.kinds[c] == BOND or self.kinds[d] == BOND:
+                bond = c if self.kinds[c] == BOND else d
+                pieces = len(neighbors[bond])
+            else:
+                pieces = 2
+            if pieces >= 2:
+                u, v = engine.edge_u[e], engine.edge_v[e]
+                self.virtual_pairs.add((min(u, v), max(u, v)))
+
+        parent = list(range(k))
+        self.parent_edge = [-1] * k
+        seen = [False] * k
+        for root in range(k):
+            if seen[root]:
+                continue
+            seen[root] = True
+            stack = [root]
+            while stack:
+                c = stack.pop()
+                for d, e in neighbors[c]:
+                    if not seen[d]:
+                        seen[d] = True
+                        parent[d] = c
+                        self.parent_edge[d] = e
+                        stack.append(d)
+        self.tree = _Forest(np.asarray(parent, dtype=np.int64))
+
+        for c, component in enumerate(components):
+            for i, v in enumerate(self._skeleton(component)):
+                self.position[(c, v)] = i
+                key = (component.block, v)
+                top = self.top.get(key)
+                if top is None or self.tree.depth[c] < self.tree.depth[top]:
+                    self.top[key] = c
+
+        self._build_bc_tree()
+
+    def _skeleton(self, component) -> List[int]:
+        """The vertices of a node, in order around the cycle for S-nodes"""
+        edge_u, edge_v = self.engine.edge_u, self.engine.edge_v
+        if component.kind != POLYGON:
+            return self.engine.vertices(component)
+
+        around: Dict[int, List[int]] = dict()
+        for e in component.edges:
+            around.setdefault(edge_u[e], []).append(edge_v[e])
+            around.setdefault(edge_v[e], []).append(edge_u[e])
+        first = edge_u[component.edges[0]]
+        cycle = [first]
+        prev, v = first, around[first][0]
+        while v != first:
+            cycle.append(v)
+            a, b = around[v]
+            prev, v = v, (b if a == prev else a)
+        return cycle
+
+    def _build_bc_tree(self):
+        """Build the block-cut tree from the block of every edge"""
+
+        graph = self.engine.csr
+        blocks = self.engine.blocks
+        kept = blocks >= 0
+        self.num_blocks = b = int(blocks.max()) + 1 if kept.any() else 0
+
+        # Every (block, vertex) incidence
+        pairs = np.unique(
+            np.concatenate(
+                (
+                    np.stack((blocks[kept], graph.edge_u[kept]), axis=1),
+                    np.stack((blocks[kept], graph.edge_v[kept]), axis=1),
+                )
+            ),
+            axis=0,
+        )
+        count = np.bincount(pairs[:, 1], minlength=graph.n)
+        is_cut = count >= 2
+        self.node_of = np.full(graph.n, -1, dtype=np.int64)
+        self.node_of[pairs[:, 1]] = pairs[:, 0]
+        cuts = np.flatnonzero(is_cut)
+        self.node_of[cuts] = b + np.arange(len(cuts))
+        self.cut_vertex = np.full(b + len(cuts), -1, dtype=np.int64)
+        self.cut_vertex[b:] = cuts
+
+        # Join every block to the cut vertices on it, and root every tree
+        links = pairs[is_cut[pairs[:, 1]]]
+        nodes = b + len(cuts)
+        neighbors: List[List[int]] = [[] for _ in range(nodes)]
+        for block, v in links.tolist():
+            c = int(self.node_of[v])
+            neighbors[block].append(c)
+            neighbors[c].append(block)
+
+        parent = list(range(nodes))
+        seen = [False] * nodes
+        for root in range(nodes):
+            if seen[root]:
+                continue
+            seen[root] = True
+            stack = [root]
+            while stack:
+                u = stack.pop()
+                for v in neighbors[u]:
+                    if not seen[v]:
+                        seen[v] = True
+                        parent[v] = u
+                        stack.append(v)
+        self.bc_tree = _Forest(np.asarray(parent, dtype=np.int64))
+
+    def _common_block(self, x: int, y: int) -> int:
+        """The block containing both x and y (there is at most one), or -1"""
+        b = self.num_blocks
+        nx, ny = int(self.node_of[x]), int(self.node_of[y])
+        if nx == -1 or ny == -1:
+            return -1
+        parent = self.bc_tree.up[0]
+        for block in (nx, int(parent[nx]), ny, int(parent[ny])):
+            if block < b and self._in_block(block, nx) and self._in_block(block, ny):
+                return block
+        return -1
+
+    def _in_block(self, block: int, node: int) -> bool:
+        """Whether the vertex of a block-cut tree node is in the given block"""
+        parent = self.bc_tree.up[0]
+        return node == block or parent[node] == block or parent[block] == node
+
+    def is_separation_pair(self, x: int, y: int) -> bool:
+        """Whether removing the vertices x and y (original labels) disconnects
+        the block they are both in"""
+        x = self.engine.csr.index(x)
+        y = self.engine.csr.index(y)
+        block = self._common_block(x, y) if x != y else -1
+        if block == -1:
+            return False
+        if (min(x, y), max(x, y)) in self.virtual_pairs:
+            return True
+
+        # Otherwise they have to be non-adjacent on a polygon, which is then
+        # the deepest of their tops (blocks that are a single edge, or two
+        # parallel ones, have no nodes at all)
+        if (block, x) not in self.top:
+            return False
+        mu = self._deeper(self.top[(block, x)], self.top[(block, y)])
+        if self.kinds[mu] != POLYGON:
+            return False
+        px = self.position.get((mu, x))
+        py = self.position.get((mu, y))
+        if px is None or py is None:
+            return False
+        size = len(self.engine.components[mu].edges)
+        return abs(px - py) not in (1, size - 1)
+
+    def separation_pairs(self) -> Iterator[Tuple[int, int]]:
+        """Enumerate every separation pair (of the block they are in) as two
+        original vertex labels. There can be quadratically many, since every
+        two non-adjacent vertices of a polygon are one."""
+        labels = self.engine.csr.labels.tolist()
+        seen = set(self.virtual_pairs)
+        for x, y in self.virtual_pairs:
+            yield labels[x], labels[y]
+        for c, component in enumerate(self.engine.components):
+            if component.kind != POLYGON:
+                continue
+            cycle = self._skeleton(component)
+            for i in range(len(cycle)):
+                for j in range(i + 2, len(cycle)):
+                    if i == 0 and j == len(cycle) - 1:
+                        continue
+                    pair = (min(cycle[i], cycle[j]), max(cycle[i], cycle[j]))
+                    if pair not in seen:
+                        seen.add(pair)
+                        yield labels[pair[0]], labels[pair[1]]
+
+    def connected(self, a: int, b: int) -> bool:
+        """Whether a and b (original labels) are connected"""
+        csr = self.engine.csr
+        return bool(self.cc[csr.index(a)] == self.cc[csr.index(b)])
+
+    def connected_without(
+        self, a: int, b: int, x: int, y: Optional[int] = None
+    ) -> bool:
+        """Whether a and b (original labels) are still connected once the
+        vertices x and y (or only x) are removed. If a or b is removed itself,
+        they are not."""
+
+        csr = self.engine.csr
+        a, b, x = csr.index(a), csr.index(b), csr.index(x)
+        y = x if y is None else csr.index(y)
+        if a in (x, y) or b in (x, y):
+            return False
+        if a == b:
+            return True
+        if self.cc[a] != self.cc[b]:
+            return False
+
+        # Removing a cut vertex on the path between a and b disconnects them
+        bc = self.bc_tree
+        na, nb = int(self.node_of[a]), int(self.node_of[b])
+        top = bc.lca(na, nb)
+
+        def on_path(node: int) -> bool:
+            return bc.is_ancestor(top, node) and (
+                bc.is_ancestor(node, na) or bc.is_ancestor(node, nb)
+            )
+
+        for v in {x, y}:
+            nv = int(self.node_of[v])
+            if self.cut_vertex[nv] == v and on_path(nv):
+                return False
+
+        # Otherwise, only the block on the path containing both x and y counts
+        if x == y:
+            return True
+        block = self._common_block(x, y)
+        if block == -1 or not on_path(block):
+            return True
+        s = self._terminal(block, na, a)
+        t = self._terminal(block, nb, b)
+        return self._piece(block, s, x, y) == self._piece(block, t, x, y)
+
+    def _terminal(self, block: int, node: int, v: int) -> int:
+        """The vertex through which the path from v (at the block-cut tree node
+        given) enters the block"""
+        bc = self.bc_tree
+        if node == block:
+            return v
+        if bc.is_ancestor(block, node):
+            c = bc.ancestor(node, int(bc.depth[block]) + 1)
+        else:
+            c = int(bc.up[0][block])
+        return int(self.cut_vertex[c])
+
+    def _deeper(self, c: int, d: int) -> int:
+        return c if self.tree.depth[c] >= self.tree.depth[d] else d
+
+    def _piece(self, block: int, s: int, x: int, y: int) -> Tuple[int, int]:
+        """Identify the piece of the block that s is in once x and y (both in
+        the block) are removed, as the node containing both x and y that is
+        closest to s, and the part of that node's skeleton s is attached to"""
+
+        tree = self.tree
+        position = self.position
+        mu = self._deeper(self.top[(block, x)], self.top[(block, y)])
+        if (mu, x) not in position or (mu, y) not in position:
+            # They are not even on a common node, so nothing is separated
+            return (-1, 0)
+
+        ts = self.top[(block, s)]
+        depth = int(tree.depth[mu])
+        nu = mu
+        if tree.is_ancestor(mu, ts):
+            # The nodes containing both x and y are at most two levels below mu
+            for d in (depth + 2, depth + 1):
+                if tree.depth[ts] >= d:
+                    c = tree.ancestor(ts, d)
+                    if (c, x) in position and (c, y) in position:
+                        nu = c
+                        break
+
+        # s is attached either directly, or through a virtual edge of nu
+        if (nu, s) in position:
+            v = s
+            e = -1
+        else:
+            if tree.is_ancestor(nu, ts):
+                e = self.parent_edge[tree.ancestor(ts, int(tree.depth[nu]) + 1)]
+            else:
+                e = self.parent_edge[nu]
+            u = self.engine.edge_u[e]
+            v = u if u not in (x, y) else self.engine.edge_v[e]
+
+        kind = self.kinds[nu]
+        if kind == TRICONNECTED:
+            return (nu, 0)
+        if kind == BOND:
+            return (nu, e)
+        # Removing x and y cuts the cycle into (at most) two paths
+        p, px, py = position[(nu, v)], position[(nu, x)], position[(nu, y)]
+        return (nu, int(min(px, py) < p < max(px, py)))
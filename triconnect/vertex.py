@@ -1,108 +1,719 @@
-"""NOTE: This script is wildly incomplete, but is left here for the possibility
-of future work. It is uncommented and does not work, please ignore it."""
-
-
-from typing import List, Set, FrozenSet, DefaultDict, Dict
-from collections import defaultdict
-from utils import Component, Edge
-import logging
-from bidict import bidict
-
-
-def traverse(graph: Dict[int, List[int]]):
-    time = 0
-    # Preordering of graph (order encountered in dfs)
-    pre: bidict = bidict()
-
-    # Total number of descendants for a given node
-    num_descendants: DefaultDict[int, int] = defaultdict(int)  # Dict[node, n]
-    flag: DefaultDict[int, bool] = defaultdict(bool)
-    parents: Dict[int, int] = dict()  # Dict[node, parent of node]
-
-    low1: DefaultDict[int, int] = defaultdict(int)
-    low2: DefaultDict[int, int] = defaultdict(int)
-
-    equal_children: DefaultDict[int, Set[int]] = defaultdict(set)
-
-    # A list of tree edges: u -- v
-    tree: Set[Edge] = set()
-    non_tree: Set[Edge] = set()
-
-    def dfs(u: int, p: int = -1):
-        nonlocal time
-        # Assign pre-order value
-        time += 1
-        pre[u] = time
-        # Assign parent
-        parents[u] = p
-        num_descendants[u] = 1
-
-        u_out = [v for v in graph[u] if pre[u] > pre[v] and Edge(u, v) not in tree]
-        u_in = [v for v in graph[u] if pre[u] < pre[v] and Edge(u, v) not in tree]
-
-        # This should always be the case, since this is undirected
-        assert u in graph
-        for v in graph[u]:
-            # If v has NOT been visited yet
-            if v not in pre:
-                # Add u -- v as a tree edge
-                tree.add(Edge(u, v))
-                # Explore v, with u labeled as its parent
-                dfs(v, u)
-
-                if low1[v] < low1[u]:
-                    low2[u] = min(low1[u], low2[v])
-                    low1[u] = low1[v]
-                    equal_children[u].add(v)
-                elif low1[v] == low1[u]:
-                    low2[u] = min(low2[u], low2[v])
+"""Linear-time 3-vertex-connectivity, following Hopcroft and Tarjan's algorithm
+for dividing a graph into its triconnected components (with the corrections of
+Gutwenger and Mutzel).
+
+The graph is first split into its biconnected components (blocks). Each block
+is then split at its separation pairs, two vertices whose removal disconnects
+it: the pieces on either side are separated, and a virtual edge joining the two
+vertices is added to both, so that each one stays biconnected. Splitting as far
+as possible, and then merging bonds with bonds and polygons with polygons again
+along virtual edges, gives the triconnected components of the block, which are
+unique. Each one is either
+
+    a bond          two vertices joined by three or more edges
+    a polygon       a simple cycle
+    triconnected    a simple 3-vertex-connected graph
+
+The separation pairs are found with two depth-first searches, over the low1 and
+low2 values (the lowest and second lowest preorder number reachable by going
+down the tree and then following one back-edge) and the number of descendants
+of every vertex, and a third search (the path search) that splits off the
+components along the way. All three are iterative, so there is no limit on the
+depth of the graph."""
+
+from .edge.bridges import biconnected_components
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from utils import Component
+from utils.graph import CSRGraph
+
+import numpy as np
+
+# The kinds of triconnected components
+BOND = "bond"
+POLYGON = "polygon"
+TRICONNECTED = "triconnected"
+
+# The types of the edges of a block, once oriented by the first search
+UNSEEN = 0
+TREE = 1
+FROND = 2
+REMOVED = 3
+
+
+class TriconnectedComponent:
+    # BOND, POLYGON or TRICONNECTED
+    kind: str
+    # The edges of the component, where real edges are edge uids of the graph
+    # and virtual edges are numbered from m onwards (see ThreeVertexConnect)
+    edges: List[int]
+    # The biconnected component (block) it is part of
+    block: int
+
+    def __init__(self, kind: str, edges: List[int], block: int = -1):
+        self.kind = kind
+        self.edges = edges
+        self.block = block
+
+    def __repr__(self):
+        return f"{self.kind}{self.edges}"
+
+
+class ThreeVertexConnect:
+    """Find the triconnected components of a graph (every connected component,
+    or only the one containing root)."""
+
+    # Compact array form of the input graph, every vertex is referred to by its
+    # dense id (0..n-1) until the components are returned
+    csr: CSRGraph
+    # The (dense) endpoints of every edge, the m edges of the graph followed by
+    # the virtual edges added when splitting
+    edge_u: List[int]
+    edge_v: List[int]
+    # The block (biconnected component) of every edge uid, -1 for self-loops
+    # (and edges outside root's connected component)
+    blocks: np.ndarray
+    # The triconnected components of every block, in no particular order
+    components: List[TriconnectedComponent]
+
+    def __init__(self, root: Optional[int], g: Union[Dict[int, List[int]], CSRGraph]):
+        self.csr = g if isinstance(g, CSRGraph) else CSRGraph.from_dict(g)
+        self.edge_u = self.csr.edge_u.tolist()
+        self.edge_v = self.csr.edge_v.tolist()
+        self.components = []
+
+        self.blocks = blocks = biconnected_components(self.csr)
+        if root is not None:
+            # Only keep the blocks of root's connected component
+            cc = self.csr.connected_components()
+            blocks[cc[self.csr.edge_u] != cc[self.csr.index(root)]] = -1
+
+        # Group the edges by block, and split every block in turn
+        order = np.argsort(blocks, kind="stable")
+        bounds = np.flatnonzero(np.diff(blocks[order])) + 1
+        for edges in np.split(order, bounds):
+            if len(edges) and blocks[edges[0]] != -1:
+                self._split_block(edges)
+
+    def _split_block(self, edges: np.ndarray):
+        """Find the triconnected components of one block, given its edges"""
+
+        # Number the vertices of the block 0..k-1
+        vertices, local = np.unique(
+            np.concatenate((self.csr.edge_u[edges], self.csr.edge_v[edges])),
+            return_inverse=True,
+        )
+        local = local.ravel()
+        m = len(edges)
+        uids = edges.tolist()
+        block = int(self.blocks[edges[0]])
+
+        if len(vertices) == 2:
+            # A single edge is no component at all, parallel edges are a bond
+            if m >= 3:
+                self.components.append(TriconnectedComponent(BOND, uids, block))
+            return
+
+        splitter = _Splitter(len(vertices), local[:m].tolist(), local[m:].tolist())
+
+        # Map the edges of the block back, giving every virtual edge a new uid
+        vertices = vertices.tolist()
+        for i in range(m, len(splitter.src)):
+            uids.append(len(self.edge_u))
+            self.edge_u.append(vertices[splitter.src[i]])
+            self.edge_v.append(vertices[splitter.dst[i]])
+        for kind, component in splitter.components:
+            self.components.append(
+                TriconnectedComponent(kind, [uids[e] for e in component], block)
+            )
+
+    def is_virtual(self, e: int) -> bool:
+        """Whether edge e was added when splitting (rather than from the graph)"""
+        return e >= self.csr.m
+
+    def vertices(self, component: TriconnectedComponent) -> List[int]:
+        """Get the (dense) vertices of a component"""
+        res = set()
+        for e in component.edges:
+            res.add(self.edge_u[e])
+            res.add(self.edge_v[e])
+        return sorted(res)
+
+    def get(self, kinds: Iterable[str] = (TRICONNECTED,)) -> List[Component]:
+        """Get the vertices of every component of the given kinds (by default
+        only the 3-vertex-connected ones), with the original vertex labels.
+        Components share the vertices of the separation pairs between them."""
+        kinds = set(kinds)
+        labels = self.csr.labels.tolist()
+        return [
+            Component(labels[u] for u in self.vertices(c))
+            for c in self.components
+            if c.kind in kinds
+        ]
+
+
+class _Splitter:
+    """The triconnected components of a single biconnected block with vertices
+    0..n-1, as lists of edges (indices into src and dst, where the edges of the
+    block come first, followed by every virtual edge added)."""
+
+    n: int
+    # The endpoints of every edge, which are oriented by the first search (tree
+    # edges point away from the root, fronds point back up to an ancestor)
+    src: List[int]
+    dst: List[int]
+    type: List[int]
+    # Split components, before bonds and polygons are merged again (their kind
+    # is worked out when merging if it was not known when splitting)
+    split: List[Tuple[Optional[str], List[int]]]
+    # The triconnected components, once merged
+    components: List[Tuple[str, List[int]]]
+
+    def __init__(self, n: int, src: List[int], dst: List[int]):
+        self.n = n
+        self.src = src
+        self.dst = dst
+        self.type = [UNSEEN] * len(src)
+        # Whether each arc starts a new path, its entry in a highpt list (if it
+        # is a frond) and its position in the arcs of its source
+        self.start = [False] * len(src)
+        self.in_high = [-1] * len(src)
+        self.in_adj = [-1] * len(src)
+        self.split = []
+
+        self._split_multi_edges()
+        self._dfs1()
+        self._build_acceptable_adjacency()
+        self._dfs2()
+        self._path_search()
+
+        # Whatever is left is the last component
+        self._add(list(reversed(self.estack)))
+        self._assemble()
+
+    def _new_edge(self, u: int, v: int) -> int:
+        """Add a virtual edge u -- v"""
+        self.src.append(u)
+        self.dst.append(v)
+        self.type.append(UNSEEN)
+        self.start.append(False)
+        self.in_high.append(-1)
+        self.in_adj.append(-1)
+        return len(self.src) - 1
+
+    def _add(self, edges: List[int], kind: Optional[str] = None):
+        """Add a split component (its kind is worked out later if not given)"""
+        self.split.append((kind, edges))
+
+    def _split_multi_edges(self):
+        """Split every set of parallel edges off as a bond, along with a new
+        virtual edge that replaces them in the block"""
+
+        m = len(self.src)
+        key = [(min(u, v), max(u, v)) for u, v in zip(self.src, self.dst)]
+        order = sorted(range(m), key=key.__getitem__)
+        i = 0
+        while i < m:
+            j = i + 1
+            while j < m and key[order[j]] == key[order[i]]:
+                j += 1
+            if j - i > 1:
+                u, v = key[order[i]]
+                bond = [self._new_edge(u, v)]
+                for e in order[i:j]:
+                    self.type[e] = REMOVED
+                    bond.append(e)
+                self._add(bond, BOND)
+            i = j
+
+    def _dfs1(self):
+        """Number the vertices in preorder, orient every edge (tree edges away
+        from the root, fronds back up to an ancestor), and find the low1, low2
+        and number of descendants of every vertex"""
+
+        n = self.n
+        src, dst, type = self.src, self.dst, self.type
+        incident: List[List[int]] = [[] for _ in range(n)]
+        for e in range(len(src)):
+            if type[e] != REMOVED:
+                incident[src[e]].append(e)
+                incident[dst[e]].append(e)
+
+        self.number = number = [0] * n
+        self.father = father = [-1] * n
+        self.tree_arc = tree_arc = [-1] * n
+        self.lowpt1 = lowpt1 = [0] * n
+        self.lowpt2 = lowpt2 = [0] * n
+        self.nd = nd = [1] * n
+        self.degree = [len(x) for x in incident]
+        cursor = [0] * n
+
+        count = 1
+        number[0] = lowpt1[0] = lowpt2[0] = count
+        stack = [0]
+        while stack:
+            v = stack[-1]
+            edges = incident[v]
+            i = cursor[v]
+            if i == len(edges):
+                stack.pop()
+                if stack:
+                    # Post-visit v from its father
+                    u = stack[-1]
+                    if lowpt1[v] < lowpt1[u]:
+                        lowpt2[u] = min(lowpt1[u], lowpt2[v])
+                        lowpt1[u] = lowpt1[v]
+                    elif lowpt1[v] == lowpt1[u]:
+                        lowpt2[u] = min(lowpt2[u], lowpt2[v])
+                    else:
+                        lowpt2[u] = min(lowpt2[u], lowpt1[v])
+                    nd[u] += nd[v]
+                continue
+
+            cursor[v] = i + 1
+            e = edges[i]
+            if type[e] != UNSEEN:
+                continue
+            w = src[e] + dst[e] - v
+            src[e], dst[e] = v, w
+            if not number[w]:
+                type[e] = TREE
+                tree_arc[w] = e
+                father[w] = v
+                count += 1
+                number[w] = lowpt1[w] = lowpt2[w] = count
+                stack.append(w)
+            else:
+                type[e] = FROND
+                if number[w] < lowpt1[v]:
+                    lowpt2[v] = lowpt1[v]
+                    lowpt1[v] = number[w]
+                elif number[w] > lowpt1[v]:
+                    lowpt2[v] = min(lowpt2[v], number[w])
+
+    def _build_acceptable_adjacency(self):
+        """Order the outgoing arcs of every vertex by phi (with a bucket sort),
+        so that the path search visits them in an order where separation pairs
+        can be recognized"""
+
+        n = self.n
+        src, dst, type = self.src, self.dst, self.type
+        number, lowpt1, lowpt2 = self.number, self.lowpt1, self.lowpt2
+
+        buckets: List[List[int]] = [[] for _ in range(3 * n + 3)]
+        for e in range(len(src)):
+            if type[e] == REMOVED:
+                continue
+            w = dst[e]
+            if type[e] == FROND:
+                phi = 3 * number[w] + 1
+            elif lowpt2[w] < number[src[e]]:
+                phi = 3 * lowpt1[w]
+            else:
+                phi = 3 * lowpt1[w] + 2
+            buckets[phi].append(e)
+
+        # The arcs out of every vertex, removed ones are left as -1, and the
+        # position of every arc in the arcs of its source
+        self.adj = adj = [[] for _ in range(n)]
+        in_adj = self.in_adj
+        for bucket in buckets:
+            for e in bucket:
+                in_adj[e] = len(adj[src[e]])
+                adj[src[e]].append(e)
+
+    def _dfs2(self):
+        """Renumber the vertices so that the children of every vertex are
+        numbered in decreasing order of their arcs, mark the arcs that start a
+        new path, and build the highpt list of every vertex (the sources of the
+        fronds into it, in the order they are visited)"""
+
+        n = self.n
+        adj, dst, type, nd = self.adj, self.dst, self.type, self.nd
+        start, in_high = self.start, self.in_high
+        self.newnum = newnum = [0] * n
+        # The highpt lists are kept as entries that can be removed, where
+        # entries pushed to the front are in high_front and the rest are in
+        # high_back (from high_first on)
+        self.high_value: List[int] = []
+        self.high_alive: List[bool] = []
+        self.high_front: List[List[int]] = [[] for _ in range(n)]
+        self.high_back: List[List[int]] = [[] for _ in range(n)]
+        self.high_first = [0] * n
+
+        count = n
+        new_path = True
+        cursor = [0] * n
+        newnum[0] = count - nd[0] + 1
+        stack = [0]
+        while stack:
+            v = stack[-1]
+            i = cursor[v]
+            if i == len(adj[v]):
+                stack.pop()
+                if stack:
+                    count -= 1
+                continue
+
+            cursor[v] = i + 1
+            e = adj[v][i]
+            if new_path:
+                new_path = False
+                start[e] = True
+            if type[e] == TREE:
+                w = dst[e]
+                newnum[w] = count - nd[w] + 1
+                stack.append(w)
+            else:
+                in_high[e] = self._push_high(dst[e], newnum[v], front=False)
+                new_path = True
+
+        # Switch everything over to the new numbering
+        old2new = [0] * (n + 1)
+        for v in range(n):
+            old2new[self.number[v]] = newnum[v]
+        self.nodeat = nodeat = [0] * (n + 1)
+        for v in range(n):
+            nodeat[newnum[v]] = v
+            self.lowpt1[v] = old2new[self.lowpt1[v]]
+            self.lowpt2[v] = old2new[self.lowpt2[v]]
+
+    def _push_high(self, v: int, value: int, front: bool) -> int:
+        """Add value to the highpt list of v, and return its entry"""
+        entry = len(self.high_value)
+        self.high_value.append(value)
+        self.high_alive.append(True)
+        (self.high_front if front else self.high_back)[v].append(entry)
+        return entry
+
+    def _del_high(self, e: int):
+        """Remove the entry of frond e from the highpt list it is in"""
+        if self.in_high[e] != -1:
+            self.high_alive[self.in_high[e]] = False
+            self.in_high[e] = -1
+
+    def _high(self, v: int) -> int:
+        """The first value on the highpt list of v (0 if there is none)"""
+        alive = self.high_alive
+        front = self.high_front[v]
+        while front and not alive[front[-1]]:
+            front.pop()
+        if front:
+            return self.high_value[front[-1]]
+        back = self.high_back[v]
+        i = self.high_first[v]
+        while i < len(back) and not alive[back[i]]:
+            i += 1
+        self.high_first[v] = i
+        return self.high_value[back[i]] if i < len(back) else 0
+
+    def _first_child(self, v: int) -> int:
+        """The target of the first arc (not removed) out of v, or -1"""
+        for e in self.adj[v]:
+            if e != -1:
+                return self.dst[e]
+        return -1
+
+    def _path_search(self):
+        """Split off the components of every separation pair, in one search
+        over the arcs in their acceptable order. ESTACK holds the arcs visited
+        but not split off yet, and TSTACK the triples (h, a, b) of candidate
+        type-2 pairs {a, b} (spanning vertices a..h), with a = -1 marking the
+        end of a segment."""
+
+        src, dst, type = self.src, self.dst, self.type
+        adj, in_adj = self.adj, self.in_adj
+        newnum, nodeat, nd = self.newnum, self.nodeat, self.nd
+        lowpt1, lowpt2 = self.lowpt1, self.lowpt2
+        father, tree_arc, degree = self.father, self.tree_arc, self.degree
+        start = self.start
+
+        self.estack = estack = []
+        th: List[int] = [0]
+        ta: List[int] = [-1]
+        tb: List[int] = [0]
+
+        def push(h: int, a: int, b: int):
+            th.append(h)
+            ta.append(a)
+            tb.append(b)
+
+        def pop():
+            th.pop()
+            ta.pop()
+            tb.pop()
+
+        def delete(e: int):
+            adj[src[e]][in_adj[e]] = -1
+
+        # The arc of every vertex being examined (its position in adj), the
+        # arc it was when first examined, and the number of its arcs left
+        pos = [0] * self.n
+        current = [-1] * self.n
+        outv = [len(a) for a in adj]
+        stack = [0]
+        while stack:
+            v = stack[-1]
+            vnum = newnum[v]
+            i = pos[v]
+
+            if current[v] == -1:
+                # Skip over removed arcs
+                arcs = adj[v]
+                while i < len(arcs) and arcs[i] == -1:
+                    i += 1
+                pos[v] = i
+                if i == len(arcs):
+                    stack.pop()
+                    continue
+
+                e = arcs[i]
+                w = dst[e]
+                wnum = newnum[w]
+                if type[e] == TREE:
+                    if start[e]:
+                        if ta[-1] > lowpt1[w]:
+                            y = 0
+                            while ta[-1] > lowpt1[w]:
+                                y = max(y, th[-1])
+                                b = tb[-1]
+                                pop()
+                            push(y, lowpt1[w], b)
+                        else:
+                            push(wnum + nd[w] - 1, lowpt1[w], vnum)
+                        # End of segment
+                        push(0, -1, 0)
+                    current[v] = e
+                    stack.append(w)
                 else:
-                    low2[u] = min(low2[u], low1[v])
-
-                num_descendants[u] += num_descendants[v]
-                parents[v] = u
-            elif pre[v] < pre[u] and (
-                v != p or flag[u]
-            ):  # (dfs(w) < dfs(v)) ∧ (w 6= y ∨ flag(v) = false)
-                non_tree.add(Edge(u, v))
-                if pre[v] < low1[u]:
-                    low2[u] = low1[u]
-                    low1[u] = pre[v]
-                    equal_children[u].add(v)
-                elif pre[v] > low1[u]:
-                    low2[u] = min(low2[u], pre[v])
-            if u == p:
-                flag[u] = True
-
-        x: int = bidict.inverse[  # type:ignore
-            low1[u]
-        ]  # Let x be the node such that low1(u) = dfs(x);
-        if x != p and low2[u] >= pre[p]:
-            # {x, y} is a seperation pair! uh oh, not triconnected
-
-            pass
-
-        if num_descendants[u] > 1 and any(
-            [low1[u] == low1[q] for q in equal_children[u]]
-        ):
-            new = len(graph)
-            # Out(new) = Out(u) --> outgoing back edge
-            pre[new] = pre[u]
-            low1[new] = low1[u]
-            graph[new] = u_out.copy()
-            for v in graph[new]:
-                graph[v].append(new)
-
-            reduce_vertex(new)
-
-        # Calculate again just in case
-        u_out = [v for v in graph[u] if pre[u] > pre[v] and Edge(u, v) not in tree]
-        u_in = [v for v in graph[u] if pre[u] < pre[v] and Edge(u, v) not in tree]
-
-        if len(u_out) + len(u_in) > 1:
-            reduce_vertex(u)
-
-    def reduce_vertex(u: int):
-        pass
-
-    pass
+                    if start[e]:
+                        if ta[-1] > wnum:
+                            y = 0
+                            while ta[-1] > wnum:
+                                y = max(y, th[-1])
+                                b = tb[-1]
+                                pop()
+                            push(y, wnum, b)
+                        else:
+                            push(vnum, wnum, vnum)
+                    estack.append(e)
+                    pos[v] = i + 1
+                continue
+
+            # Returning to v from the tree arc e = v -> w
+            e = current[v]
+            current[v] = -1
+            w = dst[e]
+            wnum = newnum[w]
+            estack.append(tree_arc[w])
+
+            # Type-2 pairs (and degree-2 vertices) below v
+            while vnum != 1 and (
+                ta[-1] == vnum
+                or (degree[w] == 2 and newnum[self._first_child(w)] > wnum)
+            ):
+                a = ta[-1]
+                b = tb[-1]
+                if a == vnum and father[nodeat[b]] == nodeat[a]:
+                    pop()
+                    continue
+
+                e_ab = -1
+                if degree[w] == 2 and newnum[self._first_child(w)] > wnum:
+                    # w only has its tree arc in and one tree arc out, to x
+                    e1 = estack.pop()
+                    e2 = estack.pop()
+                    delete(e2)
+                    x = dst[e2]
+                    virtual = self._new_edge(v, x)
+                    degree[x] -= 1
+                    degree[v] -= 1
+                    self._add([e1, e2, virtual], POLYGON)
+
+                    if estack:
+                        e1 = estack[-1]
+                        if src[e1] == x and dst[e1] == v:
+                            e_ab = estack.pop()
+                            delete(e_ab)
+                            self._del_high(e_ab)
+                else:
+                    h = th[-1]
+                    pop()
+                    component = []
+                    while estack:
+                        xy = estack[-1]
+                        x = src[xy]
+                        xnum = newnum[x]
+                        ynum = newnum[dst[xy]]
+                        if not (a <= xnum <= h and a <= ynum <= h):
+                            break
+                        if (xnum == a and ynum == b) or (ynum == a and xnum == b):
+                            e_ab = estack.pop()
+                            delete(e_ab)
+                            self._del_high(e_ab)
+                        else:
+                            eh = estack.pop()
+                            if in_adj[eh] != i or src[eh] != v:
+                                delete(eh)
+                                self._del_high(eh)
+                            component.append(eh)
+                            degree[x] -= 1
+                            degree[dst[xy]] -= 1
+
+                    virtual = self._new_edge(nodeat[a], nodeat[b])
+                    component.append(virtual)
+                    self._add(component)
+                    x = nodeat[b]
+
+                if e_ab != -1:
+                    bond = [e_ab, virtual]
+                    virtual = self._new_edge(v, x)
+                    bond.append(virtual)
+                    self._add(bond, BOND)
+                    degree[x] -= 1
+                    degree[v] -= 1
+
+                estack.append(virtual)
+                adj[v][i] = virtual
+                in_adj[virtual] = i
+                degree[x] += 1
+                degree[v] += 1
+                father[x] = v
+                tree_arc[x] = virtual
+                type[virtual] = TREE
+                w = x
+                wnum = newnum[w]
+
+            # A type-1 pair {lowpt1(w), v}
+            if (
+                lowpt2[w] >= vnum
+                and lowpt1[w] < vnum
+                and (father[v] != 0 or outv[v] >= 2)
+            ):
+                component = []
+                xnum = ynum = 0
+                while estack:
+                    xy = estack[-1]
+                    xnum = newnum[src[xy]]
+                    ynum = newnum[dst[xy]]
+                    if not (wnum <= xnum < wnum + nd[w] or wnum <= ynum < wnum + nd[w]):
+                        break
+                    component.append(estack.pop())
+                    self._del_high(xy)
+                    degree[src[xy]] -= 1
+                    degree[dst[xy]] -= 1
+
+                low = nodeat[lowpt1[w]]
+                virtual = self._new_edge(v, low)
+                component.append(virtual)
+                self._add(component)
+
+                if (xnum == vnum and ynum == lowpt1[w]) or (
+                    ynum == vnum and xnum == lowpt1[w]
+                ):
+                    eh = estack.pop()
+                    if in_adj[eh] != i or src[eh] != v:
+                        delete(eh)
+                    bond = [eh, virtual]
+                    virtual = self._new_edge(v, low)
+                    bond.append(virtual)
+                    self._add(bond, BOND)
+                    self.in_high[virtual] = self.in_high[eh]
+                    degree[v] -= 1
+                    degree[low] -= 1
+
+                if low != father[v]:
+                    type[virtual] = FROND
+                    estack.append(virtual)
+                    adj[v][i] = virtual
+                    in_adj[virtual] = i
+                    if self.in_high[virtual] == -1 and self._high(low) < vnum:
+                        self.in_high[virtual] = self._push_high(low, vnum, front=True)
+                    degree[v] += 1
+                    degree[low] += 1
+                else:
+                    # The virtual edge is parallel to the tree arc into v,
+                    # replace both with a new tree arc
+                    adj[v][i] = -1
+                    bond = [virtual]
+                    virtual = self._new_edge(low, v)
+                    bond.append(virtual)
+                    eh = tree_arc[v]
+                    bond.append(eh)
+                    self._add(bond, BOND)
+                    tree_arc[v] = virtual
+                    type[virtual] = TREE
+                    in_adj[virtual] = in_adj[eh]
+                    adj[src[eh]][in_adj[eh]] = virtual
+
+            if start[e]:
+                # Drop the segment of triples pushed for this path
+                while ta[-1] != -1:
+                    pop()
+                pop()
+
+            while ta[-1] != -1 and tb[-1] != vnum and self._high(v) > th[-1]:
+                pop()
+
+            outv[v] -= 1
+            pos[v] = i + 1
+
+    def _assemble(self):
+        """Merge bonds sharing a virtual edge into one bond, and polygons
+        sharing a virtual edge into one polygon, which leaves the triconnected
+        components. Kinds not given when splitting are worked out here."""
+
+        src, dst = self.src, self.dst
+        kinds: List[str] = []
+        for kind, edges in self.split:
+            if kind is None:
+                vertices = {src[e] for e in edges} | {dst[e] for e in edges}
+                if len(vertices) == 2:
+                    kind = BOND
+                elif len(vertices) == len(edges):
+                    kind = POLYGON
+                else:
+                    kind = TRICONNECTED
+            kinds.append(kind)
+
+        # The (at most two) components every edge is in
+        comp1 = [-1] * len(src)
+        comp2 = [-1] * len(src)
+        for c, (_, edges) in enumerate(self.split):
+            for e in edges:
+                if comp1[e] == -1:
+                    comp1[e] = c
+                else:
+                    comp2[e] = c
+
+        alive = [True] * len(self.split)
+        merged: List[Tuple[str, List[int]]] = []
+        for c, (_, edges) in enumerate(self.split):
+            if not alive[c]:
+                continue
+            if kinds[c] == TRICONNECTED:
+                merged.append((kinds[c], edges))
+                continue
+
+            res = []
+            j = 0
+            while j < len(edges):
+                e = edges[j]
+                j += 1
+                other = comp2[e] if comp1[e] == c else comp1[e]
+                if other != -1 and alive[other] and kinds[other] == kinds[c]:
+                    # Take over the other component, and drop the virtual
+                    # edge between them
+                    alive[other] = False
+                    for f in self.split[other][1]:
+                        if f == e:
+                            continue
+                        edges.append(f)
+                        if comp1[f] == other:
+                            comp1[f] = c
+                        else:
+                            comp2[f] = c
+                    continue
+                res.append(e)
+            merged.append((kinds[c], res))
+
+        self.components = merged
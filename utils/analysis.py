@@ -1,39 +1,66 @@
 # Internal
 from utils import Component
+from .partition import Partition
 
 # Typing
-from typing import List
+from typing import List, Union
 
 # External
+import os
 import pickle
+import numpy as np
 
 
-def load_pickle(data_path: str) -> List[Component]:
-    """Load a saved pickle dataset into a list of components"""
+def components_path(data_path: str) -> str:
+    """Get the directory that the components of a dataset are saved in"""
+    return f"data/processed/{data_path}-components"
+
+
+def load_pickle(data_path: str) -> Union[Partition, List[Component]]:
+    """Load the saved components of a dataset. If they were saved in the
+    columnar format, the arrays are memory-mapped (and components are only
+    built when iterated over), otherwise fall back on the old pickled list of
+    components."""
+
+    if os.path.isdir(components_path(data_path)):
+        return Partition.load(components_path(data_path))
 
     with open(f"data/processed/{data_path}-components.pkl", "rb") as inp:
         return pickle.load(inp)
 
 
-def print_stats(components: List[Component]):
+def convert_pickle(data_path: str) -> Partition:
+    """Convert an old pickled list of components of a dataset into the columnar
+    format, saved next to it."""
+
+    with open(f"data/processed/{data_path}-components.pkl", "rb") as inp:
+        components: List[Component] = pickle.load(inp)
+
+    partition = Partition.from_components(components, {"converted_from": "pkl"})
+    partition.save(components_path(data_path))
+    return partition
+
+
+def print_stats(components: Union[Partition, List[Component]]):
     """Given a list of components, print out some statistics about them."""
-    num = len(components)
-    num_vertices = sum([len(c) for c in components])
+    if isinstance(components, Partition):
+        sizes = components.sizes()
+    else:
+        sizes = np.array([len(c) for c in components], dtype=np.int64)
+
+    num = len(sizes)
+    num_vertices = int(sizes.sum())
 
     print(f"Number of components: {num}")
-    largest_component_size = len(max(components, key=lambda x: len(x)))
+    largest_component_size = int(sizes.max())
     print(f"Largest component size: {largest_component_size}")
-    print(f"Average component size: {sum(len(c) for c in components) / num}")
+    print(f"Average component size: {num_vertices / num}")
     print(
-        f"Average component size (w/o largest component): {sum(len(c) for c in components if len(c) != largest_component_size) / (num - 1)}"
+        f"Average component size (w/o largest component): {int(sizes[sizes != largest_component_size].sum()) / (num - 1)}"
     )
 
-    components_excluding_small = [c for c in components if len(c) > 1]
-    print(
-        f"Number of components (greater than size 1): {len(components_excluding_small)}"
-    )
+    excluding_small = sizes[sizes > 1]
+    print(f"Number of components (greater than size 1): {len(excluding_small)}")
 
     print(f"Proportion: {largest_component_size / num_vertices}")
-    print(
-        f"Proportion (core): {largest_component_size / sum([len(c) for c in components_excluding_small])}"
-    )
+    print(f"Proportion (core): {largest_component_size / int(excluding_small.sum())}")
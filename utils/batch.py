@@ -0,0 +1,194 @@
+"""Compute and save the 3-edge-connected components of many SNAP files at once,
+each one in its own process of a pool. Inputs are files (or globs) under data/,
+plain or compressed, and the components of each are saved to data/processed by
+run_and_save. Inputs whose saved components are still current (computed from the
+file as it is now, with the same options) are skipped. How every input went, and
+how long it took, is written to a JSON summary, and the exit status is non-zero
+if any input failed.
+
+Run it with `python -m triconnect`, see --help for the options."""
+
+# External
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+# Internal functions
+from .snap import components_current, run_and_save
+
+# Typing
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def find_inputs(patterns: Sequence[str]) -> Tuple[List[str], List[str]]:
+    """Expand files and globs into the paths of the files under data/ they
+    match (relative to data/, as run_and_save expects them), in order and
+    without duplicates. Patterns are tried as they are, and then under data/.
+    Returns the inputs, and every pattern that matched nothing usable."""
+
+    inputs: List[str] = []
+    unmatched: List[str] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or sorted(
+            glob.glob(os.path.join("data", pattern))
+        )
+        matches = [m for m in matches if os.path.isfile(m)]
+        found = False
+        for match in matches:
+            data_path = os.path.relpath(match, "data")
+            # Only inputs under data/, and never the results saved in it
+            if data_path.split(os.sep)[0] in (os.pardir, "processed"):
+                continue
+            found = True
+            if data_path not in inputs:
+                inputs.append(data_path)
+        if not found:
+            unmatched.append(pattern)
+
+    return inputs, unmatched
+
+
+def _run(data_path: str, options: dict) -> float:
+    """Worker task, compute and save the components of one input, and return
+    how long that took (loading included)"""
+    start = time.perf_counter()
+    run_and_save(data_path, **options)
+    return time.perf_counter() - start
+
+
+def run_batch(
+    inputs: Sequence[str],
+    workers: Optional[int] = None,
+    force: bool = False,
+    **options,
+) -> List[dict]:
+    """Run run_and_save on every input (relative to data/), spread over a pool
+    of workers (or in this process, if workers is 1), skipping inputs whose
+    components are current unless forced. Any other keyword arguments are passed
+    on to run_and_save. Returns a record of how every input went."""
+
+    check = {
+        k: options.get(k, False)
+        for k in ("directed", "whole_graph", "split_bridges", "reduce", "verify")
+    }
+    results: Dict[str, dict] = dict()
+    pending = []
+    for data_path in inputs:
+        if not force and components_current(data_path, **check):
+            logging.info(f"Components of {data_path} are current, skipping.")
+            results[data_path] = {"input": data_path, "status": "skipped"}
+        else:
+            pending.append(data_path)
+
+    def record(data_path: str, seconds: float, error: Optional[BaseException]):
+        if error is None:
+            logging.info(f"Finished {data_path} in {seconds:.2f}s.")
+            results[data_path] = {
+                "input": data_path,
+                "status": "done",
+                "seconds": seconds,
+            }
+        else:
+            # Errors from the pool carry the traceback of the worker with them
+            logging.error(f"Failed on {data_path}.", exc_info=error)
+            results[data_path] = {
+                "input": data_path,
+                "status": "failed",
+                "error": repr(error),
+            }
+
+    if workers == 1 or len(pending) <= 1:
+        for data_path in pending:
+            try:
+                record(data_path, _run(data_path, options), None)
+            except Exception as e:
+                record(data_path, 0.0, e)
+    else:
+        # Every input already has a process to itself, so do not let the
+        # whole-graph modes start a pool of their own inside of it
+        options = dict(options, workers=1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_run, p, options): p for p in pending}
+            for future in as_completed(futures):
+                error = future.exception()
+                record(futures[future], 0.0 if error else future.result(), error)
+
+    return [results[data_path] for data_path in inputs]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m triconnect", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("inputs", nargs="+", help="files or globs, under data/")
+    parser.add_argument(
+        "-j", "--workers", type=int, help="processes to run at once (default: CPUs)"
+    )
+    parser.add_argument("--directed", action="store_true")
+    parser.add_argument(
+        "--whole-graph",
+        action="store_true",
+        help="solve every connected component, not only the first vertex's",
+    )
+    parser.add_argument("--split-bridges", action="store_true")
+    parser.add_argument("--reduce", action="store_true", help="reduce to a kernel")
+    parser.add_argument("--verify", action="store_true")
+    parser.add_argument(
+        "--memory-budget", type=int, help="ingest uncached inputs out of core (bytes)"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="recompute current components too"
+    )
+    parser.add_argument("--output", default="data/processed/batch.json")
+    args = parser.parse_args(argv)
+
+    inputs, unmatched = find_inputs(args.inputs)
+    for pattern in unmatched:
+        logging.error(f"{pattern} does not match any file under data/.")
+
+    started = datetime.utcnow()
+    results = run_batch(
+        inputs,
+        args.workers,
+        args.force,
+        directed=args.directed,
+        whole_graph=args.whole_graph,
+        split_bridges=args.split_bridges,
+        reduce=args.reduce,
+        verify=args.verify,
+        memory_budget=args.memory_budget,
+    )
+    summary = {
+        "started": started.isoformat(),
+        "seconds": (datetime.utcnow() - started).total_seconds(),
+        "workers": args.workers,
+        "options": {
+            k: getattr(args, k)
+            for k in ("directed", "whole_graph", "split_bridges", "reduce", "verify")
+        },
+        "unmatched": unmatched,
+        "results": results,
+    }
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(summary, f, indent=2)
+    logging.info(f"Saved the summary to {args.output}.")
+
+    failed = [r["input"] for r in results if r["status"] == "failed"]
+    counts = {s: sum(r["status"] == s for r in results) for s in ("done", "skipped")}
+    logging.info(
+        f"{counts['done']} done, {counts['skipped']} skipped, {len(failed)} failed."
+    )
+    return 1 if failed or unmatched else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
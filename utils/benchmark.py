@@ -0,0 +1,325 @@
+"""A benchmark suite for the engines, over the bundled SNAP datasets and over
+vertex_limit-truncated prefixes of them (for scaling curves). Every run records
+how long loading, construction and the depth-first search took, the peak memory
+and the components found, and results are saved to and compared against JSON
+baselines so that regressions (such as something going quadratic) get caught.
+
+Run it with `python -m utils.benchmark`, see --help for the options."""
+
+# Implementations
+from triconnect.edge.base import ThreeEdgeConnectBase
+from triconnect.edge.iterative import ThreeEdgeConnectIterative
+from triconnect.edge.recursive import ThreeEdgeConnectRecursive
+
+# External
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+
+# Internal functions
+from .generator import truth_path
+from .partition import Partition
+from .snap import edges_to_csr, load_snap_edges
+
+# Typing
+from typing import Dict, List, Optional, Sequence, Type, cast
+
+# Every engine that can be benchmarked, by name
+ENGINES: Dict[str, Type[ThreeEdgeConnectBase]] = {
+    "iterative": ThreeEdgeConnectIterative,
+    "recursive": ThreeEdgeConnectRecursive,
+}
+
+# Measurements compared against the baseline, and the smallest absolute
+# increase of each that counts as a regression (to ignore timer noise)
+METRICS = {
+    "load": 0.05,
+    "construction": 0.05,
+    "dfs": 0.05,
+    "peak_memory": 4 * 1024 * 1024,
+}
+
+
+class _Timed(ThreeEdgeConnectBase):
+    """Mixed in ahead of an engine by _timed, keeps the time spent exploring
+    apart from the time spent building its structures"""
+
+    # Seconds spent in the depth-first search itself
+    dfs_time: float
+    # Whether a search is running (the recursive engine calls _explore for
+    # every vertex, only the outermost call is timed)
+    _searching: bool
+
+    def _setup(self):
+        self.dfs_time = 0.0
+        self._searching = False
+        super()._setup()
+
+    def _explore(self, u: int):
+        if self._searching:
+            return super()._explore(u)
+        self._searching = True
+        start = time.perf_counter()
+        try:
+            super()._explore(u)
+        finally:
+            self._searching = False
+        self.dfs_time += time.perf_counter() - start
+
+
+def _timed(engine: Type[ThreeEdgeConnectBase]) -> Type[_Timed]:
+    """Wrap an engine so that it records the time spent in the depth-first
+    search in dfs_time"""
+    return cast(Type[_Timed], type(f"Timed{engine.__name__}", (_Timed, engine), {}))
+
+
+def _peak_rss() -> Optional[int]:
+    """The peak resident set size of this process so far in bytes, if the
+    platform can tell"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes on Linux, but in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def benchmark(
+    file: str,
+    engine: str = "iterative",
+    vertex_limit: Optional[int] = None,
+    directed: bool = True,
+    repeat: int = 1,
+    memory: bool = True,
+) -> dict:
+    """Benchmark one engine on one SNAP file (in the data folder), run on the
+    whole graph. Times are the best of repeat runs. If memory is set, one more
+    run is traced with tracemalloc for the peak memory (tracing slows everything
+    down, so it is never timed). SNAP files list edges in one or both
+    directions, so they are read as directed by default, which works for all."""
+
+    engine_class = _timed(ENGINES[engine])
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        src, dst = load_snap_edges(file, vertex_limit)
+        loaded = time.perf_counter()
+        graph = edges_to_csr(src, dst, directed)
+        built = time.perf_counter()
+        result = engine_class(None, graph)
+        done = time.perf_counter()
+
+        timing = {
+            "load": loaded - start,
+            "construction": (built - loaded) + (done - built - result.dfs_time),
+            "dfs": result.dfs_time,
+        }
+        if best is None or sum(timing.values()) < sum(best.values()):
+            best = timing
+    assert best is not None
+
+    peak_memory = None
+    if memory:
+        tracemalloc.start()
+        engine_class(None, edges_to_csr(*load_snap_edges(file, vertex_limit), directed))
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    labels = result.get_labels()
+    sizes = np.bincount(np.unique(labels, return_inverse=True)[1])
+
+    # Generated datasets come with their planted components (only valid for
+    # the whole file, cutting it off at a vertex limit changes them)
+    correct = None
+    if vertex_limit is None and os.path.exists(truth_path(file)):
+        truth = np.load(truth_path(file), mmap_mode="r")[graph.labels]
+        correct = (
+            Partition.from_labels(graph.labels, labels).digest()
+            == Partition.from_labels(graph.labels, truth).digest()
+        )
+
+    return {
+        "dataset": file,
+        "engine": engine,
+        "vertex_limit": vertex_limit,
+        "n": graph.n,
+        "m": graph.m,
+        **best,
+        "total": sum(best.values()),
+        "peak_memory": peak_memory,
+        "peak_rss": _peak_rss(),
+        "components": len(sizes),
+        "largest_component": int(sizes.max()) if len(sizes) else 0,
+        "nontrivial_components": int((sizes > 1).sum()),
+        "correct": correct,
+    }
+
+
+def run_benchmarks(
+    files: Optional[Sequence[str]] = None,
+    engines: Sequence[str] = ("iterative",),
+    limits: Sequence[Optional[int]] = (None,),
+    directed: bool = True,
+    repeat: int = 1,
+    memory: bool = True,
+) -> dict:
+    """Benchmark every engine on every file (every .txt file in the data folder
+    by default), once per vertex limit (None for the whole file)."""
+
+    if files is None:
+        files = sorted(os.path.basename(f) for f in glob.glob("data/*.txt"))
+
+    results = []
+    for file in files:
+        for limit in limits:
+            for engine in engines:
+                logging.info(f"Benchmarking {engine} on {file} (limit {limit}).")
+                result = benchmark(file, engine, limit, directed, repeat, memory)
+                logging.info(
+                    f"{file} ({result['n']} vertices, {result['m']} edges): {result['total']:.3f}s"
+                )
+                results.append(result)
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def scaling_exponents(results: List[dict], metric: str = "dfs") -> Dict[str, float]:
+    """Fit time ~ m^k over the vertex-limited runs of every dataset and engine,
+    and return the exponent k of each (keyed by "dataset/engine"). A linear-time
+    engine should stay close to 1."""
+
+    series: Dict[str, List[dict]] = dict()
+    for r in results:
+        if r["m"] > 0 and r[metric] > 0:
+            series.setdefault(f"{r['dataset']}/{r['engine']}", []).append(r)
+
+    exponents = dict()
+    for key, runs in series.items():
+        if len({r["m"] for r in runs}) < 2:
+            continue
+        x = np.log([r["m"] for r in runs])
+        y = np.log([r[metric] for r in runs])
+        exponents[key] = float(np.polyfit(x, y, 1)[0])
+    return exponents
+
+
+def compare(
+    results: dict,
+    baseline: dict,
+    threshold: float = 0.25,
+    max_exponent: float = 1.5,
+) -> List[str]:
+    """Compare benchmark results against a baseline, and describe every
+    regression: a metric more than threshold (as a fraction) worse than the
+    baseline, a different number of components, a mismatch with the planted
+    components of a generated dataset, or a scaling exponent above
+    max_exponent. Returns an empty list if there are none."""
+
+    def key(r: dict):
+        return r["dataset"], r["engine"], r["vertex_limit"]
+
+    before = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in results["results"]:
+        old = before.get(key(r))
+        if old is None:
+            continue
+        name = f"{r['engine']} on {r['dataset']} (limit {r['vertex_limit']})"
+
+        if r["correct"] is False:
+            regressions.append(f"{name}: does not match the planted components")
+        if r["components"] != old["components"]:
+            regressions.append(
+                f"{name}: {r['components']} components, {old['components']} before"
+            )
+        for metric, floor in METRICS.items():
+            if r.get(metric) is None or old.get(metric) is None:
+                continue
+            if (
+                r[metric] > old[metric] * (1 + threshold)
+                and r[metric] - old[metric] > floor
+            ):
+                regressions.append(
+                    f"{name}: {metric} went from {old[metric]:.4g} to {r[metric]:.4g}"
+                )
+
+    for name, k in scaling_exponents(results["results"]).items():
+        if k > max_exponent:
+            regressions.append(f"{name}: dfs time scales as m^{k:.2f}")
+
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.benchmark", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("files", nargs="*", help="files in data/ (default: all .txt)")
+    parser.add_argument("--engines", default="iterative", help="comma-separated")
+    parser.add_argument(
+        "--limits",
+        default="",
+        help="comma-separated vertex limits for scaling sweeps (the whole file is always run)",
+    )
+    parser.add_argument("--undirected", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc")
+    parser.add_argument("--output", default="data/processed/benchmark.json")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--max-exponent", type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    limits: List[Optional[int]] = [int(x) for x in args.limits.split(",") if x]
+    results = run_benchmarks(
+        args.files or None,
+        args.engines.split(","),
+        limits + [None],
+        not args.undirected,
+        args.repeat,
+        not args.no_memory,
+    )
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    logging.info(f"Saved results to {args.output}.")
+
+    for name, k in scaling_exponents(results["results"]).items():
+        logging.info(f"{name}: dfs time scales as m^{k:.2f}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(
+                results, json.load(f), args.threshold, args.max_exponent
+            )
+        for r in regressions:
+            logging.error(f"Regression: {r}")
+        if regressions:
+            return 1
+        logging.info("No regressions against the baseline.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
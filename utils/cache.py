@@ -0,0 +1,151 @@
+"""A binary cache of parsed SNAP datasets, kept in data/processed next to the
+saved components. Each cache is a directory of .npy files holding the arrays of
+a CSRGraph (which includes the dense id -> raw vertex id mapping), along with a
+meta.json recording which source file (size, mtime and content hash) and which
+loading options it was built from. Loading a current cache memory-maps the
+arrays, so nothing has to be re-parsed or copied. A cache can also be built out
+of core (see utils.ingest), for files whose graph does not fit in memory."""
+
+# Internal
+from .graph import CSRGraph
+from .ingest import DEFAULT_MEMORY_BUDGET, ingest_snap
+
+# External
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+# Typing
+from typing import Optional
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """Get the SHA-256 hex digest of the contents of a file, read in chunks"""
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def graph_cache_path(file: str) -> str:
+    """Get the directory that the graph cache of a SNAP file is saved in"""
+    return f"data/processed/{file}-graph"
+
+
+def _source_meta(path: str, directed: bool, vertex_limit: Optional[int]) -> dict:
+    """Describe a source file without hashing it"""
+    stat = os.stat(path)
+    return {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "directed": bool(directed),
+        "vertex_limit": vertex_limit or None,
+    }
+
+
+def _read_meta(cache: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(cache, "meta.json"), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(cache: str, meta: dict):
+    with open(os.path.join(cache, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+def is_cache_current(file: str, directed=False, vertex_limit=None) -> bool:
+    """Check whether the graph cache of a SNAP file exists and was built from
+    the file as it is now. A matching size and mtime is trusted as is; if only
+    the mtime changed, the content hash decides (and the cache is re-keyed)."""
+
+    cache = graph_cache_path(file)
+    meta = _read_meta(cache)
+    if meta is None:
+        return False
+
+    current = _source_meta(f"data/{file}", directed, vertex_limit)
+    for key in ("size", "directed", "vertex_limit"):
+        if meta.get(key) != current[key]:
+            return False
+
+    if meta.get("mtime") != current["mtime"]:
+        # The file was touched, but may not have actually changed
+        if meta.get("sha256") != file_hash(f"data/{file}"):
+            return False
+        meta["mtime"] = current["mtime"]
+        _write_meta(cache, meta)
+
+    return True
+
+
+def _publish_cache(file: str, temp: str, graph: CSRGraph, directed, vertex_limit):
+    """Record where the graph saved in temp came from, and move it into place"""
+
+    cache = graph_cache_path(file)
+    meta = _source_meta(f"data/{file}", directed, vertex_limit)
+    meta["sha256"] = file_hash(f"data/{file}")
+    meta["n"] = graph.n
+    meta["m"] = graph.m
+    _write_meta(temp, meta)
+
+    shutil.rmtree(cache, ignore_errors=True)
+    os.replace(temp, cache)
+
+
+def save_graph_cache(file: str, graph: CSRGraph, directed=False, vertex_limit=None):
+    """Save a graph loaded from a SNAP file to its cache. The arrays are written
+    to a temporary directory first, so that a partial cache is never read."""
+
+    temp = f"{graph_cache_path(file)}.tmp-{os.getpid()}"
+    shutil.rmtree(temp, ignore_errors=True)
+    graph.save(temp)
+    _publish_cache(file, temp, graph, directed, vertex_limit)
+
+
+def ingest_graph_cache(
+    file: str,
+    directed=False,
+    vertex_limit=None,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+) -> CSRGraph:
+    """Build the cache of a SNAP file straight from the text, without ever
+    holding the whole graph in memory (at most about memory_budget bytes of it),
+    and return the graph memory-mapped from there."""
+
+    temp = f"{graph_cache_path(file)}.tmp-{os.getpid()}"
+    shutil.rmtree(temp, ignore_errors=True)
+    graph = ingest_snap(f"data/{file}", temp, directed, vertex_limit, memory_budget)
+    _publish_cache(file, temp, graph, directed, vertex_limit)
+    return CSRGraph.load(graph_cache_path(file))
+
+
+def load_cached_graph(
+    file: str, directed=False, vertex_limit=None, memory_budget: Optional[int] = None
+) -> CSRGraph:
+    """Load a SNAP file as a CSRGraph, memory-mapped from its binary cache if
+    the cache is current, otherwise parsed from the text file (and cached). If a
+    memory_budget (in bytes) is given, the cache is built out of core instead,
+    and the graph is memory-mapped from it either way."""
+
+    # Avoid a circular import, the loader lives next to run_and_save
+    from .snap import load_snap_dataset
+
+    if is_cache_current(file, directed, vertex_limit):
+        logging.info(f"Memory-mapping cached graph of {file}.")
+        return CSRGraph.load(graph_cache_path(file))
+
+    if memory_budget:
+        logging.info(f"Ingesting {file} out of core into its cache.")
+        return ingest_graph_cache(file, directed, vertex_limit, memory_budget)
+
+    graph = load_snap_dataset(file, directed, vertex_limit, as_csr=True)
+    save_graph_cache(file, graph, directed, vertex_limit)
+    logging.info(f"Cached graph of {file} to {graph_cache_path(file)}.")
+    return graph
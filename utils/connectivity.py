@@ -0,0 +1,128 @@
+"""A query index over a partition of a graph's vertices into 3-edge-connected
+components, answering "are u and v 3-edge-connected?" without going through a
+list of components. Single queries are a couple of dictionary lookups, and
+batches of (u, v) pairs given as arrays are answered with vectorized lookups into
+a dense array of component labels."""
+
+# Internal
+from .partition import Partition
+
+# External
+import numpy as np
+
+# Typing
+from typing import Dict, Iterable, Optional, Tuple
+
+# Original vertex labels are looked up directly in a table (instead of by binary
+# search) as long as the largest one is at most this many times the vertex count
+TABLE_DENSITY = 4
+
+
+class ConnectivityIndex:
+    # Dense vertex -> original vertex label
+    vertices: np.ndarray
+    # Dense vertex -> component label
+    labels: np.ndarray
+    # Original vertex label -> component label (-1 if there is no such vertex),
+    # only built if the original labels are small non-negative integers
+    table: Optional[np.ndarray]
+    # Otherwise, the original vertex labels in sorted order (and the component
+    # label of each one) to binary search through
+    sorted_vertices: Optional[np.ndarray]
+    sorted_labels: Optional[np.ndarray]
+
+    def __init__(self, vertices: Iterable[int], labels: Iterable[int]):
+        """Build an index from the original label of every (dense) vertex and
+        its component label (vertices sharing a label share a component)."""
+
+        self.vertices = np.asarray(vertices, dtype=np.int64)
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.table = None
+        self.sorted_vertices = None
+        self.sorted_labels = None
+        self._component: Optional[Dict[int, int]] = None
+
+        n = len(self.vertices)
+        if not n or (
+            self.vertices.min() >= 0 and self.vertices.max() < TABLE_DENSITY * n
+        ):
+            size = int(self.vertices.max()) + 1 if n else 1
+            self.table = np.full(size, -1, dtype=np.int64)
+            self.table[self.vertices] = self.labels
+        else:
+            order = np.argsort(self.vertices, kind="stable")
+            self.sorted_vertices = self.vertices[order]
+            self.sorted_labels = self.labels[order]
+
+    @classmethod
+    def from_partition(cls, partition: Partition) -> "ConnectivityIndex":
+        return cls(partition.vertices, partition.labels)
+
+    @classmethod
+    def from_engine(cls, engine) -> "ConnectivityIndex":
+        """Build an index from an engine (a ThreeEdgeConnectBase) that has
+        already been run"""
+        return cls(engine.csr.labels, engine.get_labels())
+
+    def __len__(self) -> int:
+        """The number of vertices"""
+        return len(self.vertices)
+
+    def component(self, u: int) -> int:
+        """Get the component label of vertex u (by its original label). Raises a
+        KeyError if there is no such vertex."""
+        if self._component is None:
+            self._component = dict(zip(self.vertices.tolist(), self.labels.tolist()))
+        return self._component[u]
+
+    def connected(self, u: int, v: int) -> bool:
+        """Whether vertices u and v (by their original labels) are
+        3-edge-connected"""
+        return self.component(u) == self.component(v)
+
+    def components(self, us: np.ndarray) -> np.ndarray:
+        """Get the component label of every vertex in an array of original
+        vertex labels. Raises a KeyError if any of them is not a vertex."""
+
+        us = np.asarray(us, dtype=np.int64)
+        if self.table is not None:
+            res, missing = self._table_components(us, self.table)
+        else:
+            assert self.sorted_vertices is not None and self.sorted_labels is not None
+            res, missing = self._sorted_components(
+                us, self.sorted_vertices, self.sorted_labels
+            )
+
+        if missing.any():
+            raise KeyError(int(us[np.argmax(missing)]))
+        return res
+
+    def _table_components(
+        self, us: np.ndarray, table: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Look every vertex up directly in the table, returning its component
+        label and whether it is missing"""
+        inside = (us >= 0) & (us < len(table))
+        res = table[np.where(inside, us, 0)]
+        return res, ~inside | (res < 0)
+
+    def _sorted_components(
+        self, us: np.ndarray, sorted_vertices: np.ndarray, sorted_labels: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Binary search for every vertex in the sorted vertex labels, returning
+        its component label and whether it is missing"""
+        pos = np.searchsorted(sorted_vertices, us)
+        pos = np.minimum(pos, len(sorted_vertices) - 1)
+        return sorted_labels[pos], sorted_vertices[pos] != us
+
+    def connected_many(
+        self, us: np.ndarray, vs: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Vectorized connected(), given two arrays of original vertex labels
+        (or a single (k, 2) array of pairs as us). Returns a boolean array of
+        whether each pair u, v is 3-edge-connected."""
+
+        if vs is None:
+            pairs = np.asarray(us)
+            us, vs = pairs[:, 0], pairs[:, 1]
+        return self.components(us) == self.components(vs)
@@ -1,80 +1,108 @@
-""" A modified disjoint set algorithm with path compression, that maintains a 
-specific value in the parent upon return from get(). The structure of the tree
-is exactly the same as another algorithm, except that union(x,y) sets a special
-value on the parent of the newly joined set to be equal to x. This value gets
-returned upon a call to get() (whilst _find() returns just the parent()). This
-makes it appear that x is the parent of the new set (when it really is not).
+"""A modified disjoint set algorithm with path compression, that maintains a
+specific value (the owner) for every set. The structure of the tree is exactly
+the same as another algorithm, except that union(x,y) sets the owner of the newly
+joined set to be equal to x. The owner gets returned upon a call to get() (whilst
+find() returns just the root). This makes it appear that x is the parent of the
+new set (when it really is not).
+
+Elements are the integers 0..n-1 (more can be added), and the forest is kept in
+flat arrays rather than one object per element, so that it stays small for
+millions of elements. find() is iterative, so long chains cannot overflow the
+recursion limit, and find_many()/union_many() work on whole arrays at once.
 
 Heavily modified from:
-https://www.geeksforgeeks.org/union-by-rank-and-path-compression-in-union-find-algorithm/"""
-
-from typing import TypeVar, Generic, Hashable, List, Dict
-
-T = TypeVar("T", bound=Hashable)
-
-
-class DisjoinSetItem(Generic[T]):
-    def __init__(self, value: T, parent: T):
-        self.value = value
-        self.rank = 0
-        self.parent = parent
-
-
-class Disjoint(Generic[T]):
-    def __init__(self, values: List[T]):
-        self.items: Dict[T, DisjoinSetItem[T]] = {
-            v: DisjoinSetItem(value=v, parent=v) for v in values
-        }
-
-    def get(self, item: T) -> T:
-        """Get the value that item is represented by (its embodied parent)"""
-        return self.items[self._find(item)].value
-
-    def _find(self, item: T) -> T:
-        # If we are not the parent
-        if self.items[item].parent != item:
-            self.items[item].parent = self._find(self.items[item].parent)
-        return self.items[item].parent
-
-    def add(self, value: T):
-        """Add a new value to the data structure"""
-
-        if value not in self.items:
-            self.items[value] = DisjoinSetItem(value=value, parent=value)
-
-    def union(self, u: T, v: T):
-        """Union the two sets by u and v. Set the value of the parent of this
-        new set to be equal to u (making it look like u is the parent of the
-        new set)"""
-
-        self.add(u)
-        self.add(v)
-
-        u_p = self._find(u)
-        v_p = self._find(v)
-
-        # The owner of the new set
-        owner: T
-        if self.items[u_p].rank > self.items[v_p].rank:
-            self.items[v_p].parent = u_p
-            owner = u_p
-        elif self.items[v_p].rank > self.items[u_p].rank:
-            self.items[u_p].parent = v_p
-            owner = v_p
-        else:
-            # Increment rank
-            self.items[u_p].rank += 1
-            # Always set u_p to be the parent in this case
-            self.items[v_p].parent = u_p
-            owner = u_p
+https://www.geeksforgeeks.org/union-by-rank-and-path-compression-in-union-find-algorithm/
+"""
+
+from array import array
+from typing import Iterable
+
+import numpy as np
+
+
+class Disjoint:
+    # The parent of every element (roots are their own parent)
+    parent: array
+    # An upper bound on the height of every root's tree
+    rank: array
+    # The owner of every set, only valid at its root
+    owner: array
+
+    def __init__(self, n: int = 0):
+        """Start with n singleton sets 0..n-1, each one owned by itself"""
+        self.parent = array("q", range(n))
+        self.rank = array("B", bytes(n))
+        self.owner = array("q", range(n))
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def add(self) -> int:
+        """Add a new singleton set to the data structure, and return its element"""
+        x = len(self.parent)
+        self.parent.append(x)
+        self.rank.append(0)
+        self.owner.append(x)
+        return x
+
+    def find(self, x: int) -> int:
+        """Get the root of the set x belongs to"""
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        # Compress the path behind us
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def get(self, x: int) -> int:
+        """Get the element that x is represented by (the owner of its set)"""
+        return self.owner[self.find(x)]
+
+    def union(self, u: int, v: int):
+        """Union the two sets by u and v. Set the owner of this new set to be
+        equal to u (making it look like u is the parent of the new set)"""
+
+        u_p = self.find(u)
+        v_p = self.find(v)
+        if u_p != v_p:
+            if self.rank[u_p] < self.rank[v_p]:
+                u_p, v_p = v_p, u_p
+            elif self.rank[u_p] == self.rank[v_p]:
+                # Increment rank
+                self.rank[u_p] += 1
+            self.parent[v_p] = u_p
 
         # Make it seem like u is the parent of the new set
-        # NOTE: .value of the parent is only valid at any given time
-        self.items[owner].value = u
+        self.owner[u_p] = u
+
+    def find_many(self, xs: Iterable[int]) -> np.ndarray:
+        """Get the root of every element in xs at once, compressing the path
+        of each of them"""
+
+        parent = np.frombuffer(self.parent, dtype=np.int64)
+        xs = np.asarray(xs, dtype=np.int64)
+        roots = parent[xs]
+        # Jump every element up to its grandparent until all are roots
+        while True:
+            up = parent[roots]
+            if np.array_equal(up, roots):
+                break
+            roots = parent[up]
+        parent[xs] = roots
+        return roots
+
+    def get_many(self, xs: Iterable[int]) -> np.ndarray:
+        """Get the owner of the set of every element in xs at once"""
+        return np.frombuffer(self.owner, dtype=np.int64)[self.find_many(xs)]
+
+    def union_many(self, us: Iterable[int], vs: Iterable[int]):
+        """Union the sets of us[i] and vs[i] for every i, in order (so owners
+        end up the same as after calling union() on each pair in turn)"""
+        union = self.union
+        for u, v in zip(np.asarray(us).tolist(), np.asarray(vs).tolist()):
+            union(u, v)
 
     def __str__(self):
-        items: Dict[T, T] = dict()
-        for item in self.items:
-            items[item] = self.get(item)
-
-        return str(items)
+        return str({x: self.get(x) for x in range(len(self))})
@@ -7,3 +7,35 @@ class ComponentsInconsistentException(Exception):
     def __init__(self):
         message = f"The returned tri-connected components of a graph were inconsistent given varying roots of DFS."
         super().__init__(message)
+
+
+class PartitionIncorrectException(Exception):
+    """
+    A partition of a graph's vertices failed verification, it is not the
+    partition into 3-edge-connected components.
+    """
+
+    def __init__(self, reason: str):
+        message = f"The partition is not the 3-edge-connected components of the graph: {reason}"
+        super().__init__(message)
+
+
+class TriconnectedComponentsIncorrectException(Exception):
+    """
+    The triconnected components (bonds, polygons and triconnected graphs) of a
+    graph failed verification.
+    """
+
+    def __init__(self, reason: str):
+        message = f"The triconnected components of the graph are incorrect: {reason}"
+        super().__init__(message)
+
+
+class SeparationPairsIncorrectException(Exception):
+    """
+    The separation pairs an SPQR tree reports for a graph failed verification.
+    """
+
+    def __init__(self, reason: str):
+        message = f"The separation pairs of the graph are incorrect: {reason}"
+        super().__init__(message)
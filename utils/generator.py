@@ -0,0 +1,273 @@
+"""Generate (arbitrarily large) graphs with a planted, known partition into
+3-edge-connected components, streamed out in chunks of edges.
+
+Every component is a core that is 3-edge-connected on its own: a circulant graph
+(each vertex joined to the next two around a ring), a wheel around a hub vertex,
+or a single vertex. Cores are attached to the graph built so far one at a time,
+either by a bridge or on a new cycle through an existing core. This keeps the
+contracted graph a forest of cacti joined by bridges, so the cores are exactly
+its 3-edge-connected components, and every pair of edges on a cycle is a cut
+pair. Cycles made of single vertices are long degree-2 chains, and attaching to
+the newest core again and again makes for deep depth-first searches.
+
+Vertices are numbered 0..n-1 in order of creation, and every edge is listed
+once, so load the written files as directed (which symmetrizes them).
+
+Run it with `python -m utils.generator <file>` to write data/<file>, see --help
+for the options."""
+
+# External
+import argparse
+import os
+import numpy as np
+
+# Typing
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+# Edges are yielded (and written) in chunks of about this many
+CHUNK_EDGES = 1_000_000
+
+
+def truth_path(file: str) -> str:
+    """Get the file that the planted component labels of a generated dataset
+    are saved in, indexed by raw vertex id"""
+    return f"data/{file}-truth.npy"
+
+
+class PlantedGraph:
+    # Roughly how many edges to generate
+    edges: int
+    # Range (inclusive) of the number of vertices in a circulant core
+    core_size: Tuple[int, int]
+    # Range (inclusive) of the number of vertices in a wheel (hub) core, and
+    # the probability that a new core is one
+    hub_size: Tuple[int, int]
+    hub_probability: float
+    # Range (inclusive) of the number of single vertices on a chain, and the
+    # probability that a new cycle is a chain (rather than a few cores)
+    chain_length: Tuple[int, int]
+    chain_probability: float
+    # Probability that a new core is attached by a bridge rather than a cycle
+    bridge_probability: float
+    # Probability of attaching to the newest core (rather than a random one)
+    depth: float
+    seed: Optional[int]
+
+    def __init__(
+        self,
+        edges: int = 1_000_000,
+        core_size: Tuple[int, int] = (4, 64),
+        hub_size: Tuple[int, int] = (1_000, 100_000),
+        hub_probability: float = 0.001,
+        chain_length: Tuple[int, int] = (2, 1_000),
+        chain_probability: float = 0.3,
+        bridge_probability: float = 0.2,
+        depth: float = 0.5,
+        seed: Optional[int] = None,
+    ):
+        if core_size[0] < 4 or hub_size[0] < 4:
+            # Without parallel edges, no graph on 2 or 3 vertices is
+            # 3-edge-connected
+            raise Exception("Cores must have at least 4 vertices.")
+        if chain_length[0] < 2:
+            raise Exception("Chains must have at least 2 vertices.")
+
+        self.edges = edges
+        self.core_size = core_size
+        self.hub_size = hub_size
+        self.hub_probability = hub_probability
+        self.chain_length = chain_length
+        self.chain_probability = chain_probability
+        self.bridge_probability = bridge_probability
+        self.depth = depth
+        self.seed = seed
+
+    def pieces(
+        self, chunk_edges: int = CHUNK_EDGES
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Generate the graph, yielding pieces (src, dst, labels) of about
+        chunk_edges edges each. labels holds the planted component of every
+        vertex created since the last piece, in order."""
+
+        rng = np.random.default_rng(self.seed)
+        # Uniform random numbers are drawn in blocks, one at a time is slow
+        block: List[float] = []
+
+        def random() -> float:
+            if not block:
+                block.extend(rng.random(1 << 16).tolist())
+            return block.pop()
+
+        def between(bounds: Tuple[int, int]) -> int:
+            return bounds[0] + int(random() * (bounds[1] - bounds[0] + 1))
+
+        # The first vertex and the size of every component so far
+        starts: List[int] = []
+        sizes: List[int] = []
+        # Edges not yielded yet, whole components as arrays and everything
+        # between components one edge at a time
+        src: List[np.ndarray] = []
+        dst: List[np.ndarray] = []
+        single_src: List[int] = []
+        single_dst: List[int] = []
+        pending = 0
+        # Vertices created so far, and the first component not yet yielded
+        n = 0
+        yielded_components = 0
+
+        def vertex(c: int) -> int:
+            """A random vertex of component c"""
+            return starts[c] + int(random() * sizes[c])
+
+        def component(size: int, hub: bool) -> int:
+            """Create a new component of the given size, and its edges"""
+            nonlocal n, pending
+            c = len(starts)
+            starts.append(n)
+            sizes.append(size)
+            if size > 1:
+                u, v = _wheel(size) if hub else _circulant(size)
+                src.append(u + n)
+                dst.append(v + n)
+                pending += len(u)
+            n += size
+            return c
+
+        def core() -> int:
+            if random() < self.hub_probability:
+                return component(between(self.hub_size), hub=True)
+            return component(between(self.core_size), hub=False)
+
+        def edge(u: int, v: int):
+            nonlocal pending
+            single_src.append(u)
+            single_dst.append(v)
+            pending += 1
+
+        def flush() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+            nonlocal pending, yielded_components
+            labels = np.repeat(
+                np.arange(yielded_components, len(starts), dtype=np.int64),
+                np.asarray(sizes[yielded_components:], dtype=np.int64),
+            )
+            src.append(np.asarray(single_src, dtype=np.int64))
+            dst.append(np.asarray(single_dst, dtype=np.int64))
+            piece = (np.concatenate(src), np.concatenate(dst), labels)
+            src.clear()
+            dst.clear()
+            single_src.clear()
+            single_dst.clear()
+            pending = 0
+            yielded_components = len(starts)
+            return piece
+
+        total = 0
+        core()
+        while total + pending < self.edges:
+            if random() < self.depth:
+                parent = len(starts) - 1
+            else:
+                parent = int(random() * len(starts))
+
+            if random() < self.bridge_probability:
+                c = core()
+                edge(vertex(parent), vertex(c))
+            else:
+                # A cycle leaving the parent, through new components, and back
+                if random() < self.chain_probability:
+                    length = between(self.chain_length)
+                    members = [component(1, hub=False) for _ in range(length)]
+                else:
+                    members = [core() for _ in range(between((2, 4)))]
+                last = vertex(parent)
+                for c in members:
+                    edge(last, vertex(c))
+                    last = vertex(c)
+                edge(last, vertex(parent))
+
+            if pending >= chunk_edges:
+                total += pending
+                yield flush()
+
+        yield flush()
+
+    def to_arrays(self) -> Tuple[np.ndarray, ...]:
+        """Generate the whole graph at once, as (src, dst, labels)"""
+        pieces = list(self.pieces())
+        return tuple(np.concatenate([p[i] for p in pieces]) for i in range(3))
+
+    def write_snap(self, file: str, chunk_edges: int = CHUNK_EDGES) -> int:
+        """Stream the graph to data/{file} in the SNAP text format, and its
+        planted component labels to truth_path(file). Returns the number of
+        edges written."""
+
+        labels: List[np.ndarray] = []
+        m = 0
+        os.makedirs(os.path.dirname(f"data/{file}") or ".", exist_ok=True)
+        with open(f"data/{file}", "w") as f:
+            f.write(f"# Planted 3-edge-connected components (seed {self.seed})\n")
+            f.write("# FromNodeId\tToNodeId\n")
+            for src, dst, piece_labels in self.pieces(chunk_edges):
+                np.savetxt(f, np.stack((src, dst), axis=1), fmt="%d", delimiter="\t")
+                labels.append(piece_labels)
+                m += len(src)
+
+        np.save(truth_path(file), np.concatenate(labels))
+        return m
+
+
+def _circulant(k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Edges of a 3-edge-connected circulant graph on k >= 4 vertices, each
+    vertex joined to the next two around a ring (K4 when k = 4)"""
+    i = np.arange(k, dtype=np.int64)
+    if k == 4:
+        u, v = np.triu_indices(4, 1)
+        return u.astype(np.int64), v.astype(np.int64)
+    return np.concatenate((i, i)), np.concatenate(((i + 1) % k, (i + 2) % k))
+
+
+def _wheel(k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Edges of a wheel on k >= 4 vertices, vertex 0 is the hub joined to every
+    vertex on the rim around it"""
+    rim = np.arange(1, k, dtype=np.int64)
+    ring = np.concatenate((rim[1:], rim[:1]))
+    return np.concatenate((np.zeros(k - 1, dtype=np.int64), rim)), np.concatenate(
+        (rim, ring)
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.generator", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("file", help="written to data/<file>")
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    parser.add_argument("--core-size", type=int, nargs=2, default=(4, 64))
+    parser.add_argument("--hub-size", type=int, nargs=2, default=(1_000, 100_000))
+    parser.add_argument("--hub-probability", type=float, default=0.001)
+    parser.add_argument("--chain-length", type=int, nargs=2, default=(2, 1_000))
+    parser.add_argument("--chain-probability", type=float, default=0.3)
+    parser.add_argument("--bridge-probability", type=float, default=0.2)
+    parser.add_argument("--depth", type=float, default=0.5)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    graph = PlantedGraph(
+        args.edges,
+        tuple(args.core_size),
+        tuple(args.hub_size),
+        args.hub_probability,
+        tuple(args.chain_length),
+        args.chain_probability,
+        args.bridge_probability,
+        args.depth,
+        args.seed,
+    )
+    m = graph.write_snap(args.file)
+    print(
+        f"Wrote {m} edges to data/{args.file}, and labels to {truth_path(args.file)}."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""A compact, array-backed representation of an undirected multigraph in
+compressed sparse row (CSR) form. Vertices are relabeled to dense ids 0..n-1
+(with labels mapping them back to the original vertex names), and every
+undirected edge receives a uid in 0..m-1 whose endpoints are kept in edge_u and
+edge_v. The incidence list of a dense vertex u is the slice
+offsets[u]:offsets[u + 1] of targets (the adjacent vertices) and edge_ids (the
+uid of the edge leading to each of them)."""
+
+# Typing
+from typing import Dict, Iterable, List, Literal, Optional
+
+# External
+import os
+import numpy as np
+
+# Offsets can exceed the number of vertices, so always store them as 64 bits
+OFFSET_DTYPE = np.int64
+# Dense vertex ids and edge uids
+INDEX_DTYPE = np.int32
+# Every array that makes up a graph, each one is saved to its own .npy file
+ARRAYS = ("labels", "offsets", "targets", "edge_ids", "edge_u", "edge_v")
+
+
+class CSRGraph:
+    # Dense vertex id -> original vertex label
+    labels: np.ndarray
+    # Start of each vertex's incidence list in targets/edge_ids (length n + 1)
+    offsets: np.ndarray
+    # Adjacent dense vertex for every half-edge (length 2m)
+    targets: np.ndarray
+    # Edge uid for every half-edge (length 2m)
+    edge_ids: np.ndarray
+    # Endpoints of every edge, indexed by edge uid (length m)
+    edge_u: np.ndarray
+    edge_v: np.ndarray
+
+    def __init__(
+        self,
+        labels: np.ndarray,
+        offsets: np.ndarray,
+        targets: np.ndarray,
+        edge_ids: np.ndarray,
+        edge_u: np.ndarray,
+        edge_v: np.ndarray,
+    ):
+        self.labels = labels
+        self.offsets = offsets
+        self.targets = targets
+        self.edge_ids = edge_ids
+        self.edge_u = edge_u
+        self.edge_v = edge_v
+
+        # Original vertex label -> dense id, only built when first requested
+        self._index: Optional[Dict[int, int]] = None
+
+    @classmethod
+    def from_edges(
+        cls,
+        edge_u: Iterable[int],
+        edge_v: Iterable[int],
+        labels: Optional[Iterable[int]] = None,
+        n: Optional[int] = None,
+    ) -> "CSRGraph":
+        """Build a graph from two parallel sequences of dense endpoints, where
+        edge_u[i] -- edge_v[i] is the edge with uid i. If labels are not given,
+        every vertex is labeled by its own dense id. Self-loops are dropped, as
+        they never affect the edge-connectivity of a graph."""
+
+        us = np.asarray(edge_u, dtype=INDEX_DTYPE)
+        vs = np.asarray(edge_v, dtype=INDEX_DTYPE)
+        keep = us != vs
+        if not keep.all():
+            us, vs = us[keep], vs[keep]
+
+        if labels is not None:
+            label_array = np.asarray(labels, dtype=np.int64)
+        else:
+            if n is None:
+                n = int(max(us.max(initial=-1), vs.max(initial=-1))) + 1
+            label_array = np.arange(n, dtype=np.int64)
+        n = len(label_array)
+        m = len(us)
+
+        # Every edge is stored twice, once from each of its endpoints
+        sources = np.concatenate((us, vs))
+        order = np.argsort(sources, kind="stable")
+        targets = np.concatenate((vs, us))[order]
+        uids = np.arange(m, dtype=INDEX_DTYPE)
+        edge_ids = np.concatenate((uids, uids))[order]
+
+        offsets = np.zeros(n + 1, dtype=OFFSET_DTYPE)
+        np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+
+        return cls(label_array, offsets, targets, edge_ids, us, vs)
+
+    @classmethod
+    def from_dict(cls, g: Dict[int, List[int]]) -> "CSRGraph":
+        """Build a graph from the dictionary form used throughout the project
+        (key is a vertex, value is a list of adjacent vertices). Each undirected
+        edge must be listed from both of its endpoints; parallel edges are kept
+        by listing the neighbor multiple times."""
+
+        index: Dict[int, int] = {u: i for i, u in enumerate(g)}
+        edge_u: List[int] = []
+        edge_v: List[int] = []
+        for u, adj in g.items():
+            i = index[u]
+            for v in adj:
+                j = index[v]
+                # Only take the copy of the edge listed from its smaller endpoint
+                if i < j:
+                    edge_u.append(i)
+                    edge_v.append(j)
+
+        graph = cls.from_edges(edge_u, edge_v, labels=list(g))
+        graph._index = index
+        return graph
+
+    @classmethod
+    def load(cls, directory: str, mmap=True) -> "CSRGraph":
+        """Load a graph previously written with save(). If mmap is set, every
+        array is memory-mapped read-only instead of being read into memory."""
+
+        mode: Optional[Literal["r", "r+", "c"]] = "r" if mmap else None
+        arrays = [
+            np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+            for name in ARRAYS
+        ]
+        return cls(*arrays)
+
+    def save(self, directory: str):
+        """Save every array of this graph as a .npy file in the given directory,
+        so that it can later be memory-mapped by load()."""
+
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+    @property
+    def n(self) -> int:
+        """The number of vertices"""
+        return len(self.labels)
+
+    @property
+    def m(self) -> int:
+        """The number of (undirected) edges"""
+        return len(self.edge_u)
+
+    def index(self, label: int) -> int:
+        """Get the dense id of a vertex given its original label"""
+        if self._index is None:
+            self._index = {u: i for i, u in enumerate(self.labels.tolist())}
+        return self._index[label]
+
+    def indices(self, labels: Iterable[int]) -> np.ndarray:
+        """Get the dense id of every vertex in an array of original labels at
+        once (the reverse of self.labels[ids])"""
+        labels = np.asarray(labels, dtype=np.int64)
+        order = np.argsort(self.labels, kind="stable")
+        found = np.searchsorted(self.labels, labels, sorter=order)
+        # Labels past every known one can not be found either
+        inside = found < self.n
+        ids = order[np.where(inside, found, 0)] if self.n else found
+        missing = ~inside
+        missing[inside] = self.labels[ids[inside]] != labels[inside]
+        if missing.any():
+            raise KeyError(int(labels[missing][0]))
+        return ids
+
+    def degree(self, u: int) -> int:
+        """Get the degree of a dense vertex (parallel edges counted)"""
+        return int(self.offsets[u + 1] - self.offsets[u])
+
+    def neighbors(self, u: int) -> List[int]:
+        """Get the dense vertices adjacent to dense vertex u"""
+        return self.targets[self.offsets[u] : self.offsets[u + 1]].tolist()
+
+    def connected_components(self, removed: Optional[np.ndarray] = None) -> np.ndarray:
+        """Get the connected component label of every vertex, where components
+        are labeled 0..k-1 in order of their smallest vertex. If given, removed
+        is a boolean mask over the edge uids of edges to ignore."""
+
+        offsets = self.offsets.tolist()
+        targets = self.targets.tolist()
+        if removed is not None:
+            # Drop the removed edges from the incidence lists
+            keep = ~removed[self.edge_ids]
+            kept_before = np.concatenate(([0], np.cumsum(keep)))
+            targets = self.targets[keep].tolist()
+            offsets = kept_before[self.offsets].tolist()
+        labels = [-1] * self.n
+        count = 0
+        for root in range(self.n):
+            if labels[root] != -1:
+                continue
+
+            # Iterative depth-first search from the root
+            labels[root] = count
+            stack = [root]
+            while stack:
+                u = stack.pop()
+                for v in targets[offsets[u] : offsets[u + 1]]:
+                    if labels[v] == -1:
+                        labels[v] = count
+                        stack.append(v)
+            count += 1
+
+        return np.asarray(labels, dtype=INDEX_DTYPE)
+
+    def subgraph(self, vertices: np.ndarray, edges: np.ndarray) -> "CSRGraph":
+        """Get the subgraph made up of the given (sorted) dense vertices and the
+        given edge uids, which must only join vertices among them. The vertices
+        of the subgraph are numbered in the same order, keeping their labels."""
+
+        edge_u = np.searchsorted(vertices, self.edge_u[edges])
+        edge_v = np.searchsorted(vertices, self.edge_v[edges])
+        return CSRGraph.from_edges(edge_u, edge_v, labels=self.labels[vertices])
+
+    def to_dict(self, dense=False) -> Dict[int, List[int]]:
+        """Convert back into the dictionary form, keyed by original labels (or
+        by dense ids, if dense is set)"""
+        labels = list(range(self.n)) if dense else self.labels.tolist()
+        offsets = self.offsets.tolist()
+        targets = self.targets.tolist()
+        return {
+            labels[u]: [labels[v] for v in targets[offsets[u] : offsets[u + 1]]]
+            for u in range(self.n)
+        }
@@ -0,0 +1,369 @@
+"""Out-of-core ingestion of SNAP edge lists larger than memory. The text is read
+in chunks (decompressed as it goes), and every step after that works on one
+bucket of records at a time, spilled to temporary files on disk:
+
+    1. every endpoint (raw id, position in the file) is hash-partitioned by raw
+       id, so that each bucket holds every occurrence of its ids
+    2. each bucket finds its distinct ids and where each one first appears,
+       and these are partitioned by that position
+    3. walking those in order of position numbers the vertices in order of
+       first appearance (and writes the labels)
+    4. the dense id of every endpoint is partitioned by position again, so
+       that every edge comes back together
+    5. edges are keyed by their endpoints and partitioned by the smaller one,
+       where each bucket dedupes (or checks) its keys
+    6. every half-edge is partitioned by its source, and each bucket sorts its
+       own, which gives the incidence lists in order
+
+The arrays of the CSRGraph are written straight to .npy files in a directory, in
+order, and the result is memory-mapped from there, exactly as CSRGraph.load()
+would. It is identical to what edges_to_csr() builds in memory. Buckets are sized
+so that working on one stays within the memory budget, so the peak memory only
+depends on the budget (and on how evenly ids hash and edges spread over the
+vertices), not on the size of the input."""
+
+# External
+import os
+import tempfile
+import numpy as np
+
+# Internal functions
+from .graph import CSRGraph, INDEX_DTYPE, OFFSET_DTYPE
+from .readers import Source, read_edge_chunks
+
+# Typing
+from typing import BinaryIO, Iterator, List
+
+# The default memory budget, in bytes
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+# Roughly how many copies of a bucket are alive at once while it is worked on
+# (sorting, deduping and so on), buckets are sized with this in mind
+WORKING_COPIES = 16
+# Roughly how much memory each line of text (or edge) takes up while a chunk of
+# them is being parsed (or spilled)
+CHUNK_ITEM_BYTES = 1024
+
+# Every kind of record spilled to disk
+ID_RECORD = np.dtype([("raw", np.int64), ("pos", np.int64)])
+FIRST_RECORD = np.dtype(
+    [("pos", np.int64), ("raw", np.int64), ("bucket", np.int64), ("local", np.int64)]
+)
+DENSE_RECORD = np.dtype([("local", np.int64), ("dense", np.int64)])
+END_RECORD = np.dtype([("pos", np.int64), ("dense", np.int64)])
+KEY_RECORD = np.dtype([("key", np.int64), ("direction", np.int8)])
+HALF_RECORD = np.dtype(
+    [("source", INDEX_DTYPE), ("target", INDEX_DTYPE), ("uid", INDEX_DTYPE)]
+)
+
+
+class _Spill:
+    """Records partitioned into buckets, each one an append-only file on disk"""
+
+    def __init__(self, directory: str, name: str, buckets: int, dtype: np.dtype):
+        self.dtype = dtype
+        self.paths = [
+            os.path.join(directory, f"{name}-{b}.bin") for b in range(buckets)
+        ]
+        self.files: List[BinaryIO] = [open(p, "wb") for p in self.paths]
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def add(self, bucket: np.ndarray, records: np.ndarray):
+        """Append every record to the end of its bucket"""
+        order = np.argsort(bucket, kind="stable")
+        bounds = np.searchsorted(bucket[order], np.arange(len(self) + 1)).tolist()
+        records = records[order]
+        for b in range(len(self)):
+            if bounds[b] < bounds[b + 1]:
+                self.files[b].write(records[bounds[b] : bounds[b + 1]].tobytes())
+
+    def close(self):
+        for f in self.files:
+            f.close()
+
+    def read(self, b: int, keep=False) -> np.ndarray:
+        """Read every record of a bucket (deleting its file unless kept)"""
+        records = np.fromfile(self.paths[b], dtype=self.dtype)
+        if not keep:
+            os.remove(self.paths[b])
+        return records
+
+
+class _NpyWriter:
+    """Write a 1-dimensional .npy file of known length sequentially, without
+    ever holding (or memory-mapping) all of it"""
+
+    def __init__(self, path: str, dtype, length: int):
+        self.dtype = np.dtype(dtype)
+        self.remaining = length
+        self.file = open(path, "wb")
+        np.lib.format.write_array_header_1_0(
+            self.file,
+            {
+                "descr": np.lib.format.dtype_to_descr(self.dtype),
+                "fortran_order": False,
+                "shape": (length,),
+            },
+        )
+
+    def write(self, values: np.ndarray):
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        self.file.write(values.tobytes())
+        self.remaining -= len(values)
+
+    def close(self):
+        self.file.close()
+        if self.remaining:
+            raise Exception(f"{self.file.name} is missing {self.remaining} values.")
+
+
+def _bucket_count(records: int, itemsize: int, memory_budget: int) -> int:
+    """How many buckets to split records into, so that each one can be worked
+    on within the memory budget"""
+    size = records * itemsize * WORKING_COPIES
+    return max(1, -(-size // memory_budget))
+
+
+def _ranges(values: np.ndarray, buckets: int, total: int) -> np.ndarray:
+    """Partition values in 0..total-1 into contiguous ranges"""
+    return values.astype(np.int64) * buckets // max(total, 1)
+
+
+def _hash(raw: np.ndarray, buckets: int) -> np.ndarray:
+    """Partition raw ids by a multiplicative hash (raw ids are often clustered)"""
+    mixed = raw.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return ((mixed >> np.uint64(32)) % np.uint64(buckets)).astype(np.int64)
+
+
+def _records(dtype: np.dtype, **columns) -> np.ndarray:
+    length = len(next(iter(columns.values())))
+    res = np.empty(length, dtype=dtype)
+    for name, values in columns.items():
+        res[name] = values
+    return res
+
+
+def _read_sorted_keys(paths: List[str], chunk: int) -> Iterator[np.ndarray]:
+    """Read the keys from each of the files in turn, chunk keys at a time"""
+    itemsize = np.dtype(np.int64).itemsize
+    for path in paths:
+        for start in range(0, os.path.getsize(path) // itemsize, chunk):
+            yield np.fromfile(
+                path, dtype=np.int64, count=chunk, offset=start * itemsize
+            )
+
+
+def ingest_snap(
+    source: Source,
+    directory: str,
+    directed=False,
+    vertex_limit=None,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+) -> CSRGraph:
+    """Convert a SNAP edge list (any path or file object, plain or compressed)
+    into a CSRGraph saved in the given directory (in the
+    format of CSRGraph.save()), and return it memory-mapped. The result is the
+    same as edges_to_csr() on the whole file, but at most about memory_budget
+    bytes of it are ever in memory. Temporary files are kept in the directory
+    as well, and removed once done."""
+
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=directory) as temp:
+        # Parse the text, recording every endpoint in order (the input may be
+        # compressed, so how many there are is only known once it is all read)
+        raw_path = os.path.join(temp, "raw.bin")
+        m = 0
+        chunk = max(1024, memory_budget // CHUNK_ITEM_BYTES)
+        with open(raw_path, "wb") as f:
+            for src, dst in read_edge_chunks(source, chunk, vertex_limit):
+                f.write(np.stack((src, dst), axis=1).tobytes())
+                m += len(src)
+
+        # Partition every endpoint (raw id, position) by a hash of its raw id
+        ids = _Spill(
+            temp,
+            "ids",
+            _bucket_count(2 * m, ID_RECORD.itemsize, memory_budget),
+            ID_RECORD,
+        )
+        for start in range(0, 2 * m, 2 * chunk):
+            raw = np.fromfile(
+                raw_path, dtype=np.int64, count=2 * chunk, offset=8 * start
+            )
+            pos = np.arange(start, start + len(raw), dtype=np.int64)
+            ids.add(_hash(raw, len(ids)), _records(ID_RECORD, raw=raw, pos=pos))
+        os.remove(raw_path)
+        ids.close()
+
+        # Distinct ids (and where they first appear) of every bucket
+        firsts = _Spill(
+            temp,
+            "firsts",
+            _bucket_count(2 * m, FIRST_RECORD.itemsize, memory_budget),
+            FIRST_RECORD,
+        )
+        n = 0
+        for b in range(len(ids)):
+            rec = ids.read(b, keep=True)
+            uniq, first = np.unique(rec["raw"], return_index=True)
+            pos = rec["pos"][first]
+            firsts.add(
+                _ranges(pos, len(firsts), 2 * m),
+                _records(
+                    FIRST_RECORD,
+                    pos=pos,
+                    raw=uniq,
+                    bucket=np.full(len(uniq), b),
+                    local=np.arange(len(uniq)),
+                ),
+            )
+            n += len(uniq)
+        firsts.close()
+
+        # Number the vertices in order of first appearance
+        labels = _NpyWriter(os.path.join(directory, "labels.npy"), np.int64, n)
+        dense = _Spill(temp, "dense", len(ids), DENSE_RECORD)
+        count = 0
+        for r in range(len(firsts)):
+            rec = firsts.read(r)
+            rec = rec[np.argsort(rec["pos"])]
+            labels.write(rec["raw"])
+            dense_ids = np.arange(count, count + len(rec))
+            dense.add(
+                rec["bucket"],
+                _records(DENSE_RECORD, local=rec["local"], dense=dense_ids),
+            )
+            count += len(rec)
+        labels.close()
+        dense.close()
+
+        # Bring the dense endpoints of every edge back together
+        ends = _Spill(
+            temp,
+            "ends",
+            _bucket_count(2 * m, END_RECORD.itemsize, memory_budget),
+            END_RECORD,
+        )
+        for b in range(len(ids)):
+            rec = ids.read(b)
+            _, inverse = np.unique(rec["raw"], return_inverse=True)
+            numbers = dense.read(b)
+            dense_of = np.empty(len(numbers), dtype=np.int64)
+            dense_of[numbers["local"]] = numbers["dense"]
+            ends.add(
+                _ranges(rec["pos"] // 2, len(ends), m),
+                _records(END_RECORD, pos=rec["pos"], dense=dense_of[inverse.ravel()]),
+            )
+        ends.close()
+
+        # Key every edge by its endpoints, from the smaller to the larger
+        keys = _Spill(
+            temp,
+            "keys",
+            _bucket_count(m, KEY_RECORD.itemsize, memory_budget),
+            KEY_RECORD,
+        )
+        for r in range(len(ends)):
+            rec = ends.read(r)
+            pairs = rec["dense"][np.argsort(rec["pos"])].reshape(-1, 2)
+            lo = pairs.min(axis=1)
+            hi = pairs.max(axis=1)
+            direction = np.sign(pairs[:, 1] - pairs[:, 0]).astype(np.int8)
+            keys.add(
+                _ranges(lo, len(keys), n),
+                _records(KEY_RECORD, key=lo * n + hi, direction=direction),
+            )
+        keys.close()
+
+        # Dedupe (or check) every bucket of keys, which are then sorted overall
+        sorted_keys = []
+        total = 0
+        vertex_labels = np.load(os.path.join(directory, "labels.npy"), mmap_mode="r")
+        for r in range(len(keys)):
+            rec = keys.read(r)
+            if directed:
+                # Symmetrize and dedupe, u -> v and v -> u are the same edge
+                k = np.unique(rec["key"])
+            else:
+                # Each undirected edge has to appear once from each endpoint
+                forward = np.sort(rec["key"][rec["direction"] > 0])
+                backward = np.sort(rec["key"][rec["direction"] < 0])
+                if not np.array_equal(forward, backward):
+                    missing = np.setxor1d(forward, backward)
+                    if len(missing):
+                        u = vertex_labels[missing[0] // n]
+                        v = vertex_labels[missing[0] % n]
+                        raise Exception(
+                            f"{u} is adjacent to {v}, but {v} is not adjacent to {u}."
+                        )
+                    raise Exception(
+                        "Some edges are listed more times in one direction."
+                    )
+                k = forward
+            # Self-loops never affect the connectivity, so they are dropped
+            k = k[k // n != k % n]
+            path_r = os.path.join(temp, f"sorted-{r}.bin")
+            k.tofile(path_r)
+            sorted_keys.append(path_r)
+            total += len(k)
+        del vertex_labels
+
+        # Write the edges, and partition both halves of each by its source
+        edge_u = _NpyWriter(os.path.join(directory, "edge_u.npy"), INDEX_DTYPE, total)
+        edge_v = _NpyWriter(os.path.join(directory, "edge_v.npy"), INDEX_DTYPE, total)
+        halves = _Spill(
+            temp,
+            "halves",
+            _bucket_count(2 * total, HALF_RECORD.itemsize, memory_budget),
+            HALF_RECORD,
+        )
+        # All halves from the smaller endpoints go first, which keeps the same
+        # order as CSRGraph.from_edges()
+        for side in (0, 1):
+            uid = 0
+            for k in _read_sorted_keys(sorted_keys, chunk):
+                u, v = k // n, k % n
+                if side == 0:
+                    edge_u.write(u)
+                    edge_v.write(v)
+                else:
+                    u, v = v, u
+                uids = np.arange(uid, uid + len(k))
+                halves.add(
+                    _ranges(u, len(halves), n),
+                    _records(HALF_RECORD, source=u, target=v, uid=uids),
+                )
+                uid += len(k)
+        edge_u.close()
+        edge_v.close()
+        halves.close()
+
+        # Sort every bucket of halves by source, into the incidence lists
+        offsets = _NpyWriter(
+            os.path.join(directory, "offsets.npy"), OFFSET_DTYPE, n + 1
+        )
+        targets = _NpyWriter(
+            os.path.join(directory, "targets.npy"), INDEX_DTYPE, 2 * total
+        )
+        edge_ids = _NpyWriter(
+            os.path.join(directory, "edge_ids.npy"), INDEX_DTYPE, 2 * total
+        )
+        offsets.write(np.asarray([0]))
+        written = 0
+        for r in range(len(halves)):
+            rec = halves.read(r)
+            rec = rec[np.argsort(rec["source"], kind="stable")]
+            targets.write(rec["target"])
+            edge_ids.write(rec["uid"])
+            # The vertices whose halves are in this bucket
+            begin = -(-r * n // len(halves))
+            end = -(-(r + 1) * n // len(halves))
+            degrees = np.bincount(rec["source"] - begin, minlength=end - begin)
+            offsets.write(written + np.cumsum(degrees))
+            written += len(rec)
+        offsets.close()
+        targets.close()
+        edge_ids.close()
+
+    return CSRGraph.load(directory)
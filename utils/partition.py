@@ -0,0 +1,153 @@
+"""A columnar, memory-mappable form of a partition of a graph's vertices into
+components. Instead of a list of Component frozensets, a partition is a handful
+of flat arrays:
+
+    vertices    the original vertex label of every (dense) vertex
+    labels      the component label of every (dense) vertex
+    offsets     component c consists of members[offsets[c]:offsets[c + 1]]
+    members     dense vertices, grouped by component
+
+Components are labeled 0..k-1 in order of their first vertex, so the same
+partition always has the same labels (no matter which order the components
+were found in). Alongside the arrays, a dictionary of metadata (source hash,
+root, runtime, etc.) is kept and saved as meta.json."""
+
+# Internal
+from utils import Component
+
+# External
+import hashlib
+import json
+import os
+import numpy as np
+
+# Typing
+from typing import Iterable, Iterator, Literal, Optional
+
+# Every array that makes up a partition, each one is saved to its own .npy file
+ARRAYS = ("vertices", "labels", "offsets", "members")
+
+
+class Partition:
+    # Dense vertex -> original vertex label
+    vertices: np.ndarray
+    # Dense vertex -> component label
+    labels: np.ndarray
+    # Start of each component in members (length k + 1)
+    offsets: np.ndarray
+    # Dense vertices, grouped by component
+    members: np.ndarray
+    # Anything else worth remembering about how this partition was computed
+    meta: dict
+
+    def __init__(
+        self,
+        vertices: np.ndarray,
+        labels: np.ndarray,
+        offsets: np.ndarray,
+        members: np.ndarray,
+        meta: Optional[dict] = None,
+    ):
+        self.vertices = vertices
+        self.labels = labels
+        self.offsets = offsets
+        self.members = members
+        self.meta = meta if meta is not None else dict()
+
+    @classmethod
+    def from_labels(
+        cls, vertices: Iterable[int], labels: Iterable[int], meta: Optional[dict] = None
+    ) -> "Partition":
+        """Build a partition from the original label of every vertex and any
+        per-vertex component labels (vertices sharing a label share a component).
+        The labels are renumbered canonically."""
+
+        vertex_array = np.asarray(vertices, dtype=np.int64)
+        raw = np.asarray(labels, dtype=np.int64)
+
+        # Renumber the components in order of their first vertex
+        _, first, inverse = np.unique(raw, return_index=True, return_inverse=True)
+        rank = np.empty(len(first), dtype=np.int32)
+        rank[np.argsort(first, kind="stable")] = np.arange(len(first), dtype=np.int32)
+        canonical = rank[inverse.ravel()]
+
+        members = np.argsort(canonical, kind="stable").astype(np.int32)
+        offsets = np.zeros(len(first) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(canonical, minlength=len(first)), out=offsets[1:])
+
+        return cls(vertex_array, canonical, offsets, members, meta)
+
+    @classmethod
+    def from_components(
+        cls, components: Iterable[Iterable[int]], meta: Optional[dict] = None
+    ) -> "Partition":
+        """Build a partition from a list of components (such as the output of
+        get()), where vertices are ordered by their original label."""
+
+        vertices = []
+        labels = []
+        for i, c in enumerate(components):
+            c = list(c)
+            vertices.extend(c)
+            labels.extend([i] * len(c))
+
+        order = np.argsort(np.asarray(vertices, dtype=np.int64), kind="stable")
+        return cls.from_labels(
+            np.asarray(vertices, dtype=np.int64)[order],
+            np.asarray(labels, dtype=np.int64)[order],
+            meta,
+        )
+
+    @classmethod
+    def load(cls, directory: str, mmap=True) -> "Partition":
+        """Load a partition previously written with save(). If mmap is set,
+        every array is memory-mapped read-only instead of read into memory."""
+
+        mode: Optional[Literal["r", "r+", "c"]] = "r" if mmap else None
+        vertices, labels, offsets, members = [
+            np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+            for name in ARRAYS
+        ]
+        with open(os.path.join(directory, "meta.json"), "r") as f:
+            meta = json.load(f)
+        return cls(vertices, labels, offsets, members, meta=meta)
+
+    def save(self, directory: str):
+        """Save every array of this partition as a .npy file (plus its metadata
+        as meta.json) in the given directory."""
+
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump(self.meta, f, indent=2)
+
+    def digest(self) -> str:
+        """A hash of the partition itself, the same for equal partitions (over
+        the same order of vertices) no matter how their components were labeled
+        or found"""
+        h = hashlib.sha256()
+        h.update(np.ascontiguousarray(self.vertices, dtype=np.int64).tobytes())
+        h.update(np.ascontiguousarray(self.labels, dtype=np.int64).tobytes())
+        return h.hexdigest()
+
+    def __len__(self) -> int:
+        """The number of components"""
+        return len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[Component]:
+        for i in range(len(self)):
+            yield self.component(i)
+
+    def sizes(self) -> np.ndarray:
+        """Get the number of vertices in every component"""
+        return np.diff(self.offsets)
+
+    def component(self, i: int) -> Component:
+        """Get component i (with the original vertex labels)"""
+        dense = self.members[self.offsets[i] : self.offsets[i + 1]]
+        return Component(self.vertices[dense].tolist())
+
+    def to_components(self):
+        """Convert into a list of components, as returned by get()"""
+        return list(self)
@@ -0,0 +1,128 @@
+"""Readers for SNAP edge lists, from any path or file object, plain or compressed
+with gzip, bz2 or xz (as SNAP distributes them). The compression is detected from
+the first bytes of the input rather than its name, and the input is decompressed
+as a stream while it is parsed, a chunk of lines at a time, so a decompressed copy
+is never written to disk (nor held in memory).
+
+Raw vertex ids in SNAP files are often sparse, so they are remapped to dense ids
+0..n-1 (in order of first appearance), along with the array of raw ids that maps
+every dense id back."""
+
+# External
+import bz2
+import contextlib
+import gzip
+import io
+import itertools
+import lzma
+import os
+import warnings
+import numpy as np
+
+# Typing
+from typing import IO, Callable, Dict, Iterator, Tuple, Union, cast
+
+# Anything an edge list can be read from, a path or an open file (text or binary)
+Source = Union[str, os.PathLike, IO]
+
+# The magic bytes every supported compressed format starts with, and how to
+# open a binary stream of it for reading
+MAGIC: Dict[bytes, Callable[[IO[bytes]], IO[bytes]]] = {
+    # GzipFile is a binary stream, it is just not typed as an IO[bytes]
+    b"\x1f\x8b": lambda raw: cast(IO[bytes], gzip.open(raw)),
+    b"BZh": bz2.open,
+    b"\xfd7zXZ\x00": lzma.open,
+}
+# How many lines are parsed at once by default
+CHUNK_LINES = 1 << 18
+
+
+def _decompress(raw: io.BufferedReader) -> IO[bytes]:
+    """Wrap a (peekable) binary stream in a decompressor if it is compressed"""
+    head = raw.peek(6)[:6]
+    for magic, opener in MAGIC.items():
+        if head.startswith(magic):
+            return opener(raw)
+    return raw
+
+
+@contextlib.contextmanager
+def open_edge_list(source: Source) -> Iterator[IO[str]]:
+    """Open a (possibly compressed) edge list as a stream of text lines. Paths
+    are opened (and closed again) here, open files are read from as they are,
+    and left open."""
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            with io.TextIOWrapper(_decompress(f), encoding="utf-8") as text:
+                yield text
+    elif isinstance(source, io.TextIOBase):
+        yield source
+    else:
+        if isinstance(source, io.BufferedReader):
+            buffered = source
+        else:
+            # Anything else (such as a BytesIO) is buffered here so it can be peeked
+            buffered = io.BufferedReader(cast(io.RawIOBase, source))
+        text = io.TextIOWrapper(_decompress(buffered), encoding="utf-8")
+        try:
+            yield text
+        finally:
+            # Do not close the file that was handed to us along with the wrappers
+            text.detach()
+            if buffered is not source:
+                buffered.detach()
+
+
+def read_edge_chunks(
+    source: Source, chunk_lines: int = CHUNK_LINES, vertex_limit=None
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Parse an edge list chunk_lines lines at a time, yielding two arrays of raw
+    vertex ids (src, dst) for every chunk. If vertex_limit is filled in, then
+    drop edges with a vertex number higher than this."""
+
+    with open_edge_list(source) as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_lines))
+            if not lines:
+                return
+            with warnings.catch_warnings():
+                # A chunk of only comments is perfectly valid
+                warnings.simplefilter("ignore", UserWarning)
+                edges = np.loadtxt(
+                    lines, dtype=np.int64, comments="#", usecols=(0, 1), ndmin=2
+                )
+            src, dst = edges[:, 0], edges[:, 1]
+            if vertex_limit:
+                mask = (src < vertex_limit) & (dst < vertex_limit)
+                src, dst = src[mask], dst[mask]
+            yield src, dst
+
+
+def read_edges(
+    source: Source, vertex_limit=None, chunk_lines: int = CHUNK_LINES
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Parse every (uncommented) line of an edge list into two arrays of raw
+    vertex ids, src and dst (see read_edge_chunks)."""
+
+    srcs, dsts = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+    for src, dst in read_edge_chunks(source, chunk_lines, vertex_limit):
+        srcs.append(src)
+        dsts.append(dst)
+    return np.concatenate(srcs), np.concatenate(dsts)
+
+
+def remap_dense(
+    src: np.ndarray, dst: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Remap two arrays of raw vertex ids to dense ids 0..n-1, given in order of
+    first appearance. Returns the dense src and dst, and the raw id of every
+    dense id (so labels[dense_src] == src)."""
+
+    raw = np.stack((src, dst), axis=1).ravel()
+    uniq, first, inverse = np.unique(raw, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind="stable")
+    rank = np.empty(len(uniq), dtype=np.int64)
+    rank[order] = np.arange(len(uniq))
+    dense = rank[inverse.ravel()].reshape(-1, 2)
+    return dense[:, 0], dense[:, 1], uniq[order]
@@ -1,87 +1,191 @@
 # Implementations
 from triconnect.edge.iterative import ThreeEdgeConnectIterative
+from triconnect.edge.kernel import ThreeEdgeConnectKernel
+from triconnect.edge.parallel import connect_by_blocks, connect_whole_graph
 
 # External
+import json
 import logging
-import pickle
-from collections import defaultdict
+import os
 from datetime import datetime
+import numpy as np
 
 # Internal functions
-from .analysis import print_stats
-from .testing import verify_graph
+from .analysis import components_path, print_stats
+from .cache import file_hash, load_cached_graph
+from .graph import CSRGraph
+from .partition import Partition
+from .readers import Source, read_edges, remap_dense
+from .testing import verify_partition
 
 # Typing
-from typing import DefaultDict, List
+from typing import Optional, Tuple
 
 
-def load_snap_dataset(file: str, directed=False, vertex_limit=None):
-    """Given a file path, load the given file into a dictionary. If node_limit
-    is filled in, then do not consider edges with a vertex number higher than
-    this."""
-
-    graph: DefaultDict[int, List[int]] = defaultdict(list)
+def load_snap_edges(file: str, vertex_limit=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Given a file path (under data/), parse every (uncommented) line of the
+    given SNAP file, plain or compressed, into two arrays of raw vertex ids, src
+    and dst. If vertex_limit is filled in, then drop edges with a vertex number
+    higher than this."""
+    return read_edges(f"data/{file}", vertex_limit)
 
-    # Open file and load into undirected graph
-    with open(f"data/{file}", "r") as f:
-        for line in f.readlines():
-            # Ignore lines that are commented out
-            if line[0] == "#":
-                continue
 
-            edge = line.strip().split("\t")
-            from_vertex = int(edge[0])
-            to_vertex = int(edge[1])
-            # print(f"{from_vertex} -- {to_vertex}")
+def edges_to_csr(src: np.ndarray, dst: np.ndarray, directed=False) -> CSRGraph:
+    """Convert two arrays of raw vertex ids into a CSRGraph. Vertices are given
+    dense ids in order of first appearance. If the edges are directed, every
+    edge is symmetrized and duplicates are dropped, otherwise every undirected
+    edge must be listed in both directions (and is verified to be)."""
 
-            # Check for vertex limit if it is necessary
-            if vertex_limit and (
-                from_vertex >= vertex_limit or to_vertex >= vertex_limit
-            ):
-                continue
+    # Relabel raw ids to dense ids, in order of first appearance
+    dense_src, dense_dst, labels = remap_dense(src, dst)
+    dense = np.stack((dense_src, dense_dst), axis=1)
 
-            # Append this to the graph
-            graph[from_vertex].append(to_vertex)
-
-    # If it is a directed graph
+    # Orient every edge from its smaller to its larger endpoint, and key it
+    n = len(labels)
+    lo = dense.min(axis=1).astype(np.int64)
+    hi = dense.max(axis=1).astype(np.int64)
+    keys = lo * n + hi
     if directed:
-        for u in graph.copy().keys():
-            connected = graph[u]
-            for v in connected:
-                if u not in graph[v]:
-                    graph[v].append(u)
-
-    verify_graph(graph)
-    return graph
-
-
-def run_and_save(data_path: str, directed: bool = False):
+        # Symmetrize and dedupe, u -> v and v -> u are the same undirected edge
+        keys = np.unique(keys)
+    else:
+        # Each undirected edge has to appear once from each of its endpoints
+        forward = np.sort(keys[dense[:, 0] < dense[:, 1]])
+        backward = np.sort(keys[dense[:, 0] > dense[:, 1]])
+        if not np.array_equal(forward, backward):
+            missing = np.setxor1d(forward, backward)
+            if len(missing):
+                u, v = labels[missing[0] // n], labels[missing[0] % n]
+                raise Exception(
+                    f"{u} is adjacent to {v}, but {v} is not adjacent to {u}."
+                )
+            raise Exception("Some edges are listed more times in one direction.")
+        keys = forward
+
+    return CSRGraph.from_edges(keys // n, keys % n, labels=labels)
+
+
+def read_snap_graph(source: Source, directed=False, vertex_limit=None) -> CSRGraph:
+    """Read a SNAP edge list from any path or file object, plain or compressed,
+    as a CSRGraph with dense vertex ids (its labels map them back to raw ids)."""
+    src, dst = read_edges(source, vertex_limit)
+    return edges_to_csr(src, dst, directed)
+
+
+def load_snap_dataset(
+    file: str, directed=False, vertex_limit=None, as_csr=False, dense=False
+):
+    """Given a file path, load the given file into a dictionary. If node_limit
+    is filled in, then do not consider edges with a vertex number higher than
+    this. If as_csr is set, return the graph as a CSRGraph instead. If dense is
+    set, the dictionary is keyed by dense ids rather than raw ones."""
+
+    graph = read_snap_graph(f"data/{file}", directed, vertex_limit)
+    return graph if as_csr else graph.to_dict(dense)
+
+
+def components_current(
+    data_path: str,
+    directed: bool = False,
+    whole_graph: bool = False,
+    split_bridges: bool = False,
+    reduce: bool = False,
+    verify: bool = False,
+) -> bool:
+    """Check whether the saved components of a SNAP file were computed (by
+    run_and_save) from the file as it is now, with the same options. If verify
+    is set, they must also have been verified (verified components are current
+    either way)."""
+
+    try:
+        with open(os.path.join(components_path(data_path), "meta.json"), "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    options = {
+        "directed": directed,
+        "whole_graph": whole_graph,
+        "split_bridges": split_bridges,
+        "reduce": reduce,
+    }
+    if any(meta.get(k) != v for k, v in options.items()):
+        return False
+    if verify and not meta.get("verified"):
+        return False
+    return meta.get("sha256") == file_hash(f"data/{data_path}")
+
+
+def run_and_save(
+    data_path: str,
+    directed: bool = False,
+    whole_graph: bool = False,
+    workers: Optional[int] = None,
+    split_bridges: bool = False,
+    verify: bool = False,
+    memory_budget: Optional[int] = None,
+    reduce: bool = False,
+):
     """Using a SNAP file, run the iterative version of the algorithm, and save
-    the results to a .pkl file for later use."""
+    the results in the columnar component format for later use. If whole_graph
+    is set, every connected component is solved (spread over a pool of workers)
+    rather than only the one containing the first vertex. If split_bridges is
+    also set, the graph is split at its bridges first, and every 2-edge-connected
+    block is solved independently instead. If verify is set, the result is
+    checked with verify_partition before being saved. If a memory_budget (in
+    bytes) is given, a graph that is not cached yet is ingested out of core. If
+    reduce is set, the graph is reduced to its kernel first (see
+    ThreeEdgeConnectKernel), in a single process."""
 
     # Load dataset from SNAP format
-    logging.info(f"Loading {data_path} into dictionary.")
-    snap = load_snap_dataset(data_path, directed)
-    logging.info(f"Finished loading {data_path} into dictionary.")
+    logging.info(f"Loading {data_path} into arrays.")
+    snap = load_cached_graph(data_path, directed, memory_budget=memory_budget)
+    logging.info(f"Finished loading {data_path} into arrays.")
 
     # Just let the root be the first vertex listed
-    root = list(snap.keys())[0]
+    root = None if whole_graph else int(snap.labels[0])
 
     # Run the algorithm
     logging.info(
-        f"Conducting iterative triconnectivity algorithm on {data_path} with {len(snap)} vertices."
+        f"Conducting iterative triconnectivity algorithm on {data_path} with {snap.n} vertices."
     )
     start_time = datetime.utcnow()
-    components = ThreeEdgeConnectIterative(root, snap, True).get()
+    if reduce:
+        labels = np.asarray(ThreeEdgeConnectKernel(root, snap).get_labels())
+    elif whole_graph and split_bridges:
+        labels = connect_by_blocks(snap, workers)
+    elif whole_graph:
+        labels = connect_whole_graph(snap, workers)
+    else:
+        labels = np.asarray(ThreeEdgeConnectIterative(root, snap, True).get_labels())
     end_time = datetime.utcnow()
     logging.info(
-        f"Finished in {end_time - start_time}. Saving results to {data_path}.pkl."
+        f"Finished in {end_time - start_time}. Saving results to {components_path(data_path)}."
     )
 
-    # Open file to save results to
-    with open(f"data/processed/{data_path}-components.pkl", "wb") as outp:
-        # Dump to file
-        pickle.dump(components, outp, pickle.HIGHEST_PROTOCOL)
+    if verify:
+        logging.info(f"Verifying the components of {data_path}.")
+        verify_partition(snap, labels, root=root)
+        logging.info(f"Verified the components of {data_path}.")
+
+    components = Partition.from_labels(
+        snap.labels,
+        labels,
+        {
+            "source": data_path,
+            "sha256": file_hash(f"data/{data_path}"),
+            "directed": directed,
+            "root": root,
+            "runtime": (end_time - start_time).total_seconds(),
+            "n": snap.n,
+            "m": snap.m,
+            "verified": verify,
+            "whole_graph": whole_graph,
+            "split_bridges": split_bridges,
+            "reduce": reduce,
+        },
+    )
+    components.save(components_path(data_path))
 
     logging.info(f"Saved and complete. Displaying stats.")
     print_stats(components)
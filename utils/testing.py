@@ -1,76 +1,616 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+from triconnect.edge.bridges import biconnected_components, find_articulation_points
+from triconnect.edge.cactus import Cactus
+from triconnect.edge.incremental import IncrementalThreeEdgeConnect
 from triconnect.edge.recursive import ThreeEdgeConnectRecursive
 from triconnect.edge.iterative import ThreeEdgeConnectIterative
+from triconnect.spqr import SPQRTree
+from triconnect.vertex import BOND, POLYGON, TRICONNECTED, ThreeVertexConnect
+from utils.disjoint import Disjoint
+from utils.graph import CSRGraph
+from utils.partition import Partition
 
-from typing import Dict, List
+from typing import Collection, Dict, List, Optional, Sequence, Tuple, Union
 
+import itertools
 import logging
+import numpy as np
 
 # Exceptions
-from .exceptions import ComponentsInconsistentException
+from .exceptions import (
+    ComponentsInconsistentException,
+    PartitionIncorrectException,
+    SeparationPairsIncorrectException,
+    TriconnectedComponentsIncorrectException,
+)
 
 
-def test_consistency(graph: Dict[int, List[int]]):
+def sample_roots(
+    graph: CSRGraph,
+    sample: Optional[int] = None,
+    strategy: str = "random",
+    seed: Optional[int] = None,
+) -> List[int]:
+    """Pick the roots (original labels) to check consistency from. If sample is
+    None, every vertex is a root. Otherwise, sample roots are picked either at
+    random, or (strategy="stratified") split evenly between the highest-degree
+    vertices, leaves and articulation points, topped up at random."""
+
+    n = graph.n
+    if sample is None or sample >= n:
+        return graph.labels.tolist()
+
+    rng = np.random.default_rng(seed)
+    picked: List[int] = []
+    if strategy == "stratified":
+        degrees = np.diff(graph.offsets)
+        per_stratum = sample // 3
+        strata = [
+            np.argsort(-degrees, kind="stable")[:per_stratum],
+            rng.permutation(np.flatnonzero(degrees <= 1))[:per_stratum],
+            rng.permutation(np.flatnonzero(find_articulation_points(graph)))[
+                :per_stratum
+            ],
+        ]
+        picked = list(dict.fromkeys(np.concatenate(strata).tolist()))
+    elif strategy != "random":
+        raise Exception(f"Unknown root sampling strategy {strategy}.")
+
+    # Top up with distinct random vertices
+    chosen = set(picked)
+    for u in rng.permutation(n).tolist():
+        if len(picked) >= sample:
+            break
+        if u not in chosen:
+            picked.append(u)
+            chosen.add(u)
+
+    return graph.labels[picked].tolist()
+
+
+# The graph being tested, set once in every worker process of the pool
+_worker_graph: Optional[CSRGraph] = None
+
+
+def _init_worker(graph: CSRGraph):
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _worker_root_digests(root: int, recursive: bool) -> Tuple[int, str, Optional[str]]:
+    assert _worker_graph is not None
+    return _root_digests(_worker_graph, root, recursive)
+
+
+def _root_digests(
+    graph: CSRGraph, root: int, recursive: bool
+) -> Tuple[int, str, Optional[str]]:
+    """Worker task, run the engines from the given root and return the digest of
+    the partition returned by each one."""
+    iterative = ThreeEdgeConnectIterative(root, graph).get_labels()
+    iterative_digest = Partition.from_labels(graph.labels, iterative).digest()
+    recursive_digest = None
+    if recursive:
+        labels = ThreeEdgeConnectRecursive(root, graph).get_labels()
+        recursive_digest = Partition.from_labels(graph.labels, labels).digest()
+    return root, iterative_digest, recursive_digest
+
+
+def test_consistency(
+    graph: Union[Dict[int, List[int]], CSRGraph],
+    sample: Optional[int] = None,
+    strategy: str = "random",
+    workers: Optional[int] = 1,
+    early_exit: bool = True,
+    recursive: bool = True,
+    seed: Optional[int] = None,
+):
     """Test the consistency of the algorithm on the given input. For every possible
     root, compare the returned components against one another. NOTE: This does
     not necessarily test for correctness, but consistent responses no matter the
-    initialization of the function."""
+    initialization of the function.
+
+    Partitions are compared by their digest. If sample is given, only that many
+    roots are checked (see sample_roots for the strategies). Roots are spread
+    over a pool of processes unless workers is 1. With early_exit, the first
+    inconsistent root stops the test, otherwise every root is checked and all of
+    the inconsistent ones are logged. The recursive engine (which cannot handle
+    deep graphs) can be left out with recursive=False."""
 
     # Verify that the graph is undirected
-    verify_graph(graph)
+    if not isinstance(graph, CSRGraph):
+        verify_graph(graph)
+        graph = CSRGraph.from_dict(graph)
 
-    # Get the list of possible roots
-    vertices = [k for k in graph]
-    # Initial set of components to compare against (for recursive and iterative)
-    iterative_components = set(ThreeEdgeConnectIterative(vertices[0], graph).get())
-    recursive_components = set(ThreeEdgeConnectRecursive(vertices[0], graph).get())
-    # Both must have the same amount of components
-    if len(iterative_components) != len(recursive_components):
+    roots = sample_roots(graph, sample, strategy, seed)
+    # Initial partition to compare against (for recursive and iterative)
+    _, expected, expected_recursive = _root_digests(graph, roots[0], recursive)
+    # Both must return the same partition
+    if recursive and expected_recursive != expected:
         raise ComponentsInconsistentException()
 
-    count = len(iterative_components)
-    # Run the algorithm for every other set of vertices
-    for i in range(1, len(vertices)):
-        v = vertices[i]
-        iterative_test_components = ThreeEdgeConnectIterative(v, graph).get()
-        recursive_test_components = ThreeEdgeConnectRecursive(v, graph).get()
-
-        # Compare returned components against the intial set
-        for c in iterative_test_components:
-            if (
-                frozenset(c) not in iterative_components
-                or frozenset(c) not in recursive_components
-            ):
-                raise ComponentsInconsistentException()
-
-        # Compare recursive as well
-        for c in recursive_test_components:
-            if (
-                frozenset(c) not in iterative_components
-                or frozenset(c) not in recursive_components
-            ):
-                raise ComponentsInconsistentException()
-
-        # Make sure the count of components is the exact same
-        if (
-            len(iterative_test_components) != count
-            or len(recursive_test_components) != count
-        ):
-            raise ComponentsInconsistentException()
+    inconsistent: List[int] = []
+
+    def check(result: Tuple[int, str, Optional[str]]) -> bool:
+        """Record whether a root's partitions match the initial one"""
+        root, iterative_digest, recursive_digest = result
+        if iterative_digest != expected or (recursive and recursive_digest != expected):
+            logging.error(f"Components were inconsistent when rooted at {root}.")
+            inconsistent.append(root)
+            return False
+        return True
+
+    # Run the algorithm for every other root
+    others = roots[1:]
+    if workers == 1 or len(others) <= 1:
+        for root in others:
+            if not check(_root_digests(graph, root, recursive)) and early_exit:
+                break
+    else:
+        # Every worker is sent the graph once, rather than with every root
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(graph,)
+        ) as executor:
+            futures = [
+                executor.submit(_worker_root_digests, root, recursive)
+                for root in others
+            ]
+            for future in as_completed(futures):
+                if not check(future.result()) and early_exit:
+                    # Drop every root that has not started yet
+                    for f in futures:
+                        f.cancel()
+                    break
+
+    if inconsistent:
+        raise ComponentsInconsistentException()
 
     # Success! Print out the components that were returned
+    if sample is None:
+        components = set(ThreeEdgeConnectIterative(roots[0], graph).get())
+        logging.info(
+            f"Graph was consistent for all root inputs. The components are: {components}"
+        )
+    else:
+        logging.info(f"Graph was consistent for all {len(roots)} sampled roots.")
+
+
+def test_correctness(graph: Dict[int, List[int]]):
+    """Test the correctness of the algorithm on the given input, by checking the
+    components (and cut pairs) it returns for the whole graph with
+    verify_partition. Unlike test_consistency, this runs in near-linear time."""
+
+    verify_graph(graph)
+    engine = ThreeEdgeConnectIterative(None, graph, cut_pairs=True)
+    verify_partition(engine.csr, engine.get_labels(), engine.get_cut_pairs())
+
+    logging.info(f"Graph was verified correct. The components are: {engine.get()}")
+
+
+def test_incremental(graph: Dict[int, List[int]], seed: Optional[int] = None):
+    """Test IncrementalThreeEdgeConnect against brute force. It is seeded with a
+    random half of the edges of the graph, the other half is inserted one edge
+    at a time with add_edge, and after every insertion the components are
+    compared with brute_force_labels. Only meant for small graphs."""
+
+    verify_graph(graph)
+    full = CSRGraph.from_dict(graph)
+    order = np.random.default_rng(seed).permutation(full.m)
+    seeded, inserted = order[: full.m // 2], order[full.m // 2 :]
+
+    incremental = IncrementalThreeEdgeConnect(
+        CSRGraph.from_edges(
+            full.edge_u[seeded], full.edge_v[seeded], labels=full.labels, n=full.n
+        )
+    )
+    edges = seeded.tolist()
+
+    def check(after: str):
+        expected = Partition.from_labels(full.labels, brute_force_labels(full, edges))
+        labels = Partition.from_labels(
+            incremental.labels, incremental.get_labels()
+        ).digest()
+        if labels != expected.digest():
+            raise PartitionIncorrectException(
+                f"the incremental components{after} do not match a brute-force search."
+            )
+
+    check("")
+    vertex_labels = full.labels.tolist()
+    for e in inserted.tolist():
+        u, v = vertex_labels[full.edge_u[e]], vertex_labels[full.edge_v[e]]
+        incremental.add_edge(u, v)
+        edges.append(e)
+        check(f" after inserting {u} -- {v}")
+
     logging.info(
-        f"Graph was consistent for all root inputs. The components are: {iterative_components}"
+        f"Incremental insertion of {len(inserted)} edges was verified by brute force."
     )
 
 
+def test_cut_pairs(graph: Dict[int, List[int]]):
+    """Test the cut pairs (and bridges) of the cactus against brute force, by
+    removing every edge and every pair of edges and checking whether the graph
+    falls apart. Only meant for small graphs, unlike verify_partition which
+    checks them with random labels."""
+
+    verify_graph(graph)
+    csr = CSRGraph.from_dict(graph)
+    engine = ThreeEdgeConnectIterative(None, csr, cut_pairs=True)
+    assert engine.cactus is not None
+
+    edges = range(csr.m)
+    ends = list(zip(csr.edge_u.tolist(), csr.edge_v.tolist()))
+    pieces = len(set(_connected_without(csr.n, ends)))
+
+    def disconnects(*removed: int) -> bool:
+        return len(set(_connected_without(csr.n, ends, removed))) > pieces
+
+    bridges = {e for e in edges if disconnects(e)}
+    if set(engine.cactus.bridge_edges) != bridges:
+        raise PartitionIncorrectException(
+            "the bridges do not match a brute-force search."
+        )
+
+    expected = {
+        frozenset(pair)
+        for pair in itertools.combinations(sorted(set(edges) - bridges), 2)
+        if disconnects(*pair)
+    }
+    found = {
+        frozenset(pair)
+        for c in engine.get_cut_pairs()
+        for pair in itertools.combinations(c, 2)
+    }
+    if found != expected:
+        raise PartitionIncorrectException(
+            "the cut pairs do not match a brute-force search."
+        )
+
+    logging.info(f"The {len(expected)} cut pairs were verified by brute force.")
+
+
+def test_triconnected_components(graph: Dict[int, List[int]]):
+    """Test the triconnected components of ThreeVertexConnect against the
+    properties that make them unique, checking that no triconnected one falls
+    apart by removing any one or two of its vertices by brute force. Every
+    component must be a bond (two vertices and at least three edges), a
+    polygon (a cycle) or a simple triconnected graph, every real edge must be
+    in exactly one of them (unless its block is a single edge) and every
+    virtual edge in exactly two (or none, if it was dropped when merging), no
+    two bonds and no two polygons may share a
+    virtual edge, and the components must form one tree per block."""
+
+    verify_graph(graph)
+    engine = ThreeVertexConnect(None, graph)
+    csr = engine.csr
+    edge_u, edge_v = engine.edge_u, engine.edge_v
+    components = engine.components
+
+    # The components every edge is in
+    containing: Dict[int, List[int]] = dict()
+    for c, component in enumerate(components):
+        for e in component.edges:
+            containing.setdefault(e, []).append(c)
+
+    blocks = biconnected_components(csr).tolist()
+    block_edges: Dict[int, List[int]] = dict()
+    for e, block in enumerate(blocks):
+        block_edges.setdefault(block, []).append(e)
+    # Blocks that are a single edge have no components at all (nor do
+    # self-loops, which are in no block)
+    trivial = {-1} | {
+        block
+        for block, edges in block_edges.items()
+        if len({edge_u[e] for e in edges} | {edge_v[e] for e in edges}) == 2
+        and len(edges) < 3
+    }
+
+    for e in range(csr.m):
+        expected = int(blocks[e] not in trivial)
+        if len(containing.get(e, [])) != expected:
+            raise TriconnectedComponentsIncorrectException(
+                f"the edge {e} is in {len(containing.get(e, []))} components, instead of {expected}."
+            )
+    # Virtual edges dropped when merging two bonds or polygons are in none
+    for e in range(csr.m, len(edge_u)):
+        if len(containing.get(e, [])) not in (0, 2):
+            raise TriconnectedComponentsIncorrectException(
+                f"the virtual edge {e} is in {len(containing[e])} components, instead of two."
+            )
+
+    for component in components:
+        ends = [(edge_u[e], edge_v[e]) for e in component.edges]
+        vertices = {u for end in ends for u in end}
+        degrees = [0] * csr.n
+        for u, v in ends:
+            degrees[u] += 1
+            degrees[v] += 1
+
+        def splits(*removed: int) -> bool:
+            pieces = _connected_without(csr.n, ends, removed_vertices=removed)
+            return len({pieces[u] for u in vertices if u not in removed}) > 1
+
+        if component.kind == BOND:
+            valid = len(vertices) == 2 and len(ends) >= 3
+        elif component.kind == POLYGON:
+            valid = (
+                len(ends) == len(vertices) >= 3
+                and all(degrees[u] == 2 for u in vertices)
+                and not splits()
+            )
+        elif component.kind == TRICONNECTED:
+            valid = (
+                len(vertices) >= 4
+                and len({frozenset(end) for end in ends}) == len(ends)
+                and all(u != v for u, v in ends)
+                and not any(
+                    splits(*removed)
+                    for k in (0, 1, 2)
+                    for removed in itertools.combinations(sorted(vertices), k)
+                )
+            )
+        else:
+            valid = False
+        if not valid:
+            raise TriconnectedComponentsIncorrectException(
+                f"{component} is not a valid {component.kind}."
+            )
+
+    # Every virtual edge left joins two components, which must form a forest
+    # with one tree per block
+    forest = Disjoint(len(components))
+    for e in range(csr.m, len(edge_u)):
+        if e not in containing:
+            continue
+        a, b = containing[e]
+        kind = components[a].kind
+        if kind != TRICONNECTED and kind == components[b].kind:
+            raise TriconnectedComponentsIncorrectException(
+                f"two components of kind {kind} share the virtual edge {e}."
+            )
+        if forest.find(a) == forest.find(b):
+            raise TriconnectedComponentsIncorrectException(
+                "the components do not form a tree."
+            )
+        forest.union(a, b)
+    trees = len({forest.find(c) for c in range(len(components))})
+    if trees != len(set(block_edges) - trivial):
+        raise TriconnectedComponentsIncorrectException(
+            f"the components form {trees} trees, instead of one per block."
+        )
+
+    logging.info(
+        f"The {len(components)} triconnected components were verified by brute force."
+    )
+
+
+def test_separation_pairs(graph: Dict[int, List[int]]):
+    """Test the separation pairs of the SPQR tree against brute force, by
+    removing every pair of vertices of every block and checking whether the
+    rest of the block falls apart. Both separation_pairs() and
+    is_separation_pair() are checked."""
+
+    verify_graph(graph)
+    tree = SPQRTree(ThreeVertexConnect(None, graph))
+    csr = tree.engine.csr
+    edge_u, edge_v = csr.edge_u.tolist(), csr.edge_v.tolist()
+    labels = csr.labels.tolist()
+
+    block_ends: Dict[int, List[Tuple[int, int]]] = dict()
+    for e, block in enumerate(biconnected_components(csr).tolist()):
+        if block != -1:
+            block_ends.setdefault(block, []).append((edge_u[e], edge_v[e]))
+
+    expected = set()
+    for ends in block_ends.values():
+        vertices = sorted({u for end in ends for u in end})
+        for x, y in itertools.combinations(vertices, 2):
+            pieces = _connected_without(csr.n, ends, removed_vertices=(x, y))
+            if len({pieces[u] for u in vertices if u not in (x, y)}) > 1:
+                expected.add(frozenset((labels[x], labels[y])))
+
+    if {frozenset(pair) for pair in tree.separation_pairs()} != expected:
+        raise SeparationPairsIncorrectException(
+            "separation_pairs() does not match a brute-force search."
+        )
+    for x, y in itertools.combinations(labels, 2):
+        if tree.is_separation_pair(x, y) != (frozenset((x, y)) in expected):
+            raise SeparationPairsIncorrectException(
+                f"is_separation_pair({x}, {y}) does not match a brute-force search."
+            )
+
+    logging.info(f"The {len(expected)} separation pairs were verified by brute force.")
+
+
+def _connected_without(
+    n: int,
+    ends: Sequence[Tuple[int, int]],
+    removed_edges: Collection[int] = (),
+    removed_vertices: Collection[int] = (),
+) -> List[int]:
+    """The connected component of every vertex 0..n-1 of the graph with the
+    given edges (as their two endpoints), once the removed edges (by index into
+    ends) and vertices are taken out. Removed vertices are left by themselves."""
+
+    disjoint = Disjoint(n)
+    for i, (u, v) in enumerate(ends):
+        if i in removed_edges or u in removed_vertices or v in removed_vertices:
+            continue
+        disjoint.union(u, v)
+    return [disjoint.find(u) for u in range(n)]
+
+
+def brute_force_labels(
+    graph: CSRGraph, edges: Optional[Sequence[int]] = None
+) -> List[int]:
+    """Find the 3-edge-connected components of the graph made up of the given
+    edges (uids, every edge by default) by brute force. Two vertices are
+    3-edge-connected exactly when removing no set of at most two edges
+    disconnects them, so the component label of every (dense) vertex is given by
+    the connected components it falls in after every such removal. This takes
+    O(m^2 (n + m)) time."""
+
+    if edges is None:
+        edges = range(graph.m)
+    edge_u, edge_v = graph.edge_u.tolist(), graph.edge_v.tolist()
+    ends = [(edge_u[e], edge_v[e]) for e in edges]
+    removals = itertools.chain(
+        [()],
+        itertools.combinations(range(len(ends)), 1),
+        itertools.combinations(range(len(ends)), 2),
+    )
+    keys: List[List[int]] = [[] for _ in range(graph.n)]
+    for removed in removals:
+        for u, c in enumerate(_connected_without(graph.n, ends, set(removed))):
+            keys[u].append(c)
+
+    labels: Dict[Tuple[int, ...], int] = dict()
+    return [labels.setdefault(tuple(key), u) for u, key in enumerate(keys)]
+
+
 def verify_graph(graph: Dict[int, List[int]]):
     """Takes in an undirected graph, and makes sure every edge has its opposite
     in the graph."""
 
+    # Membership checks against sets rather than lists, so hubs are not quadratic
+    adjacent = {u: set(adj) for u, adj in graph.items()}
     for u, adj in graph.items():
         for v in adj:
-            if u not in graph[v]:
+            if u not in adjacent[v]:
                 raise Exception(
                     f"{u} is adjacent to {v}, but {v} is not adjacent to {u}."
                 )
+
+
+def cut_labels(graph: CSRGraph, rng: np.random.Generator) -> np.ndarray:
+    """Give every edge a random 64-bit label, such that (with high probability)
+    an edge is a bridge exactly when its label is 0, and two edges form a cut pair
+    exactly when their labels are equal. Every edge off some spanning forest gets
+    a random label, and every tree edge gets the XOR of the labels of the edges
+    covering it (whose cycle through the tree goes over it). A set of edges is a
+    cut exactly when the XOR of their labels is 0."""
+
+    n = graph.n
+    offsets = graph.offsets.tolist()
+    targets = graph.targets.tolist()
+    half_edges = graph.edge_ids.tolist()
+
+    # Any spanning forest will do, every vertex comes after its parent in order
+    parent_edge = [-1] * n
+    seen = bytearray(n)
+    order: List[int] = []
+    for root in range(n):
+        if seen[root]:
+            continue
+        seen[root] = 1
+        stack = [root]
+        while stack:
+            u = stack.pop()
+            order.append(u)
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                if not seen[v]:
+                    seen[v] = 1
+                    parent_edge[v] = half_edges[i]
+                    stack.append(v)
+
+    tree = np.zeros(graph.m, dtype=bool)
+    tree_edges = np.asarray(parent_edge, dtype=np.int64)
+    tree[tree_edges[tree_edges >= 0]] = True
+    labels = rng.integers(
+        np.iinfo(np.uint64).max, size=graph.m, dtype=np.uint64, endpoint=True
+    )
+    labels[tree] = 0
+
+    # The XOR of the labels of every non-tree edge at each vertex, summed over a
+    # subtree this leaves exactly the edges leaving that subtree
+    acc = np.zeros(n, dtype=np.uint64)
+    np.bitwise_xor.at(acc, graph.edge_u[~tree], labels[~tree])
+    np.bitwise_xor.at(acc, graph.edge_v[~tree], labels[~tree])
+
+    acc_list = acc.tolist()
+    res = labels.tolist()
+    edge_u = graph.edge_u.tolist()
+    edge_v = graph.edge_v.tolist()
+    for v in reversed(order):
+        e = parent_edge[v]
+        if e != -1:
+            res[e] = acc_list[v]
+            acc_list[edge_u[e] + edge_v[e] - v] ^= acc_list[v]
+
+    return np.asarray(res, dtype=np.uint64)
+
+
+def verify_partition(
+    graph: CSRGraph,
+    labels: Union[Sequence[int], np.ndarray],
+    cut_pairs: Optional[List[List[int]]] = None,
+    root: Optional[int] = None,
+    seed: Optional[int] = None,
+):
+    """Verify that the component label of every (dense) vertex gives exactly the
+    3-edge-connected components of the graph, in near-linear time, raising a
+    PartitionIncorrectException if not. If cut pairs (classes of edge uids, from
+    get_cut_pairs()) are given, they are checked too. If a root (original label)
+    is given, only its connected component is checked.
+
+    The partition is correct when contracting every component leaves a forest
+    of cacti joined by bridges, no edge inside a component lies on a cut of at
+    most two edges, and the edges of each cycle of the cacti are exactly a class
+    of cut pairs (and the bridges exactly the bridges). Cuts are found with
+    random labels (see cut_labels), so this fails to notice a wrong partition
+    with probability around m^2 / 2^64."""
+
+    edges = np.arange(graph.m)
+    components = graph.connected_components()
+    if root is not None:
+        edges = np.flatnonzero(
+            components[graph.edge_u] == components[graph.index(root)]
+        )
+
+    try:
+        cactus = Cactus(graph, labels, edges)
+    except Exception:
+        raise PartitionIncorrectException(
+            "the contracted components do not form a cactus."
+        )
+
+    # No component may reach across two connected components (which no cut
+    # inside either one could tell apart)
+    node = cactus.node_of
+    if np.unique(np.stack([node, components]), axis=1).shape[1] != cactus.k:
+        raise PartitionIncorrectException(
+            "a component spans more than one connected component."
+        )
+
+    # The label of every edge, and how many edges share it
+    cut = cut_labels(graph, np.random.default_rng(seed))
+    _, inverse, counts = np.unique(cut[edges], return_inverse=True, return_counts=True)
+    shared = np.zeros(graph.m, dtype=np.int64)
+    shared[edges] = counts[inverse.ravel()]
+
+    inside = edges[node[graph.edge_u[edges]] == node[graph.edge_v[edges]]]
+    bad = inside[(cut[inside] == 0) | (shared[inside] > 1)]
+    if len(bad):
+        e = int(bad[0])
+        raise PartitionIncorrectException(
+            f"the edge {graph.labels[graph.edge_u[e]]} -- {graph.labels[graph.edge_v[e]]} lies inside a component, but on a cut of at most two edges."
+        )
+
+    for c in cactus.cycle_edges:
+        label = cut[c[0]]
+        if label == 0 or (cut[c] != label).any() or shared[c[0]] != len(c):
+            raise PartitionIncorrectException(
+                f"the edges {c} form a cycle between components, but not a class of cut pairs."
+            )
+    if (cut[cactus.bridge_edges] != 0).any():
+        raise PartitionIncorrectException(
+            "an edge that is a bridge between the contracted components is not a bridge of the graph."
+        )
+
+    if cut_pairs is not None:
+        expected = {frozenset(c) for c in cactus.cycle_edges}
+        if {frozenset(c) for c in cut_pairs} != expected:
+            raise PartitionIncorrectException("the cut pairs do not match.")